@@ -15,6 +15,7 @@ def exibir_menu():
     print("1. Controle do Reômetro (Coleta de Dados)       [1.Controle_Reometro.py]")
     print("2. Editar JSON de Coleta (Correção Manual)      [1a.Edit-Json-coleta.py]")
     print("3. Pré-Análise e Filtro (Gera CSV/JSON Final)   [1b.Pre-analise-filtro.py]")
+    print("10. Migrar JSONs Antigos para o Esquema Atual   [1c.Migrar_Esquema_JSON.py]")
     
     print("\n--- ANÁLISE E MODELAGEM ---")
     print("4. Análise Reológica (Modelos, Bagley, Mooney)  [2.Analise_reologica.py]")
@@ -57,7 +58,8 @@ def main():
         '6': '2b.Tratamento_Estatistico.py',
         '7': '3.Visualizar_resultados.py',
         '8': '4.Comparativo-Analises.py',
-        '9': '5.Processador_Rotacional_Completo.py'
+        '9': '5.Processador_Rotacional_Completo.py',
+        '10': '1c.Migrar_Esquema_JSON.py'
     }
 
     while True:
@@ -192,8 +192,8 @@ def validar_ponto(p_linha, p_pasta, massa_g, duracao_s):
 def salvar_dados_calibracao_py(filepath, data):
     """Salva os dados da calibração em um arquivo JSON."""
     try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        with utils_reologia.bloquear_pasta(os.path.dirname(os.path.abspath(filepath))):
+            utils_reologia.salvar_json_atomico(filepath, data, indent=4, ensure_ascii=False)
         print(f"Dados de calibração salvos com sucesso em: {filepath}")
     except IOError as e:
         print(f"Erro ao salvar o arquivo de calibração: {e}")
@@ -362,8 +362,8 @@ def salvar_resultados_json_individual_py(data_bateria, json_filename=None):
         data_bateria['testes'] = sorted(data_bateria['testes'], key=lambda t: t.get('media_pressao_linha_bar', 0))
         data_bateria["data_hora_ultima_coleta"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data_bateria, f, indent=4, ensure_ascii=False)
+        with utils_reologia.bloquear_pasta(RESULTS_JSON_DIR):
+            utils_reologia.salvar_json_atomico(filename, data_bateria, indent=4, ensure_ascii=False)
         print(f"\nSalvo em: {filename}")
     except IOError as e:
         print(f"Erro ao salvar JSON: {e}")
@@ -440,6 +440,7 @@ def realizar_coleta_de_teste_py(ser, data_bateria=None, json_filename=None):
              print("ERRO: Parâmetros inválidos."); return
 
         data_bateria = {
+            "schema_version": utils_reologia.VERSAO_ESQUEMA_ENSAIO,
             "id_amostra": id_amostra,
             "descricao": descricao,
             "data_hora_inicio": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -590,8 +591,7 @@ def menu_principal_py(ser):
                 caminho = utils_reologia.selecionar_arquivo(RESULTS_JSON_DIR, "*.json", "Selecione o arquivo para continuar", ".json")
                 if caminho:
                     try:
-                        with open(caminho, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
+                        data = utils_reologia.carregar_ensaio_json(caminho) # Legados são migrados ao continuar
                         nome = os.path.basename(caminho)
                         realizar_coleta_de_continuacao(ser, data, nome)
                     except Exception as e:
@@ -9,7 +9,6 @@ Autor: Bruno Egami (Modificado por Gemini)
 Data: 04/11/2025
 """
 
-import json
 import os
 import glob
 from datetime import datetime
@@ -17,8 +16,8 @@ import utils_reologia
 
 # --- Configurações ---
 RESULTS_JSON_DIR = utils_reologia.CONSTANTS['RESULTS_JSON_DIR']
-# [NOVO] Chave de pressão principal para este script (Sensor de Sistema)
-CHAVE_PRESSAO_PRINCIPAL = "media_pressao_sistema_bar"
+# Chave de pressão principal para este script (Sensor de Sistema/Linha, esquema atual)
+CHAVE_PRESSAO_PRINCIPAL = "media_pressao_linha_bar"
 
 def input_float_com_virgula(mensagem_prompt, permitir_vazio=False, default_val=None):
     """Pede um número float ao usuário, aceitando ',' como decimal."""
@@ -70,7 +69,7 @@ def listar_pontos_do_ensaio(data):
         tempo = ponto.get('duracao_real_s', 0.0)
         
         # [MODIFICADO] Exibe ambos os sensores
-        pressao_sis = ponto.get('media_pressao_sistema_bar', 0.0)
+        pressao_sis = ponto.get(CHAVE_PRESSAO_PRINCIPAL, 0.0)
         pressao_pas = ponto.get('media_pressao_pasta_bar', 0.0)
         print(f"{idx:<4} | {ponto_n:<8} | {pressao_sis:<18.4f} | {pressao_pas:<16.4f} | {massa:<12.3f} | {tempo:<10.2f}")
 
@@ -102,7 +101,7 @@ def modificar_ponto(data):
                 print(f"\nModificando Ponto Nº {ponto_original.get('ponto_n', 'N/A')} (Idx: {idx})")
                 
                 # [MODIFICADO] Exibe ambas as pressões
-                print(f"  P. Sistema: {ponto_original.get('media_pressao_sistema_bar', 0.0):.4f} bar")
+                print(f"  P. Sistema: {ponto_original.get(CHAVE_PRESSAO_PRINCIPAL, 0.0):.4f} bar")
                 print(f"  P. Pasta:   {ponto_original.get('media_pressao_pasta_bar', 0.0):.4f} bar")
                 
                 # Modificar Massa
@@ -200,8 +199,8 @@ def salvar_json_editado(data, nome_arquivo_original):
         
         data["data_hora_ultima_edicao"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        with open(caminho_completo_saida, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        with utils_reologia.bloquear_pasta(RESULTS_JSON_DIR):
+            utils_reologia.salvar_json_atomico(caminho_completo_saida, data, indent=4, ensure_ascii=False)
         print(f"\nArquivo editado salvo com sucesso em: {caminho_completo_saida}")
     except IOError as e:
         print(f"Erro ao salvar o arquivo JSON editado: {e}")
@@ -265,8 +264,8 @@ def main():
     nome_arquivo = os.path.basename(caminho_arquivo)
     
     try:
-        with open(caminho_arquivo, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # Arquivos legados são migrados em memória para o esquema atual
+        data = utils_reologia.carregar_ensaio_json(caminho_arquivo)
             
         # Validation
         if (not data.get('testes') or len(data['testes']) == 0 or 
@@ -8,65 +8,54 @@ Data: 04/11/2025
 Funcionalidade:
 1.  Carrega um arquivo JSON (assume formato de 2 sensores).
 2.  Calcula a vazão (Q) e a tensão de cisalhamento na parede (Tw) 
-    usando a PRESSÃO DO SISTEMA (media_pressao_sistema_bar).
+    usando a PRESSÃO DO SISTEMA (media_pressao_linha_bar).
 3.  Plota Pressão do Sistema (bar) vs Vazão (mm³/s) em escala log-log.
 4.  Permite ao usuário selecionar outliers visualmente para exclusão.
 5.  Salva um novo arquivo JSON "limpo_" contendo apenas os pontos selecionados.
 """
 
-import json
 import os
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime
 import utils_reologia
+import reologia_io
 
 # --- Configurações ---
 RESULTS_JSON_DIR = utils_reologia.CONSTANTS['RESULTS_JSON_DIR']
-# [NOVO] Chave de pressão para filtragem (Pressão do Pistão/Sistema)
-CHAVE_PRESSAO_FILTRAGEM = "media_pressao_sistema_bar"
+# Chave de pressão para filtragem (Pressão do Pistão/Sistema = sensor de linha no esquema atual)
+CHAVE_PRESSAO_FILTRAGEM = "media_pressao_linha_bar"
 
 def calcular_vazao_e_tensao(data):
     """
     [MODIFICADO] Calcula Q e Tw (Tensão de cisalhamento) usando 
-    SEMPRE a 'media_pressao_sistema_bar'.
+    SEMPRE a pressão do sistema (CHAVE_PRESSAO_FILTRAGEM).
     """
-    D_cap_mm = data.get('diametro_capilar_mm')
-    L_cap_mm = data.get('comprimento_capilar_mm')
-    rho_g_cm3 = data.get('densidade_pasta_g_cm3')
+    ensaio = reologia_io.Ensaio.de_dados(data)
     
-    if not all([D_cap_mm, L_cap_mm, rho_g_cm3]):
+    if not all([ensaio.D_mm, ensaio.L_mm, ensaio.rho_g_cm3]):
         print("ERRO: Dados geométricos (D, L) ou densidade (rho) ausentes no JSON.")
         return None
-        
-    R_cap_mm = D_cap_mm / 2.0
+    
+    # Cálculo vetorizado sobre todos os pontos (colunas do Ensaio)
+    pressao_bar = ensaio.pressoes_bar(usar_pressao_pasta=False)
+    validos = (ensaio.massa_g > 0) & (ensaio.duracao_s > 0) & (pressao_bar > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Q_mm3_s = ensaio.vazao_m3_s * 1e9  # 1. Vazão Volumétrica (Q) em [mm³/s]
+        Tw_Pa = ensaio.tau_w               # 2. Tensão de Cisalhamento na Parede (Tw) em [Pa]
     
     pontos_processados = []
     
     for i, ponto in enumerate(data.get('testes', [])):
-        massa_g = ponto.get('massa_g_registrada')
-        duracao_s = ponto.get('duracao_real_s')
-        
-        # [MODIFICADO] Usa diretamente a chave do sensor de Sistema
-        pressao_bar = ponto.get(CHAVE_PRESSAO_FILTRAGEM) 
-        
-        if not all([massa_g, duracao_s, pressao_bar]) or duracao_s <= 0 or massa_g <= 0 or pressao_bar < 0:
+        if not validos[i]:
             print(f"Aviso: Ponto {i} (Ponto N° {ponto.get('ponto_n', '?')}) ignorado por dados incompletos (massa, tempo ou pressão <= 0).")
             continue
-            
-        # 1. Vazão Volumétrica (Q) em [mm³/s]
-        volume_mm3 = (massa_g / rho_g_cm3) * 1000
-        Q_mm3_s = volume_mm3 / duracao_s
-        
-        # 2. Tensão de Cisalhamento na Parede (Tw) em [Pa]
-        pressao_Pa = pressao_bar * 100000
-        Tw_Pa = (pressao_Pa * R_cap_mm) / (2 * L_cap_mm)
         
         ponto_novo = {
             "ponto_original": ponto, 
-            "Q_mm3_s": Q_mm3_s,
-            "Tw_Pa": Tw_Pa,
-            "Pressao_Sistema_bar": pressao_bar, # Chave explícita para plotagem
+            "Q_mm3_s": float(Q_mm3_s[i]),
+            "Tw_Pa": float(Tw_Pa[i]),
+            "Pressao_Sistema_bar": float(pressao_bar[i]), # Chave explícita para plotagem
             "id_display": i 
         }
         pontos_processados.append(ponto_novo)
@@ -197,8 +186,8 @@ def salvar_json_limpo(data_original, pontos_filtrados, nome_arquivo_original):
         # [MODIFICADO] Reordena pela chave de pressão do sistema
         data_limpa['testes'] = sorted(data_limpa['testes'], key=lambda t: t.get(CHAVE_PRESSAO_FILTRAGEM, 0))
         
-        with open(caminho_completo_saida, 'w', encoding='utf-8') as f:
-            json.dump(data_limpa, f, indent=4, ensure_ascii=False)
+        with utils_reologia.bloquear_pasta(RESULTS_JSON_DIR):
+            utils_reologia.salvar_json_atomico(caminho_completo_saida, data_limpa, indent=4, ensure_ascii=False)
         print(f"\nArquivo filtrado salvo com sucesso em: {caminho_completo_saida}")
         print(f"Total de pontos salvos: {len(pontos_filtrados)}")
     except IOError as e:
@@ -220,8 +209,7 @@ def main():
     nome_arquivo = os.path.basename(caminho_arquivo)
     
     try:
-        with open(caminho_arquivo, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = utils_reologia.carregar_ensaio_json(caminho_arquivo) # Legados migrados em memória
     except Exception as e:
         print(f"Erro ao carregar JSON: {e}")
         return
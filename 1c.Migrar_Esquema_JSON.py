@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+SCRIPT PARA MIGRAR ARQUIVOS JSON DE ENSAIO PARA O ESQUEMA ATUAL
+Percorre a pasta de resultados do reômetro, converte os ensaios em formatos antigos
+(duração global, pressão em 'pressao_bar'/'media_pressao_sistema_bar', listas planas,
+aliases 'rho_g_cm3'/'D_mm'/'L_mm') para o esquema versionado e carimba 'schema_version'.
+
+O arquivo original é preservado ao lado com a extensão '.v1' (fora do filtro '*.json').
+Depois da migração, os leitores usam o caminho direto, sem lógica de compatibilidade.
+"""
+
+import os
+import glob
+import json
+import shutil
+import utils_reologia
+
+RESULTS_JSON_DIR = utils_reologia.CONSTANTS['RESULTS_JSON_DIR']
+SUFIXO_ORIGINAL = ".v1"
+
+def eh_arquivo_de_ensaio(dados):
+    """Ensaios têm 'testes' ou as listas planas antigas (exclui JSONs de parâmetros/calibração)."""
+    return isinstance(dados, dict) and ('testes' in dados or 'pressoes_bar_list' in dados)
+
+def listar_pendentes(pasta_base):
+    """Retorna [(caminho, dados)] dos ensaios que ainda não estão no esquema atual."""
+    pendentes = []
+    for caminho in sorted(glob.glob(os.path.join(pasta_base, "**", "*.json"), recursive=True)):
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+        except Exception as e:
+            print(f"  AVISO: '{caminho}' ignorado (JSON ilegível: {e}).")
+            continue
+        if eh_arquivo_de_ensaio(dados) and not utils_reologia.ensaio_na_versao_atual(dados):
+            pendentes.append((caminho, dados))
+    return pendentes
+
+def migrar_arquivo(caminho, dados):
+    """Preserva o original ('.v1') e regrava o ensaio migrado de forma atômica."""
+    caminho_original = caminho + SUFIXO_ORIGINAL
+    with utils_reologia.bloquear_pasta(os.path.dirname(caminho) or "."):
+        if not os.path.exists(caminho_original):
+            shutil.copy2(caminho, caminho_original)
+        utils_reologia.salvar_json_atomico(caminho, utils_reologia.migrar_esquema_ensaio(dados), indent=4, ensure_ascii=False)
+
+def main():
+    print("="*70)
+    print(f"--- MIGRAÇÃO DE ENSAIOS JSON PARA O ESQUEMA v{utils_reologia.VERSAO_ESQUEMA_ENSAIO} ---")
+    print("="*70)
+    if not os.path.isdir(RESULTS_JSON_DIR):
+        print(f"Pasta '{RESULTS_JSON_DIR}' não encontrada. Nada a migrar.")
+        return
+
+    pendentes = listar_pendentes(RESULTS_JSON_DIR)
+    if not pendentes:
+        print("Todos os ensaios já estão no esquema atual.")
+        return
+
+    print(f"\n{len(pendentes)} arquivo(s) a migrar:")
+    for caminho, _ in pendentes:
+        print(f"  - {os.path.relpath(caminho, RESULTS_JSON_DIR)}")
+    if input("\nMigrar agora? Os originais serão mantidos com extensão '.v1'. (s/n): ").strip().lower() != 's':
+        print("Migração cancelada.")
+        return
+
+    n_ok = 0
+    for caminho, dados in pendentes:
+        try:
+            migrar_arquivo(caminho, dados)
+            n_ok += 1
+        except Exception as e:
+            print(f"  ERRO ao migrar '{caminho}': {e}")
+    print(f"\nMigração concluída: {n_ok}/{len(pendentes)} arquivo(s) atualizados.")
+
+if __name__ == "__main__":
+    main()
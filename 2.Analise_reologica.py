@@ -9,7 +9,6 @@
 
 import os
 import numpy as np
-import json
 import pandas as pd
 from datetime import datetime
 from scipy.stats import linregress
@@ -22,23 +21,29 @@ import reologia_plot
 import reologia_report
 import reologia_fitting
 import reologia_report_pdf
+import reologia_cache
 from modelos_reologicos import MODELS, PARAM_NAMES_MAP
 
 # Configuração de plotagem
 utils_reologia.setup_graficos()
+# Ajustes gravados em disco são reaproveitados por 2c, 3 e 5 (mesmos dados -> sem reajuste)
+reologia_fitting.ativar_cache_persistente()
 
 # Tenta importar bibliotecas de ajuste
 try:
     from scipy.optimize import curve_fit
-    from sklearn.metrics import r2_score
     MODEL_FITTING_ENABLED = True
 except ImportError:
     MODEL_FITTING_ENABLED = False
-    print("AVISO: Bibliotecas 'scipy' e 'scikit-learn' não encontradas. Ajuste de modelos desativado.")
+    print("AVISO: Biblioteca 'scipy' não encontrada. Ajuste de modelos desativado.")
 
 # --- CONSTANTES ---
 calibrations_folder = utils_reologia.CONSTANTS['CALIBRATIONS_FOLDER']
 FATOR_CALIBRACAO_EMPIRICO_PADRAO = 1.0 
+# Resíduos do ajuste de modelos: 'absoluta', 'relativa' ou 'log' (as duas últimas equilibram curvas de várias décadas)
+PONDERACAO_AJUSTE = 'absoluta'
+# Intervalos de confiança dos parâmetros (repassado a reologia_fitting.bootstrap_parametros)
+OPCOES_BOOTSTRAP = {'n_reamostras': 2000, 'tipo': 'residuos', 'nivel': 0.95, 'semente': 0}
 
 # -----------------------------------------------------------------------------
 # --- FUNÇÕES AUXILIARES LOCAIS (Específicas do fluxo principal) ---
@@ -101,6 +106,7 @@ while not dados_confirmados:
     bagley_capilares_L_mm_info, mooney_capilares_D_mm_info = [], []
     pressoes_bar_display_tab, massas_g_display_tab, tempos_s_display_tab = [], [], []
     _json_files_resumo = []
+    _json_paths_entrada = [] # Caminhos completos (chave do cache de resultados)
     num_testes_para_analise = 0
     _csv_path_resumo = "N/A"
     t_ext_s_array_by_capilar = {} 
@@ -139,12 +145,13 @@ while not dados_confirmados:
         if not os.path.exists(json_base_path):
             print(f"ERRO: Pasta '{json_base_path}' não encontrada."); continue
 
-        json_filepath_unico = utils_reologia.selecionar_arquivo(json_base_path, "*.json", "Escolha o arquivo JSON para o capilar único", ".json")
+        json_filepath_unico = utils_reologia.selecionar_arquivo(json_base_path, "*.json", "Escolha o arquivo JSON para o capilar único", ".json", formatar_info=reologia_io.resumo_cabecalho_ensaio)
         if json_filepath_unico is None: continue
 
         json_data = reologia_io.ler_dados_json(json_filepath_unico)
         if json_data is None: continue
         _json_files_resumo.append(os.path.basename(json_filepath_unico))
+        _json_paths_entrada.append(json_filepath_unico)
 
         rho_pasta_g_cm3_fixo = json_data['rho_g_cm3_json']
         D_cap_mm_unico_val = json_data['D_mm']
@@ -162,13 +169,9 @@ while not dados_confirmados:
 
         rho_pasta_si = rho_pasta_g_cm3_fixo * 1000
         
-        raw_pressures = json_data['pressoes_bar_list']
-        if usar_pressao_pasta:
-            pressoes_bar_display_tab = [p['pasta'] for p in raw_pressures]
-        else:
-            pressoes_bar_display_tab = [p['linha'] for p in raw_pressures]
-            
-        massas_g_display_tab = json_data['massas_g_list']
+        ensaio_unico = json_data['ensaio']
+        pressoes_bar_display_tab = ensaio_unico.pressoes_bar(usar_pressao_pasta).tolist()
+        massas_g_display_tab = ensaio_unico.massa_g.tolist()
         
         cap_id_unico = f"{D_cap_mm_unico_val:.3f}_{L_cap_mm_unico_val:.2f}"
         t_ext_s_array_by_capilar[cap_id_unico] = np.array(tempos_s_display_tab)
@@ -195,7 +198,7 @@ while not dados_confirmados:
                 except ValueError: print("ERRO: Número inválido.")
 
             for i in range(num_L_bagley):
-                json_filepath = utils_reologia.selecionar_arquivo(json_base_path, "*.json", f"Escolha o JSON para capilar Bagley {i+1}", ".json")
+                json_filepath = utils_reologia.selecionar_arquivo(json_base_path, "*.json", f"Escolha o JSON para capilar Bagley {i+1}", ".json", formatar_info=reologia_io.resumo_cabecalho_ensaio)
                 if not json_filepath: erro_na_leitura = True; break
                 
                 json_data = reologia_io.ler_dados_json(json_filepath)
@@ -206,6 +209,7 @@ while not dados_confirmados:
                     print(f"ERRO: Sem dados de duração válidos."); erro_na_leitura = True; break
                 
                 _json_files_resumo.append(os.path.basename(json_filepath))
+                _json_paths_entrada.append(json_filepath)
 
                 if not params_globais_definidos:
                     rho_pasta_g_cm3_fixo = json_data['rho_g_cm3_json']
@@ -220,18 +224,15 @@ while not dados_confirmados:
                         print(f"ERRO: D difere do comum."); erro_na_leitura = True; break
 
                 L_i_mm = json_data['L_mm']
-                raw_pressures = json_data['pressoes_bar_list']
-                m_g_cap_i = json_data['massas_g_list']
-                
-                if usar_pressao_pasta: p_bar_cap_i = [p['pasta'] for p in raw_pressures]
-                else: p_bar_cap_i = [p['linha'] for p in raw_pressures]
+                p_bar_cap_i = json_data['ensaio'].pressoes_bar(usar_pressao_pasta)
+                m_g_cap_i = json_data['ensaio'].massa_g
 
                 bagley_capilares_L_mm_info.append(L_i_mm)
                 cap_id_bagley = f"{D_cap_mm_bagley_comum_val:.3f}_{L_i_mm:.2f}"
                 t_ext_s_array_by_capilar[cap_id_bagley] = np.array(duracoes_array)
 
                 capilares_bagley_data_input.append({'L_mm': L_i_mm, 'L_m': L_i_mm/1000.0, 'D_mm': D_cap_mm_bagley_comum_val,
-                                                  'pressoes_Pa': np.array(p_bar_cap_i)*1e5, 'massas_kg': np.array(m_g_cap_i)/1000.0})
+                                                  'pressoes_Pa': p_bar_cap_i*1e5, 'massas_kg': m_g_cap_i/1000.0})
         
         if erro_na_leitura: continue
 
@@ -243,7 +244,7 @@ while not dados_confirmados:
                 except ValueError: print("ERRO: Número inválido.")
 
             for i in range(num_D_mooney):
-                json_filepath = utils_reologia.selecionar_arquivo(json_base_path, "*.json", f"Escolha o JSON para capilar Mooney {i+1}", ".json")
+                json_filepath = utils_reologia.selecionar_arquivo(json_base_path, "*.json", f"Escolha o JSON para capilar Mooney {i+1}", ".json", formatar_info=reologia_io.resumo_cabecalho_ensaio)
                 if not json_filepath: erro_na_leitura = True; break
                 
                 json_data = reologia_io.ler_dados_json(json_filepath)
@@ -254,6 +255,7 @@ while not dados_confirmados:
                     print(f"ERRO: Sem dados de duração."); erro_na_leitura = True; break
                     
                 _json_files_resumo.append(os.path.basename(json_filepath))
+                _json_paths_entrada.append(json_filepath)
 
                 if not params_globais_definidos:
                     rho_pasta_g_cm3_fixo = json_data['rho_g_cm3_json']
@@ -272,18 +274,15 @@ while not dados_confirmados:
                     print(f"ERRO: L difere do comum."); erro_na_leitura = True; break
 
                 D_i_mm = json_data['D_mm']
-                raw_pressures = json_data['pressoes_bar_list']
-                m_g_cap_i = json_data['massas_g_list']
-                
-                if usar_pressao_pasta: p_bar_cap_i = [p['pasta'] for p in raw_pressures]
-                else: p_bar_cap_i = [p['linha'] for p in raw_pressures]
+                p_bar_cap_i = json_data['ensaio'].pressoes_bar(usar_pressao_pasta)
+                m_g_cap_i = json_data['ensaio'].massa_g
 
                 mooney_capilares_D_mm_info.append(D_i_mm)
                 cap_id_mooney = f"{D_i_mm:.3f}_{L_cap_mm_mooney_comum_val:.2f}"
                 t_ext_s_array_by_capilar[cap_id_mooney] = np.array(duracoes_array)
 
                 capilares_mooney_data_input.append({'D_mm': D_i_mm, 'L_mm': L_cap_mm_mooney_comum_val, 'L_m': L_cap_mm_mooney_comum_val/1000.0,
-                                                   'pressoes_Pa': np.array(p_bar_cap_i)*1e5, 'massas_kg': np.array(m_g_cap_i)/1000.0})
+                                                   'pressoes_Pa': p_bar_cap_i*1e5, 'massas_kg': m_g_cap_i/1000.0})
         
         if erro_na_leitura: continue
 
@@ -353,146 +352,210 @@ while not dados_confirmados:
 # --- PROCESSAMENTO ---
 print("\n" + "="*70 + "\n--- INICIANDO CÁLCULOS REOLÓGICOS ---\n" + "="*70)
 
-tau_w_corrigido_bagley = np.array([])
-gamma_dot_true_mooney = np.array([])
-
-# 1. Correção de Bagley
-if realizar_bagley:
-    tau_w_corrigido_bagley, gamma_targets_bagley = reologia_corrections.perform_bagley_correction(
-        capilares_bagley_data_input, D_cap_mm_bagley_comum_val, rho_pasta_si, t_ext_s_array_by_capilar, output_folder, timestamp_str
-    )
-    if len(tau_w_corrigido_bagley) > 0:
-        if reologia_io.input_sim_nao("\nDeseja salvar esta calibração de Bagley para uso futuro? (s/n): "):
-            reologia_io.salvar_calibracao_json("bagley", tau_w_corrigido_bagley, gamma_targets_bagley, _json_files_resumo, calibrations_folder)
-
-# 2. Correção de Mooney
-if realizar_mooney:
-    # Se Bagley foi feito, usa os alvos de tensão dele
-    tau_targets_ref = tau_w_corrigido_bagley if len(tau_w_corrigido_bagley) > 0 else None
-    tau_w_mooney, gamma_dot_true_mooney = reologia_corrections.perform_mooney_correction(
-        capilares_mooney_data_input, L_cap_mm_mooney_comum_val, rho_pasta_si, t_ext_s_array_by_capilar, output_folder, timestamp_str, tau_targets_ref
-    )
-    if len(gamma_dot_true_mooney) > 0:
-        if reologia_io.input_sim_nao("\nDeseja salvar esta calibração de Mooney para uso futuro? (s/n): "):
-            reologia_io.salvar_calibracao_json("mooney", tau_w_mooney, gamma_dot_true_mooney, _json_files_resumo, calibrations_folder)
-
-# 3. Consolidação dos Dados para Análise Final
-# 3. Consolidação dos Dados para Análise Final
-gamma_dot_aw_an = np.array([])
-tau_w_an = np.array([])
-tempos_s_an = np.array([]) # Inicializa array de tempos
-pressao_bar_an = np.array([]) # Inicializa array de pressões alinhado
-massa_g_an = np.array([]) # Inicializa array de massas
+tau_w_corrigido_bagley, gamma_targets_bagley = np.array([]), np.array([])
+tau_w_mooney, gamma_dot_true_mooney = np.array([]), np.array([])
 calibracao_aplicada = False
 caminho_calibracao_usada = None
 
-# Cenário 1: Bagley + Mooney (Ideal)
-if realizar_bagley and realizar_mooney:
-    if len(tau_w_corrigido_bagley) > 0 and len(gamma_dot_true_mooney) > 0:
-        print("\n--- Usando Resultados Completos (Bagley + Mooney) ---")
-        # Interpola para alinhar
-        tau_w_an = tau_w_mooney
-        gamma_dot_aw_an = gamma_dot_true_mooney 
-        # Nota: Bagley/Mooney podem alterar número de pontos ou ordem. 
-        # Tempo perde sentido direto se houver interpolação complexa, 
-        # mas se for ponto-a-ponto, poderíamos tentar recuperar.
-        # Por enquanto, deixamos vazio para evitar desalinhamento.
-    else:
-        print("ERRO: Falha nas correções conjuntas.")
-
-# Cenário 2: Apenas Bagley
-elif realizar_bagley and not realizar_mooney:
-    if len(tau_w_corrigido_bagley) > 0:
-        print("\n--- Usando Resultados de Bagley ---")
-        tau_w_an = tau_w_corrigido_bagley
-        gamma_dot_aw_an = gamma_targets_bagley
-    else: print("ERRO: Falha em Bagley.")
-
-# Cenário 3: Apenas Mooney (Raro, precisa de Tau)
-elif realizar_mooney and not realizar_bagley:
-    if len(gamma_dot_true_mooney) > 0:
-        print("\n--- Usando Resultados de Mooney ---")
-        tau_w_an = tau_w_mooney
-        gamma_dot_aw_an = gamma_dot_true_mooney
-    else: print("ERRO: Falha em Mooney.")
-
-# Cenário 4: Capilar Único (Sem correções ou com Calibração Externa)
-else:
-    print("\n--- Processando Capilar Único ---")
-    
-    # Opção de Calibração Externa
+# Opção de Calibração Externa (Capilar Único). Perguntada antes dos cálculos pois faz parte da chave do cache.
+if not realizar_bagley and not realizar_mooney:
     if reologia_io.input_sim_nao("Deseja aplicar uma calibração existente (Bagley/Mooney) a este ensaio? (s/n): "):
         caminho_calibracao_usada = reologia_io.listar_e_selecionar_calibracao(calibrations_folder)
         if caminho_calibracao_usada:
             calibracao_aplicada = True
+
+# Cache de resultados: mesmos arquivos (conteúdo) e mesmos parâmetros reaproveitam os produtos calculados
+chave_cache = None
+if metodo_entrada in ("2", "3"):
+    arquivos_chave = list(_json_paths_entrada) if metodo_entrada == "3" else [_csv_path_resumo]
+    if calibracao_aplicada: arquivos_chave.append(caminho_calibracao_usada)
+    chave_cache = reologia_cache.chave_conteudo(arquivos_chave, {
+        'metodo_entrada': metodo_entrada,
+        'usar_pressao_pasta': usar_pressao_pasta,
+        'realizar_bagley': realizar_bagley, 'num_capilares_bagley': len(capilares_bagley_data_input),
+        'realizar_mooney': realizar_mooney, 'num_capilares_mooney': len(capilares_mooney_data_input),
+        'calibracao_aplicada': calibracao_aplicada,
+        'fator_calibracao_empirico': fator_calibracao_empirico,
+        'rho_g_cm3': rho_pasta_g_cm3_fixo, 'tempo_extrusao_s': tempo_extrusao_fixo_s_val,
+        'ponderacao_ajuste': PONDERACAO_AJUSTE, 'bootstrap': OPCOES_BOOTSTRAP
+    })
+produtos_cache = reologia_cache.carregar_produtos(chave_cache) if chave_cache else None
+
+if produtos_cache is not None:
+    arrays_cache, meta_cache = produtos_cache
+    print(f"\n>> Entrada idêntica a uma análise anterior: reutilizando resultados do cache ({chave_cache[:12]}).")
+    tau_w_corrigido_bagley, gamma_targets_bagley = arrays_cache['tau_w_corrigido_bagley'], arrays_cache['gamma_targets_bagley']
+    tau_w_mooney, gamma_dot_true_mooney = arrays_cache['tau_w_mooney'], arrays_cache['gamma_dot_true_mooney']
+    gamma_dot_aw_an, tau_w_an = arrays_cache['gamma_dot_aw_an'], arrays_cache['tau_w_an']
+    gamma_dot_w_an_wr, eta_true_an, eta_a_an = arrays_cache['gamma_dot_w_an_wr'], arrays_cache['eta_true_an'], arrays_cache['eta_a_an']
+    tempos_s_an, pressao_bar_an, massa_g_an = arrays_cache['tempos_s_an'], arrays_cache['pressao_bar_an'], arrays_cache['massa_g_an']
+    n_prime, log_K_prime = meta_cache['n_prime'], meta_cache['log_K_prime']
+    model_results, best_model_nome = meta_cache['model_results'], meta_cache['best_model_nome']
+    df_sum_modelo = pd.DataFrame(meta_cache['df_sum_modelo'])
+    df_ic_bootstrap = pd.DataFrame(meta_cache['df_ic_bootstrap'])
+    # O gráfico de Bagley não fica no cache: a correção (barata) é refeita só para redesenhá-lo na nova pasta
+    if realizar_bagley:
+        reologia_corrections.perform_bagley_correction(
+            capilares_bagley_data_input, D_cap_mm_bagley_comum_val, rho_pasta_si, t_ext_s_array_by_capilar, output_folder, timestamp_str
+        )
+else:
+    # 1. Correção de Bagley
+    if realizar_bagley:
+        tau_w_corrigido_bagley, gamma_targets_bagley = reologia_corrections.perform_bagley_correction(
+            capilares_bagley_data_input, D_cap_mm_bagley_comum_val, rho_pasta_si, t_ext_s_array_by_capilar, output_folder, timestamp_str
+        )
+
+    # 2. Correção de Mooney
+    if realizar_mooney:
+        # Se Bagley foi feito, usa os alvos de tensão dele
+        tau_targets_ref = tau_w_corrigido_bagley if len(tau_w_corrigido_bagley) > 0 else None
+        tau_w_mooney, gamma_dot_true_mooney = reologia_corrections.perform_mooney_correction(
+            capilares_mooney_data_input, L_cap_mm_mooney_comum_val, rho_pasta_si, t_ext_s_array_by_capilar, output_folder, timestamp_str, tau_targets_ref
+        )
+
+    # 3. Consolidação dos Dados para Análise Final
+    gamma_dot_aw_an = np.array([])
+    tau_w_an = np.array([])
+    tempos_s_an = np.array([]) # Inicializa array de tempos
+    pressao_bar_an = np.array([]) # Inicializa array de pressões alinhado
+    massa_g_an = np.array([]) # Inicializa array de massas
+
+    # Cenário 1: Bagley + Mooney (Ideal)
+    if realizar_bagley and realizar_mooney:
+        if len(tau_w_corrigido_bagley) > 0 and len(gamma_dot_true_mooney) > 0:
+            print("\n--- Usando Resultados Completos (Bagley + Mooney) ---")
+            # Interpola para alinhar
+            tau_w_an = tau_w_mooney
+            gamma_dot_aw_an = gamma_dot_true_mooney 
+            # Nota: Bagley/Mooney podem alterar número de pontos ou ordem. 
+            # Tempo perde sentido direto se houver interpolação complexa, 
+            # mas se for ponto-a-ponto, poderíamos tentar recuperar.
+            # Por enquanto, deixamos vazio para evitar desalinhamento.
+        else:
+            print("ERRO: Falha nas correções conjuntas.")
+
+    # Cenário 2: Apenas Bagley
+    elif realizar_bagley and not realizar_mooney:
+        if len(tau_w_corrigido_bagley) > 0:
+            print("\n--- Usando Resultados de Bagley ---")
+            tau_w_an = tau_w_corrigido_bagley
+            gamma_dot_aw_an = gamma_targets_bagley
+        else: print("ERRO: Falha em Bagley.")
+
+    # Cenário 3: Apenas Mooney (Raro, precisa de Tau)
+    elif realizar_mooney and not realizar_bagley:
+        if len(gamma_dot_true_mooney) > 0:
+            print("\n--- Usando Resultados de Mooney ---")
+            tau_w_an = tau_w_mooney
+            gamma_dot_aw_an = gamma_dot_true_mooney
+        else: print("ERRO: Falha em Mooney.")
+
+    # Cenário 4: Capilar Único (Sem correções ou com Calibração Externa)
+    else:
+        print("\n--- Processando Capilar Único ---")
     
-    # Cálculos Básicos
-    R_cap_m = D_cap_mm_unico_val / 2000.0
-    L_cap_m = L_cap_mm_unico_val / 1000.0
+        # Cálculos Básicos
+        R_cap_m = D_cap_mm_unico_val / 2000.0
+        L_cap_m = L_cap_mm_unico_val / 1000.0
     
-    pressoes_Pa = np.array(pressoes_bar_display_tab) * 1e5
-    massas_kg = np.array(massas_g_display_tab) / 1000.0
-    tempos_s = np.array(tempos_s_display_tab)
+        pressoes_Pa = np.array(pressoes_bar_display_tab) * 1e5
+        massas_kg = np.array(massas_g_display_tab) / 1000.0
+        tempos_s = np.array(tempos_s_display_tab)
     
-    # Filtra zeros
-    valid_idx = (tempos_s > 0) & (massas_kg > 0) & (pressoes_Pa > 0)
-    pressoes_Pa = pressoes_Pa[valid_idx]
-    massas_kg = massas_kg[valid_idx]
-    tempos_s = tempos_s[valid_idx]
+        # Filtra zeros
+        valid_idx = (tempos_s > 0) & (massas_kg > 0) & (pressoes_Pa > 0)
+        pressoes_Pa = pressoes_Pa[valid_idx]
+        massas_kg = massas_kg[valid_idx]
+        tempos_s = tempos_s[valid_idx]
     
-    vazoes_m3_s = (massas_kg / rho_pasta_si) / tempos_s
+        vazoes_m3_s = (massas_kg / rho_pasta_si) / tempos_s
     
-    gamma_dot_aw_an = (4 * vazoes_m3_s) / (np.pi * R_cap_m**3)
-    tau_w_an = (pressoes_Pa * R_cap_m) / (2 * L_cap_m)
+        gamma_dot_aw_an = (4 * vazoes_m3_s) / (np.pi * R_cap_m**3)
+        tau_w_an = (pressoes_Pa * R_cap_m) / (2 * L_cap_m)
     
-    # Captura dados alinhados para o DataFrame final
-    tempos_s_an = tempos_s
-    pressao_bar_an = pressoes_Pa / 1e5
-    massa_g_an = massas_kg * 1000.0
+        # Captura dados alinhados para o DataFrame final
+        tempos_s_an = tempos_s
+        pressao_bar_an = pressoes_Pa / 1e5
+        massa_g_an = massas_kg * 1000.0
     
-    # Aplica Calibração se selecionada
-    if calibracao_aplicada:
-        gamma_dot_corrigido_cal = reologia_io.carregar_e_aplicar_calibracao(caminho_calibracao_usada, tau_w_an)
-        if gamma_dot_corrigido_cal is not None:
-            # Substitui o gamma aparente pelo corrigido da calibração (que já inclui correções)
-            # Mas espera, se a calibração dá gamma_true, então não precisamos de Weissenberg depois?
-            # Depende do que foi salvo na calibração. O script salva gamma_dot_corrigido (Weissenberg aplicado).
-            # Então se usarmos calibração, pulamos Weissenberg.
-            gamma_dot_aw_an = gamma_dot_corrigido_cal
-            # Flag para pular Weissenberg
-            pass
-
-# Aplica Fator Empírico
-tau_w_an = tau_w_an * fator_calibracao_empirico
-
-# 4. Correção de Weissenberg-Rabinowitsch (se não for Mooney ou Calibração Externa que já corrigem)
-# Nota: Mooney corrige deslizamento. Weissenberg ainda é necessário para fluido não-newtoniano.
-# Se calibração externa foi usada, assumimos que ela já traz o gamma final.
-gamma_dot_w_an_wr = gamma_dot_aw_an
-eta_true_an = np.zeros_like(tau_w_an)
-eta_a_an = tau_w_an / gamma_dot_aw_an
-n_prime, log_K_prime = 1.0, 0.0
-
-if len(tau_w_an) > 2 and not calibracao_aplicada: # Se calibração aplicada, já temos gamma real
-    gamma_dot_w_an_wr, eta_true_an, correction_factor, n_prime, log_K_prime = \
-        calcular_viscosidade_real_weissenberg(gamma_dot_aw_an, tau_w_an)
-    print(f"\nCorreção de Weissenberg-Rabinowitsch aplicada (n'={n_prime:.3f}).")
-else:
-    eta_true_an = tau_w_an / gamma_dot_w_an_wr # Se não corrigiu, é o aparente
-
-# --- AJUSTE DE MODELOS ---
-# --- Ajuste de Modelos Reológicos ---
-print("\n--- Ajuste de Modelos Reológicos ---")
-model_results, best_model_nome, df_sum_modelo = reologia_fitting.ajustar_modelos(gamma_dot_w_an_wr, tau_w_an)
+        # Aplica Calibração se selecionada
+        if calibracao_aplicada:
+            gamma_dot_corrigido_cal = reologia_io.carregar_e_aplicar_calibracao(caminho_calibracao_usada, tau_w_an)
+            if gamma_dot_corrigido_cal is not None:
+                # Substitui o gamma aparente pelo corrigido da calibração (que já inclui correções)
+                # Mas espera, se a calibração dá gamma_true, então não precisamos de Weissenberg depois?
+                # Depende do que foi salvo na calibração. O script salva gamma_dot_corrigido (Weissenberg aplicado).
+                # Então se usarmos calibração, pulamos Weissenberg.
+                gamma_dot_aw_an = gamma_dot_corrigido_cal
+                # Flag para pular Weissenberg
+                pass
+
+    # Aplica Fator Empírico
+    tau_w_an = tau_w_an * fator_calibracao_empirico
+
+    # 4. Correção de Weissenberg-Rabinowitsch (se não for Mooney ou Calibração Externa que já corrigem)
+    # Nota: Mooney corrige deslizamento. Weissenberg ainda é necessário para fluido não-newtoniano.
+    # Se calibração externa foi usada, assumimos que ela já traz o gamma final.
+    gamma_dot_w_an_wr = gamma_dot_aw_an
+    eta_true_an = np.zeros_like(tau_w_an)
+    eta_a_an = tau_w_an / gamma_dot_aw_an
+    n_prime, log_K_prime = 1.0, 0.0
+
+    if len(tau_w_an) > 2 and not calibracao_aplicada: # Se calibração aplicada, já temos gamma real
+        gamma_dot_w_an_wr, eta_true_an, correction_factor, n_prime, log_K_prime = \
+            calcular_viscosidade_real_weissenberg(gamma_dot_aw_an, tau_w_an)
+        print(f"\nCorreção de Weissenberg-Rabinowitsch aplicada (n'={n_prime:.3f}).")
+    else:
+        eta_true_an = tau_w_an / gamma_dot_w_an_wr # Se não corrigiu, é o aparente
+
+    # --- Ajuste de Modelos Reológicos ---
+    print("\n--- Ajuste de Modelos Reológicos ---")
+    model_results, best_model_nome, df_sum_modelo = reologia_fitting.ajustar_modelos(gamma_dot_w_an_wr, tau_w_an,
+                                                                                     ponderacao=PONDERACAO_AJUSTE)
+
+    # Intervalos de confiança (bootstrap) dos parâmetros de todos os modelos: a etapa mais cara, também guardada no cache
+    df_ic_bootstrap = pd.DataFrame()
+    if model_results:
+        df_ic_bootstrap = reologia_fitting.bootstrap_parametros(gamma_dot_w_an_wr, tau_w_an, model_results=model_results,
+                                                                **OPCOES_BOOTSTRAP)
+
+    if chave_cache:
+        reologia_cache.salvar_produtos(chave_cache, {
+            'tau_w_corrigido_bagley': tau_w_corrigido_bagley, 'gamma_targets_bagley': gamma_targets_bagley,
+            'tau_w_mooney': tau_w_mooney, 'gamma_dot_true_mooney': gamma_dot_true_mooney,
+            'gamma_dot_aw_an': gamma_dot_aw_an, 'tau_w_an': tau_w_an,
+            'gamma_dot_w_an_wr': gamma_dot_w_an_wr, 'eta_true_an': eta_true_an, 'eta_a_an': eta_a_an,
+            'tempos_s_an': tempos_s_an, 'pressao_bar_an': pressao_bar_an, 'massa_g_an': massa_g_an
+        }, {
+            'n_prime': n_prime, 'log_K_prime': log_K_prime,
+            'model_results': model_results, 'best_model_nome': best_model_nome,
+            'df_sum_modelo': df_sum_modelo.to_dict('records'), 'df_ic_bootstrap': df_ic_bootstrap.to_dict('records')
+        })
+
+# Salvamento opcional das curvas de correção como calibração reutilizável
+if realizar_bagley and len(tau_w_corrigido_bagley) > 0:
+    if reologia_io.input_sim_nao("\nDeseja salvar esta calibração de Bagley para uso futuro? (s/n): "):
+        reologia_io.salvar_calibracao_json("bagley", tau_w_corrigido_bagley, gamma_targets_bagley, _json_files_resumo, calibrations_folder)
+if realizar_mooney and len(gamma_dot_true_mooney) > 0:
+    if reologia_io.input_sim_nao("\nDeseja salvar esta calibração de Mooney para uso futuro? (s/n): "):
+        reologia_io.salvar_calibracao_json("mooney", tau_w_mooney, gamma_dot_true_mooney, _json_files_resumo, calibrations_folder)
 
 # Infere comportamento
 comportamento_fluido = reologia_fitting.inferir_comportamento_fluido(best_model_nome, model_results)
-print(f"\nMelhor Modelo: {best_model_nome}")
+print(f"\nMelhor Modelo: {best_model_nome} (critério: {reologia_fitting.CRITERIO_SELECAO_PADRAO})")
 print(f"Comportamento Inferido: {comportamento_fluido}")
 if not df_sum_modelo.empty:
     print("\nResumo dos Ajustes:")
     print(df_sum_modelo.to_string(index=False))
 
+# Intervalos de confiança (bootstrap) do melhor modelo
+if not df_ic_bootstrap.empty:
+    ic_melhor = df_ic_bootstrap[df_ic_bootstrap['Modelo'] == best_model_nome]
+    if not ic_melhor.empty:
+        print(f"\nIntervalos de Confiança {OPCOES_BOOTSTRAP['nivel']:.0%} (bootstrap BCa) - {best_model_nome}:")
+        for _, linha in ic_melhor.iterrows():
+            print(f"  {linha['Parametro']} = {linha['Valor']:.4g}  [{linha['IC BCa Inf']:.4g} ; {linha['IC BCa Sup']:.4g}]")
+
 # --- GERAÇÃO DE RESULTADOS (CSV/Gráficos/Relatório) ---
 
 # Garante que arrays auxiliares tenham o mesmo tamanho (preenche com NaN se necessário)
@@ -523,10 +586,15 @@ df_res = pd.DataFrame({
 
 # Salva CSV
 csv_name = os.path.join(output_folder, f"{timestamp_str}_resultados_reologicos.csv")
-df_res.to_csv(csv_name, sep=';', decimal=',', index=False)
+reologia_io.salvar_csv_resultados(df_res, csv_name, sep=';', decimal=',', index=False)
 arquivos_gerados_lista.append(os.path.basename(csv_name))
 print(f"\nResultados salvos em: {csv_name}")
 
+if not df_ic_bootstrap.empty:
+    csv_ic_name = os.path.join(output_folder, f"{timestamp_str}_ic_bootstrap.csv")
+    utils_reologia.salvar_csv_atomico(df_ic_bootstrap, csv_ic_name, sep=';', decimal=',', index=False)
+    arquivos_gerados_lista.append(os.path.basename(csv_ic_name))
+
 # Salva JSON de Parâmetros e Geometria (Fundamental para script 2b)
 json_params_name = os.path.join(output_folder, f"{timestamp_str}_parametros_modelos.json")
 dados_json_export = {
@@ -539,8 +607,7 @@ dados_json_export = {
     "K_prime_log": log_K_prime
 }
 try:
-    with open(json_params_name, 'w', encoding='utf-8') as f:
-        json.dump(dados_json_export, f, indent=4, default=lambda x: x.tolist() if isinstance(x, np.ndarray) else x)
+    utils_reologia.salvar_json_atomico(json_params_name, dados_json_export, indent=4, default=lambda x: x.tolist() if isinstance(x, np.ndarray) else x)
     print(f"Parâmetros salvos em: {json_params_name}")
     arquivos_gerados_lista.append(os.path.basename(json_params_name))
 except Exception as e:
@@ -4,7 +4,6 @@ import pandas as pd
 import numpy as np
 from scipy.stats import linregress
 import glob
-import json
 import warnings
 
 # Importa módulos do projeto
@@ -14,6 +13,10 @@ import reologia_fitting
 import reologia_plot
 import reologia_report_pdf
 
+# True ajusta os modelos às médias ponderando pela incerteza das réplicas (sigma = desvio padrão / sqrt(n));
+# o padrão (False) mantém os resíduos absolutos, com todos os pontos com o mesmo peso
+PONDERAR_POR_REPLICAS = False
+
 def processar_estatisticamente(caminho_csv, nome_base, output_folder):
     """Processa estatisticamente um arquivo CSV de resultados."""
     
@@ -279,19 +282,24 @@ def processar_estatisticamente(caminho_csv, nome_base, output_folder):
         
     if target_json:
         try:
-            with open(target_json, 'r', encoding='utf-8') as f:
-                info = json.load(f)
-                D_cap_mm = float(info.get('diametro_capilar_mm', 0))
-                L_cap_mm = float(info.get('comprimento_capilar_mm', 0))
-                densidade_g_cm3 = float(info.get('densidade_pasta_g_cm3', 0.0))
-                tempo_extrusao_s = info.get('tempo_extrusao_s', "N/A")
-                print(f"  Geometria carregada de {os.path.basename(target_json)}: D={D_cap_mm}mm, L={L_cap_mm}mm")
+            # Lê apenas o cabeçalho (o JSON pode ser um ensaio completo com muitos pontos)
+            info = reologia_io.ler_cabecalho_json(target_json) or {}
+            D_cap_mm = float(info.get('diametro_capilar_mm', 0))
+            L_cap_mm = float(info.get('comprimento_capilar_mm', 0))
+            densidade_g_cm3 = float(info.get('densidade_pasta_g_cm3', 0.0))
+            tempo_extrusao_s = info.get('tempo_extrusao_s', "N/A")
+            print(f"  Geometria carregada de {os.path.basename(target_json)}: D={D_cap_mm}mm, L={L_cap_mm}mm")
         except Exception as e:
             print(f"  Erro ao ler JSON de geometria: {e}")
 
     # --- Ajuste de Modelos ---
     print("  Ajustando modelos reológicos às médias...")
-    model_results, best_model_nome, _ = reologia_fitting.ajustar_modelos(gamma_dot_w_mean, tau_w_mean)
+    sigma_tau = None
+    if PONDERAR_POR_REPLICAS:
+        sigma_tau = reologia_fitting.sigma_de_replicas(tau_w_mean, tau_w_std, grouped['tau_w'].count().values)
+        print("  (Resíduos ponderados pela incerteza das réplicas)")
+    model_results, best_model_nome, df_sum_modelo = reologia_fitting.ajustar_modelos(gamma_dot_w_mean, tau_w_mean,
+                                                                                     sigma=sigma_tau)
     
     # --- Cálculo de n' (Lei de Potência) ---
     # ln(tau) vs ln(gamma_ap)
@@ -341,7 +349,7 @@ def processar_estatisticamente(caminho_csv, nome_base, output_folder):
         'pressao_mean_bar': pressao_mean
     })
     f_csv_stats = os.path.join(pasta_resultados_ensaio, f"{timestamp}_estatisticas_{nome_base}.csv")
-    df_stats.to_csv(f_csv_stats, index=False)
+    reologia_io.salvar_csv_resultados(df_stats, f_csv_stats, index=False)
     print(f"  Dados estatísticos salvos em: {os.path.basename(f_csv_stats)}")
     
     # --- NOVO: Salva Parâmetros dos Modelos em JSON ---
@@ -365,8 +373,7 @@ def processar_estatisticamente(caminho_csv, nome_base, output_folder):
         }
         
         try:
-            with open(json_params_name, 'w', encoding='utf-8') as f:
-                json.dump(dados_json_export, f, indent=4)
+            utils_reologia.salvar_json_atomico(json_params_name, dados_json_export, indent=4)
             print(f"  Parâmetros do modelo '{best_model_nome}' salvos em: {os.path.basename(json_params_name)}")
         except Exception as e:
             print(f"  ERRO ao salvar JSON de parâmetros: {e}")
@@ -388,34 +395,6 @@ def processar_estatisticamente(caminho_csv, nome_base, output_folder):
     # Infere comportamento para relatório
     comportamento_fluido = reologia_fitting.inferir_comportamento_fluido(best_model_nome, model_results)
     
-    # Cria DataFrame de resumo do modelo para PDF
-    # Cria DataFrame de resumo do modelo para PDF
-    summary_list = []
-    
-    # Mapeamento de nomes de parâmetros
-    param_names_map = {
-        "Newtoniano": ["eta"],
-        "Lei de Potencia": ["K", "n"],
-        "Bingham": ["tau0", "eta_p"],
-        "Herschel-Bulkley": ["tau0", "K", "n"],
-        "Casson": ["tau0", "eta_p"]
-    }
-
-    if model_results:
-        for nome, res in model_results.items():
-            params = res['params']
-            p_names = param_names_map.get(nome, [])
-            
-            # Formata parâmetros com nomes se disponíveis
-            formatted_params = []
-            for i, val in enumerate(params):
-                p_name = p_names[i] if i < len(p_names) else f"p{i+1}"
-                formatted_params.append(f"{p_name}={val:.4g}")
-            
-            params_str = ", ".join(formatted_params)
-            summary_list.append({'Modelo': nome, 'R2': res['R2'], 'Parametros': params_str})
-    df_sum_modelo = pd.DataFrame(summary_list).sort_values(by='R2', ascending=False) if summary_list else pd.DataFrame()
-
     reologia_report_pdf.gerar_pdf(
         timestamp, densidade_g_cm3, tempo_extrusao_s,
         "Média Estatística", [nome_base], caminho_csv,
@@ -486,4 +465,5 @@ def main():
         processar_estatisticamente(csv_path, nome_base, output_folder)
 
 if __name__ == "__main__":
+    reologia_fitting.ativar_cache_persistente()
     main()
@@ -78,7 +78,7 @@ def main():
     
     # 4. Calcula Resíduos
     # Predição do modelo
-    func_modelo = reologia_fitting.MODELS[best_model_nome][0]
+    func_modelo = reologia_fitting.REGISTRO_MODELOS[best_model_nome][0]
     params = model_results[best_model_nome]['params']
     
     df['τw_pred'] = func_modelo(df['γ̇w (s⁻¹)'].values, *params)
@@ -87,11 +87,21 @@ def main():
     df['Residuo (%)'] = ((df['τw (Pa)'] - df['τw_pred']) / df['τw_pred']) * 100
     
     # 5. Filtra Outliers (> 20% de erro, por exemplo)
+    # Remoção iterativa: o pior ponto sai primeiro e os modelos são reajustados de forma incremental,
+    # para que um outlier forte não arraste o ajuste e condene pontos bons
     LIMITE_ERRO = 20.0
-    df_filtrado = df[df['Residuo (%)'].abs() <= LIMITE_ERRO].copy()
+    mascara, model_results_f, best_model_f = reologia_fitting.filtrar_residuos_iterativo(
+        df['γ̇w (s⁻¹)'].values, df['τw (Pa)'].values, limite_rel=LIMITE_ERRO / 100.0
+    )
+    df_filtrado = df[mascara].copy()
+    if best_model_f:
+        df_filtrado['τw_pred'] = reologia_fitting.REGISTRO_MODELOS[best_model_f][0](df_filtrado['γ̇w (s⁻¹)'].values, *model_results_f[best_model_f]['params'])
+        df_filtrado['Residuo (%)'] = ((df_filtrado['τw (Pa)'] - df_filtrado['τw_pred']) / df_filtrado['τw_pred']) * 100
     n_removidos = len(df) - len(df_filtrado)
     
     print(f"  Pontos removidos (Erro > {LIMITE_ERRO}%): {n_removidos}")
+    if n_removidos > 0 and best_model_f:
+        print(f"  Melhor modelo após a filtragem: {best_model_f}")
     
     if n_removidos > 0:
         # Salva Novo CSV Filtrado
@@ -99,7 +109,7 @@ def main():
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         novo_nome = f"{nome_base}_FILTRADO_{timestamp}.csv"
         caminho_novo = os.path.join(pasta_saida, novo_nome)
-        df_filtrado.to_csv(caminho_novo, sep=';', decimal=',', index=False)
+        reologia_io.salvar_csv_resultados(df_filtrado, caminho_novo, sep=';', decimal=',', index=False)
         print(f"  Novo CSV salvo: {novo_nome}")
         
         # Plota Resíduos (Opcional - usando matplotlib direto ou adicionar func no reologia_plot)
@@ -108,6 +118,7 @@ def main():
         print("  Nenhum outlier significativo encontrado.")
 
 if __name__ == "__main__":
+    reologia_fitting.ativar_cache_persistente()
     try:
         main()
     except Exception as e:
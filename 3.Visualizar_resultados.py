@@ -156,9 +156,9 @@ def carregar_modelo_associado(caminho_csv):
                         except: pass
                         
                     if nome_modelo:
-                        from modelos_reologicos import MODELS
-                        if nome_modelo in MODELS:
-                            param_names = MODELS[nome_modelo][1]
+                        from modelos_reologicos import REGISTRO_MODELOS
+                        if nome_modelo in REGISTRO_MODELOS:
+                            param_names = REGISTRO_MODELOS[nome_modelo][1]
                             for p_name in param_names:
                                 search_term = "τ₀" if p_name == "tau0" else ("η" if p_name == "eta" else p_name)
                                 row_p = df_mod[df_mod.iloc[:, 0].astype(str).str.contains(search_term, regex=False, na=False)]
@@ -454,4 +454,5 @@ def visualizador_principal():
 
 
 if __name__ == "__main__":
+    reologia_fitting.ativar_cache_persistente()
     visualizador_principal()
@@ -10,6 +10,7 @@ import glob
 import utils_reologia
 import reologia_io
 import reologia_fitting
+import reologia_metricas
 import reologia_plot
 import reologia_report
 import reologia_report_pdf
@@ -202,9 +203,9 @@ def carregar_modelo_associado(caminho_csv):
                     # Se achou modelo, tenta extrair parâmetros
                     if nome_modelo:
                         # Importa definições de modelos para saber quais parâmetros buscar
-                        from modelos_reologicos import MODELS
-                        if nome_modelo in MODELS:
-                            param_names = MODELS[nome_modelo][1]
+                        from modelos_reologicos import REGISTRO_MODELOS
+                        if nome_modelo in REGISTRO_MODELOS:
+                            param_names = REGISTRO_MODELOS[nome_modelo][1]
                             
                             for p_name in param_names:
                                 # Mapeia nomes comuns
@@ -238,11 +239,8 @@ def carregar_modelo_associado(caminho_csv):
 
 
 def calcular_mape(y_true, y_pred):
-    """Calcula o Mean Absolute Percentage Error."""
-    y_true, y_pred = np.array(y_true), np.array(y_pred)
-    # Evita divisão por zero
-    mask = (y_true != 0)
-    return np.mean(np.abs((y_true[mask] - y_pred[mask]) / y_true[mask])) * 100
+    """Calcula o Mean Absolute Percentage Error (pontos com y_true = 0 são ignorados)."""
+    return reologia_metricas.mape(y_true, y_pred)
 
 def analise_mape(dados_analises, pasta_saida, timestamp):
     """
@@ -8,13 +8,13 @@
 
 import os
 import glob
-import json
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import utils_reologia
+import reologia_io
 import reologia_fitting
-from modelos_reologicos import MODELS
+from modelos_reologicos import REGISTRO_MODELOS, nome_exibicao
 
 # --- Configurações ---
 # Pasta onde os arquivos .txt de origem estão localizados.
@@ -26,18 +26,9 @@ def processar_dados_iniciais(caminho_arquivo):
     """Lê e faz a limpeza inicial dos dados do arquivo de texto."""
     print(f"\nProcessando arquivo: {os.path.basename(caminho_arquivo)}...")
     try:
-        col_names = ['Point No.', 'Shear Rate', 'Shear Stress', 'Viscosity', 'N1', 'N1_coeff', 'N1_Lodge', 'Torque', 'Status']
-        df = pd.read_csv(caminho_arquivo, sep='\t', decimal=',', on_bad_lines='warn', 
-                         encoding='latin-1', skiprows=3, header=None, names=col_names)
-        
-        colunas_necessarias = {'Shear Rate', 'Shear Stress'}
-        if not colunas_necessarias.issubset(df.columns):
-            print("ERRO: O arquivo não contém as colunas 'Shear Rate' e 'Shear Stress'.")
-            return None
-        
-        for col in colunas_necessarias:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-        df.dropna(subset=colunas_necessarias, inplace=True)
+        # Leitura vetorizada com cache binário (reologia_io.importar_rotacional)
+        df = reologia_io.importar_rotacional(caminho_arquivo)
+        df.dropna(inplace=True)
         df = df[(df['Shear Stress'] > 0) & (df['Shear Rate'] > 0)].copy()
         
         if df.empty:
@@ -130,7 +121,7 @@ def salvar_csv_final(df_processado, nome_base_saida, pasta_destino):
     caminho_csv = os.path.join(pasta_destino, f"{nome_base_saida}_processado.csv")
     
     try:
-        df_final_csv.to_csv(caminho_csv, sep=';', decimal=',', index=False, float_format='%.4f')
+        utils_reologia.salvar_csv_atomico(df_final_csv, caminho_csv, sep=';', decimal=',', index=False, float_format='%.4f')
         print(f"\n-> Arquivo de resultado salvo com sucesso em: {caminho_csv}")
     except Exception as e:
         print(f"-> ERRO ao salvar o arquivo CSV: {e}")
@@ -156,8 +147,7 @@ def salvar_json_parametros(nome_base_saida, pasta_destino, nome_modelo, params,
     }
     
     try:
-        with open(caminho_json, 'w', encoding='utf-8') as f:
-            json.dump(dados_json, f, indent=4)
+        utils_reologia.salvar_json_atomico(caminho_json, dados_json, indent=4)
         print(f"-> Parâmetros do modelo salvos em: {caminho_json}")
     except Exception as e:
         print(f"-> ERRO ao salvar JSON de parâmetros: {e}")
@@ -184,19 +174,13 @@ def filtrar_por_modelo(df_total, limite_erro=0.50):
         
     print(f"  Melhor modelo identificado: {best_model_nome} (R2={model_results[best_model_nome]['R2']:.4f})")
     
-    # Calcula previsão do modelo
-    func_modelo = MODELS[best_model_nome][0]
-    params = model_results[best_model_nome]['params']
-    tau_pred = func_modelo(gamma, *params)
-    
-    # Calcula erro relativo: |(Medido - Modelo) / Modelo|
-    # Evita divisão por zero
-    tau_pred_safe = np.where(tau_pred == 0, 1e-9, tau_pred)
-    erro_relativo = np.abs((tau - tau_pred) / tau_pred_safe)
-    
-    # Filtra
-    mask_valid = erro_relativo <= limite_erro
+    # Remoção iterativa (pior ponto primeiro, reajuste incremental a cada remoção)
+    mask_valid, model_results_f, best_model_f = reologia_fitting.filtrar_residuos_iterativo(
+        gamma, tau, limite_rel=limite_erro)
     df_filtrado = df_total[mask_valid].copy()
+    if best_model_f:
+        best_model_nome = best_model_f
+    params = model_results_f.get(best_model_nome, model_results[best_model_nome])['params']
     
     removidos = len(df_total) - len(df_filtrado)
     print(f"  Pontos removidos por desvio excessivo (> {limite_erro*100:.0f}%): {removidos} de {len(df_total)}")
@@ -381,13 +365,13 @@ def modo_multiplos_arquivos():
     
     # Plota Curva do Modelo (Se disponível)
     if best_model and best_params is not None:
-        func_modelo = MODELS[best_model][0]
+        func_modelo = REGISTRO_MODELOS[best_model][0]
         # Gera pontos suaves para a curva
         gamma_smooth = np.logspace(np.log10(df_final['Shear Rate'].min()), np.log10(df_final['Shear Rate'].max()), 100)
         tau_smooth = func_modelo(gamma_smooth, *best_params)
         eta_smooth = tau_smooth / gamma_smooth
         
-        ax.plot(gamma_smooth, eta_smooth, 'r--', linewidth=2, label=f'Modelo: {best_model}')
+        ax.plot(gamma_smooth, eta_smooth, 'r--', linewidth=2, label=f'Modelo: {nome_exibicao(best_model)}')
     
     ax.set_xscale('log'); ax.set_yscale('log')
     ax.set_xlabel('Taxa de Cisalhamento (s⁻¹)')
@@ -433,4 +417,5 @@ def main():
             print("Opção inválida.")
 
 if __name__ == "__main__":
+    reologia_fitting.ativar_cache_persistente()
     main()
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""
+BENCHMARK DO AJUSTE DE MODELOS REOLÓGICOS
+Gera curvas sintéticas (com ruído) para cada modelo e mede o custo do ajuste.
+
+Uso: python benchmark_ajuste.py
+"""
+import time
+import warnings
+import numpy as np
+from scipy.optimize import curve_fit
+from modelos_reologicos import MODELS
+import reologia_fitting
+
+# Parâmetros "verdadeiros" usados para gerar os dados sintéticos
+PARAMS_SINTETICOS = {
+    "Newtoniano": [2.5],
+    "Lei de Potencia": [35.0, 0.45],
+    "Bingham": [40.0, 1.2],
+    "Herschel-Bulkley": [25.0, 12.0, 0.55],
+    "Casson": [30.0, 0.8],
+}
+
+def gerar_dados(nome_modelo, n_pontos=15, ruido_rel=0.03, semente=0):
+    """Curva sintética com ruído multiplicativo em gamma_dot log-espaçado (1 a 500 1/s)."""
+    rng = np.random.default_rng(semente)
+    gd = np.logspace(0, np.log10(500), n_pontos)
+    tau = MODELS[nome_modelo][0](gd, *PARAMS_SINTETICOS[nome_modelo])
+    return gd, tau * (1 + ruido_rel * rng.standard_normal(n_pontos))
+
+def _ajustar_curve_fit(nome_modelo, gd, tau, usar_jac):
+    """Retorna (popt, avaliações do modelo). As avaliações incluem as feitas pelas diferenças finitas."""
+    func, _, chute, bounds, jac = MODELS[nome_modelo]
+    n_avaliacoes = [0]
+    def func_contada(x, *p):
+        n_avaliacoes[0] += 1
+        return func(x, *p)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        popt, _ = curve_fit(func_contada, gd, tau, p0=chute(gd, tau), bounds=bounds, maxfev=10000,
+                            jac=jac if usar_jac else None)
+    return popt, n_avaliacoes[0]
+
+def benchmark_jacobianos(n_repeticoes=30):
+    """Compara curve_fit com jacobiano por diferenças finitas vs analítico (avaliações do modelo e tempo)."""
+    print("\n--- Jacobiano: diferenças finitas vs analítico (curve_fit, TRF com bounds) ---")
+    print(f"{'Modelo':<18} | {'aval. DF':>8} | {'aval. anal.':>11} | {'t DF (ms)':>10} | {'t anal. (ms)':>12}")
+    print("-" * 70)
+    for nome_modelo in MODELS:
+        conjuntos = [gerar_dados(nome_modelo, semente=s) for s in range(n_repeticoes)]
+        resultados = {}
+        for usar_jac in (False, True):
+            nfev_total = 0
+            t0 = time.perf_counter()
+            for gd, tau in conjuntos:
+                try:
+                    nfev_total += _ajustar_curve_fit(nome_modelo, gd, tau, usar_jac)[1]
+                except RuntimeError:
+                    pass
+            resultados[usar_jac] = (nfev_total / n_repeticoes, (time.perf_counter() - t0) / n_repeticoes * 1e3)
+        (nf_df, t_df), (nf_an, t_an) = resultados[False], resultados[True]
+        print(f"{nome_modelo:<18} | {nf_df:>8.1f} | {nf_an:>11.1f} | {t_df:>10.2f} | {t_an:>12.2f}")
+
+def benchmark_solvers(n_repeticoes=30):
+    """Compara ajustar_modelos com curve_fit genérico vs solvers diretos (tempo e SSE do melhor ajuste de cada modelo)."""
+    print("\n--- ajustar_modelos: curve_fit genérico vs solvers diretos (todos os modelos por conjunto) ---")
+    print(f"{'Dados gerados por':<18} | {'t curve_fit (ms)':>16} | {'t direto (ms)':>13} | {'SSE direto / curve_fit':>22}")
+    print("-" * 80)
+    for nome_modelo in MODELS:
+        conjuntos = [gerar_dados(nome_modelo, semente=s) for s in range(n_repeticoes)]
+        tempos, sse = {}, {}
+        for metodo in ('curve_fit', 'direto'):
+            t0 = time.perf_counter()
+            resultados = [reologia_fitting.ajustar_modelos(gd, tau, metodo=metodo, usar_cache=False)[0] for gd, tau in conjuntos]
+            tempos[metodo] = (time.perf_counter() - t0) / n_repeticoes * 1e3
+            sse[metodo] = np.array([[np.sum((MODELS[m][0](gd, *r[m]['params']) - tau)**2) if m in r else np.nan
+                                     for m in MODELS] for (gd, tau), r in zip(conjuntos, resultados)])
+        razao = np.nanmean(sse['direto'] / sse['curve_fit'])
+        print(f"{nome_modelo:<18} | {tempos['curve_fit']:>16.2f} | {tempos['direto']:>13.2f} | {razao:>22.4f}")
+
+def benchmark_lote(n_por_modelo=200):
+    """Compara ajustar_modelos em laço Python vs ajustar_modelos_lote (um único LM vetorizado)."""
+    print("\n--- Muitos conjuntos pequenos: laço de ajustar_modelos vs ajustar_modelos_lote ---")
+    conjuntos = [gerar_dados(nome, n_pontos=10 + s % 8, semente=s) for nome in MODELS for s in range(n_por_modelo)]
+    t0 = time.perf_counter()
+    resultados = [reologia_fitting.ajustar_modelos(gd, tau, usar_cache=False)[0] for gd, tau in conjuntos]
+    t_laco = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    df_lote = reologia_fitting.ajustar_modelos_lote(conjuntos)
+    t_lote = time.perf_counter() - t0
+    sse_laco = np.array([np.sum((MODELS[m][0](gd, *r[m]['params']) - tau)**2)
+                         for m in MODELS for (gd, tau), r in zip(conjuntos, resultados)])
+    print(f"{len(conjuntos)} conjuntos x {len(MODELS)} modelos: laço {t_laco:.2f} s | lote {t_lote:.2f} s "
+          f"({t_laco / t_lote:.0f}x) | SSE lote / laço (máx.) = {np.max(df_lote['SSE'].to_numpy() / sse_laco):.6f}")
+
+def benchmark_processos(n_por_modelo=100):
+    """Compara ajustar_modelos_varios serial vs pool de processos (tarefas conjunto x modelo em blocos)."""
+    print("\n--- ajustar_modelos_varios: serial vs pool de processos ---")
+    conjuntos = [gerar_dados(nome, n_pontos=10 + s % 8, semente=s) for nome in MODELS for s in range(n_por_modelo)]
+    t0 = time.perf_counter()
+    serial = reologia_fitting.ajustar_modelos_varios(conjuntos, usar_cache=False)
+    t_serial = time.perf_counter() - t0
+    pool = reologia_fitting.obter_pool_processos()
+    reologia_fitting.ajustar_modelos_varios(conjuntos[:len(MODELS)], executor=pool, usar_cache=False)  # Aquece os processos
+    t0 = time.perf_counter()
+    paralelo = reologia_fitting.ajustar_modelos_varios(conjuntos, executor=pool, usar_cache=False)
+    t_pool = time.perf_counter() - t0
+    identicos = all(np.array_equal(a[0][m]['params'], b[0][m]['params']) for a, b in zip(serial, paralelo) for m in a[0])
+    print(f"{len(conjuntos)} conjuntos x {len(MODELS)} modelos ({pool._max_workers} processos): serial {t_serial:.2f} s | "
+          f"pool {t_pool:.2f} s ({t_serial / t_pool:.1f}x) | resultados idênticos: {identicos}")
+
+def benchmark_cache(n_repeticoes=200):
+    """Custo de um ajuste repetido: sem cache vs LRU em memória vs armazém persistente (processo novo)."""
+    import tempfile
+    print("\n--- Cache de ajustes: reajuste dos mesmos dados ---")
+    gd, tau = gerar_dados("Herschel-Bulkley")
+    t0 = time.perf_counter()
+    for _ in range(n_repeticoes):
+        reologia_fitting.ajustar_modelos(gd, tau, usar_cache=False)
+    t_sem = (time.perf_counter() - t0) / n_repeticoes * 1e3
+    with tempfile.TemporaryDirectory() as pasta:
+        reologia_fitting.ativar_cache_persistente(pasta)
+        reologia_fitting.ajustar_modelos(gd, tau)
+        t0 = time.perf_counter()
+        for _ in range(n_repeticoes):
+            reologia_fitting.ajustar_modelos(gd, tau)
+        t_mem = (time.perf_counter() - t0) / n_repeticoes * 1e3
+        t0 = time.perf_counter()
+        for _ in range(n_repeticoes):
+            reologia_fitting.limpar_cache_ajustes()  # Simula outro script: só o armazém em disco
+            reologia_fitting.ajustar_modelos(gd, tau)
+        t_disco = (time.perf_counter() - t0) / n_repeticoes * 1e3
+        reologia_fitting.limpar_cache_ajustes(desativar_persistente=True)
+    print(f"sem cache {t_sem:.2f} ms | LRU em memória {t_mem:.2f} ms | armazém em disco {t_disco:.2f} ms")
+
+def benchmark_bootstrap(n_reamostras=2000):
+    """Tempo do bootstrap (todos os modelos) por reajuste em lote."""
+    print(f"\n--- Bootstrap: {n_reamostras} reamostras x {len(MODELS)} modelos (LM vetorizado) ---")
+    gd, tau = gerar_dados("Herschel-Bulkley")
+    model_results = reologia_fitting.ajustar_modelos(gd, tau, usar_cache=False)[0]
+    for tipo in ('residuos', 'pares'):
+        t0 = time.perf_counter()
+        reologia_fitting.bootstrap_parametros(gd, tau, n_reamostras=n_reamostras, tipo=tipo, model_results=model_results)
+        print(f"{tipo:<9}: {time.perf_counter() - t0:.2f} s")
+
+def benchmark_incremental(n_pontos=40, n_remocoes=10, n_repeticoes=10):
+    """Reajuste após remover pontos um a um: ajuste a frio vs AjusteIncremental (downdate + partida a quente)."""
+    print(f"\n--- Remoção de {n_remocoes} pontos com reajuste a cada remoção ({n_pontos} pontos) ---")
+    gd, tau = gerar_dados("Herschel-Bulkley", n_pontos=n_pontos)
+    ordem = np.random.default_rng(0).permutation(n_pontos)[:n_remocoes]
+    t0 = time.perf_counter()
+    for _ in range(n_repeticoes):
+        mascara = np.ones(n_pontos, dtype=bool)
+        for i in ordem:
+            mascara[i] = False
+            frio = {nome: reologia_fitting._ajustar_um_modelo(nome, gd[mascara], tau[mascara]) for nome in MODELS}
+    t_frio = (time.perf_counter() - t0) / (n_repeticoes * n_remocoes) * 1e3
+    t0 = time.perf_counter()
+    for _ in range(n_repeticoes):
+        ajuste = reologia_fitting.AjusteIncremental(gd, tau)
+        for i in ordem:
+            ajuste.remover(i)
+    t_inc = (time.perf_counter() - t0) / (n_repeticoes * n_remocoes) * 1e3
+    desvio = max(np.max(np.abs(ajuste.params[m] - frio[m]) / np.abs(frio[m]).clip(1e-12)) for m in MODELS)
+    print(f"por remoção: a frio {t_frio:.2f} ms | incremental {t_inc:.2f} ms ({t_frio / t_inc:.1f}x, "
+          f"inclui o ajuste inicial) | desvio relativo máx. dos parâmetros {desvio:.1e}")
+
+def benchmark_kernels(n_repeticoes=2000, n_lote=2000):
+    """Kernels dos modelos: NumPy vs compilados (numba) por chamada, com a diferença máxima entre eles; e o LM em lote."""
+    import reologia_kernels
+    print("\n--- Kernels dos modelos: NumPy vs numba ---")
+    backends = ['numpy'] + (['numba'] if reologia_kernels.NUMBA_DISPONIVEL else [])
+    if len(backends) == 1:
+        print("numba não instalado: apenas o backend NumPy é medido.")
+    backend_original = reologia_kernels.backend_ativo()
+    print(f"{'Modelo':<18} | {'N':>6} | " + " | ".join(f"{b + ' (us)':>12}" for b in backends) + " | dif. rel. máx.")
+    print("-" * 75)
+    try:
+        for nome_modelo in MODELS:
+            params = PARAMS_SINTETICOS[nome_modelo]
+            for n_pontos in (15, 200, 100000):
+                gd = np.logspace(0, np.log10(500), n_pontos)
+                repeticoes = max(n_repeticoes * 200 // max(n_pontos, 200), 5)
+                tempos, saidas = [], []
+                for backend in backends:
+                    reologia_kernels.definir_backend(backend)
+                    reologia_kernels.avaliar_modelo(nome_modelo, gd, params)  # Compila (numba) fora da medição
+                    t0 = time.perf_counter()
+                    for _ in range(repeticoes):
+                        tau = reologia_kernels.avaliar_modelo(nome_modelo, gd, params)
+                        J = reologia_kernels.jacobiano_modelo(nome_modelo, gd, params)
+                    tempos.append((time.perf_counter() - t0) / repeticoes * 1e6)
+                    saidas.append(np.concatenate([tau, np.ravel(J)]))
+                dif = np.max(np.abs(saidas[-1] - saidas[0]) / np.maximum(np.abs(saidas[0]), 1e-300))
+                print(f"{nome_modelo:<18} | {n_pontos:>6} | " + " | ".join(f"{t:>12.1f}" for t in tempos) + f" | {dif:.1e}")
+
+        # O LM em lote usa sempre as expressões NumPy (residuos_lote / jacobiano_lote), qualquer que seja o backend
+        conjuntos = [gerar_dados(nome, semente=s) for nome in MODELS for s in range(n_lote // len(MODELS))]
+        reologia_fitting.ajustar_modelos_lote(conjuntos[:len(MODELS)])  # Aquecimento
+        t0 = time.perf_counter()
+        df = reologia_fitting.ajustar_modelos_lote(conjuntos)
+        print(f"LM em lote ({len(conjuntos)} conjuntos x {len(MODELS)} modelos, NumPy): "
+              f"{time.perf_counter() - t0:.2f} s | R² médio {df['R2'].mean():.6f}")
+    finally:
+        reologia_kernels.definir_backend(backend_original)
+
+def benchmark_ponderacao(n_conjuntos=50, ruido_rel=0.03):
+    """Ponderação absoluta/relativa/log em dados de Herschel-Bulkley cobrindo 4 décadas: tempo e erro dos parâmetros."""
+    print("\n--- Ponderação dos resíduos (HB, gd de 0,1 a 1000 s-1, ruído multiplicativo) ---")
+    params = np.array(PARAMS_SINTETICOS["Herschel-Bulkley"])
+    gd = np.logspace(-1, 3, 20)
+    rng = np.random.default_rng(0)
+    conjuntos = [MODELS["Herschel-Bulkley"][0](gd, *params) * (1 + ruido_rel * rng.standard_normal(len(gd)))
+                 for _ in range(n_conjuntos)]
+    print(f"{'Ponderação':<11} | {'ms/ajuste':>9} | " + " | ".join(f"{'erro ' + n:>12}" for n in ('tau0', 'K', 'n')))
+    print("-" * 60)
+    for ponderacao in reologia_fitting.PONDERACOES:
+        t0 = time.perf_counter()
+        P = np.array([reologia_fitting.ajustar_modelos(gd, tau, ponderacao=ponderacao, usar_cache=False)[0]
+                      ["Herschel-Bulkley"]['params'] for tau in conjuntos])
+        dt = (time.perf_counter() - t0) / n_conjuntos * 1e3
+        erros = np.median(np.abs(P / params - 1), axis=0) * 100
+        print(f"{ponderacao:<11} | {dt:>9.2f} | " + " | ".join(f"{e:>11.2f}%" for e in erros))
+
+def benchmark_partidas(n_conjuntos=300, semente=1):
+    """
+    curve_fit de Herschel-Bulkley/Casson com partida única (estimativa do registro, maxfev 10000) vs partidas
+    múltiplas em grade, em conjuntos difíceis (5-12 pontos, ruído de 5-30%): SSE relativo ao solver direto e nfev.
+    """
+    from modelos_reologicos import REGISTRO_MODELOS
+    print("\n--- Partidas múltiplas em grade (curve_fit; conjuntos curtos e ruidosos) ---")
+    rng = np.random.default_rng(semente)
+    print(f"{'Modelo':<18} | {'Partida':<7} | {'tempo (s)':>9} | {'SSE/direto > 1%':>15} | {'SSE/direto máx.':>15} | "
+          f"{'nfev médio':>10} | {'nfev máx.':>9}")
+    print("-" * 100)
+    for nome_modelo in ("Herschel-Bulkley", "Casson"):
+        conjuntos = []
+        for _ in range(n_conjuntos):
+            n_pontos = int(rng.integers(5, 12))
+            gd = np.sort(10**rng.uniform(-1, 3, n_pontos))
+            params = [rng.uniform(0, 1000), rng.uniform(0.01, 50)]
+            if nome_modelo == "Herschel-Bulkley":
+                params.append(rng.uniform(0.1, 2.5))
+            tau = MODELS[nome_modelo][0](gd, *params) * (1 + rng.uniform(0.05, 0.3) * rng.standard_normal(n_pontos))
+            conjuntos.append((gd, np.abs(tau) + 1e-3))
+        sse = lambda gd, tau, p: np.sum((MODELS[nome_modelo][0](gd, *p) - tau)**2)
+        sse_direto = [sse(gd, tau, reologia_fitting.SOLVERS_DIRETOS[nome_modelo](gd, tau)) for gd, tau in conjuntos]
+        for modo in ('única', 'grade'):
+            razoes, nfevs, falhas = [], [], 0
+            t0 = time.perf_counter()
+            for (gd, tau), ref in zip(conjuntos, sse_direto):
+                if modo == 'única':
+                    partidas, maxfev = [REGISTRO_MODELOS[nome_modelo].guess(gd, tau)], 10000
+                else:
+                    partidas, maxfev = reologia_fitting.partidas_multiplas(nome_modelo, gd, tau), reologia_fitting.MAXFEV_PARTIDA
+                try:
+                    popt, nfev = reologia_fitting._curve_fit_partidas(nome_modelo, gd, tau, partidas, maxfev=maxfev)
+                except (RuntimeError, ValueError):
+                    falhas += 1
+                    continue
+                razoes.append(sse(gd, tau, popt) / ref)
+                nfevs.append(nfev)
+            dt = time.perf_counter() - t0
+            razoes = np.array(razoes)
+            print(f"{nome_modelo:<18} | {modo:<7} | {dt:>9.2f} | {int(np.sum(razoes > 1.01)) + falhas:>15} | "
+                  f"{razoes.max():>15.3f} | {np.mean(nfevs):>10.1f} | {max(nfevs):>9}")
+
+def benchmark_desempenho(n_por_modelo=20):
+    """Resumo agregado (resumo_desempenho_ajustes) de um arquivo sintético ajustado com todos os modelos do registro."""
+    print("\n--- Desempenho por modelo (registro completo, dados sintéticos dos modelos clássicos) ---")
+    reologia_fitting.zerar_desempenho_ajustes()
+    for nome_modelo in MODELS:
+        for semente in range(n_por_modelo):
+            reologia_fitting.ajustar_modelos(*gerar_dados(nome_modelo, semente=semente), modelos='todos', usar_cache=False)
+    resumo = reologia_fitting.resumo_desempenho_ajustes()
+    colunas = ['Modelo', 'Ajustes', 'Falhas', 'Sem convergencia', 'Tempo medio (ms)', 'Tempo max. (ms)', 'nfev medio']
+    print(resumo[colunas].to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+def benchmark_importacao(n_repeticoes=5):
+    """Tempo de importação (processo novo) de reologia_fitting e, para referência, do sklearn.metrics que ele usava."""
+    import subprocess
+    import sys
+    print("\n--- Tempo de importação (processo novo, mediana) ---")
+    for modulo in ('reologia_fitting', 'sklearn.metrics'):
+        codigo = f"import time; t0 = time.perf_counter(); import {modulo}; print(time.perf_counter() - t0)"
+        tempos = []
+        for _ in range(n_repeticoes):
+            saida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True)
+            if saida.returncode != 0:
+                break
+            tempos.append(float(saida.stdout.split()[-1]))
+        print(f"{modulo:<18}: " + (f"{np.median(tempos):.2f} s" if tempos else "não instalado"))
+
+def main():
+    benchmark_jacobianos()
+    benchmark_solvers()
+    benchmark_lote()
+    benchmark_processos()
+    benchmark_cache()
+    benchmark_bootstrap()
+    benchmark_incremental()
+    benchmark_kernels()
+    benchmark_ponderacao()
+    benchmark_desempenho()
+    benchmark_partidas()
+    benchmark_importacao()
+
+if __name__ == "__main__":
+    main()
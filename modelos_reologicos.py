@@ -1,3 +1,4 @@
+from typing import Callable, NamedTuple
 import numpy as np
 
 # -----------------------------------------------------------------------------
@@ -37,7 +38,172 @@ def model_casson(gd, tau0_cas, eta_cas):
     sqrt_gd_val = np.sqrt(np.maximum(gd, 1e-9))
     return (sqrt_tau0 + sqrt_eta_cas_val * sqrt_gd_val)**2
 
-# Funções de estimativa inicial (chute) para os parâmetros
+# Jacobianos analíticos (d tau / d parâmetro), vetorizados: retornam shape (..., n_pontos, n_params).
+# Os parâmetros podem ser escalares ou arrays (ajuste em lote); todas as derivadas são broadcast para gd.
+def _empilhar_derivadas(*derivadas):
+    return np.stack(np.broadcast_arrays(*derivadas), axis=-1)
+
+def jac_newtonian(gd, eta):
+    return _empilhar_derivadas(np.asarray(gd, dtype=float))
+
+def jac_power_law(gd, K_pl, n_pl):
+    gd_c = np.maximum(gd, 1e-9)
+    gd_n = np.power(gd_c, n_pl)
+    return _empilhar_derivadas(gd_n, K_pl * gd_n * np.log(gd_c))
+
+def jac_bingham(gd, t0, ep):
+    gd = np.asarray(gd, dtype=float)
+    return _empilhar_derivadas(np.ones_like(gd), gd)
+
+def jac_hb(gd, t0, K_hb, n_hb):
+    gd_c = np.maximum(gd, 1e-9)
+    gd_n = np.power(gd_c, n_hb)
+    return _empilhar_derivadas(np.ones_like(gd_c), gd_n, K_hb * gd_n * np.log(gd_c))
+
+def jac_casson(gd, tau0_cas, eta_cas):
+    sqrt_tau0 = np.sqrt(np.maximum(tau0_cas, 0))
+    sqrt_eta_cas_val = np.sqrt(np.maximum(eta_cas, 1e-9))
+    sqrt_gd_val = np.sqrt(np.maximum(gd, 1e-9))
+    raiz_tau = sqrt_tau0 + sqrt_eta_cas_val * sqrt_gd_val
+    # d/dtau0 diverge em tau0 = 0 (limite inferior): avaliada com sqrt(tau0) >= 1e-6 para manter o passo finito
+    return _empilhar_derivadas(raiz_tau / np.maximum(sqrt_tau0, 1e-6),
+                               raiz_tau * sqrt_gd_val / sqrt_eta_cas_val)
+
+
+# -----------------------------------------------------------------------------
+# --- MODELOS ADICIONAIS (PASTAS E SUSPENSÕES) ---
+# -----------------------------------------------------------------------------
+# Mesma convenção dos modelos acima: kernels e jacobianos vetorizados, parâmetros escalares ou arrays
+# broadcast contra gd (ajuste em lote), sem laços por ponto.
+
+def model_sisko(gd, eta_inf, K_sk, n_sk):
+    """
+    Modelo de Sisko: tau = eta_inf * gamma_dot + K * (gamma_dot)^n
+    """
+    return eta_inf * gd + K_sk * np.power(np.maximum(gd, 1e-9), n_sk)
+
+def jac_sisko(gd, eta_inf, K_sk, n_sk):
+    gd_c = np.maximum(gd, 1e-9)
+    gd_n = np.power(gd_c, n_sk)
+    return _empilhar_derivadas(np.asarray(gd, dtype=float), gd_n, K_sk * gd_n * np.log(gd_c))
+
+def model_cross(gd, eta0, eta_inf, lam, m):
+    """
+    Modelo de Cross: tau = gamma_dot * (eta_inf + (eta0 - eta_inf) / (1 + (lambda * gamma_dot)^m))
+    """
+    gd_c = np.maximum(gd, 1e-9)
+    u = np.power(np.maximum(lam * gd_c, 1e-300), m)
+    return gd_c * (eta_inf + (eta0 - eta_inf) / (1 + u))
+
+def jac_cross(gd, eta0, eta_inf, lam, m):
+    gd_c = np.maximum(gd, 1e-9)
+    x = np.maximum(lam * gd_c, 1e-300)
+    u = np.power(x, m)
+    D = 1 + u
+    fator = -(eta0 - eta_inf) * gd_c * u / D**2
+    return _empilhar_derivadas(gd_c / D, gd_c * u / D, fator * m / np.maximum(lam, 1e-300), fator * np.log(x))
+
+def model_carreau_yasuda(gd, eta0, eta_inf, lam, a_cy, n_cy):
+    """
+    Modelo de Carreau-Yasuda: tau = gamma_dot * (eta_inf + (eta0 - eta_inf) * (1 + (lambda * gamma_dot)^a)^((n-1)/a))
+    """
+    gd_c = np.maximum(gd, 1e-9)
+    B = 1 + np.power(np.maximum(lam * gd_c, 1e-300), a_cy)
+    return gd_c * (eta_inf + (eta0 - eta_inf) * np.power(B, (n_cy - 1) / a_cy))
+
+def jac_carreau_yasuda(gd, eta0, eta_inf, lam, a_cy, n_cy):
+    gd_c = np.maximum(gd, 1e-9)
+    x = np.maximum(lam * gd_c, 1e-300)
+    u = np.power(x, a_cy)
+    B = 1 + u
+    log_B = np.log(B)
+    F = np.power(B, (n_cy - 1) / a_cy)
+    delta = (eta0 - eta_inf) * gd_c * F
+    return _empilhar_derivadas(gd_c * F, gd_c * (1 - F),
+                               delta * (n_cy - 1) * u / (B * np.maximum(lam, 1e-300)),
+                               delta * (n_cy - 1) / a_cy * (u * np.log(x) / B - log_B / a_cy),
+                               delta * log_B / a_cy)
+
+def _tensao_ellis(gd, eta0, tau_meio, alfa, max_iter=60):
+    """
+    Resolve tau em gamma_dot = (tau / eta0) * (1 + (tau / tau_meio)^(alfa - 1)) por Newton em ln(tau),
+    com todos os pontos iterando juntos. ln(gamma_dot) é convexo e crescente em ln(tau), com derivada
+    entre 1 e alfa, então a iteração converge a partir do menor dos dois ramos assintóticos.
+    """
+    gd_c, eta0, tau_meio, alfa = np.broadcast_arrays(np.maximum(gd, 1e-9), np.maximum(eta0, 1e-300),
+                                                     np.maximum(tau_meio, 1e-300), alfa)
+    log_gd = np.log(gd_c)
+    log_tau = np.minimum(np.log(eta0 * gd_c), np.log(tau_meio) + (log_gd + np.log(eta0 / tau_meio)) / alfa)
+    with np.errstate(over='ignore', invalid='ignore'):
+        for _ in range(max_iter):
+            r = np.exp((alfa - 1) * (log_tau - np.log(tau_meio)))
+            passo = (log_tau - np.log(eta0) + np.log1p(r) - log_gd) * (1 + r) / (1 + alfa * r)
+            log_tau = log_tau - passo
+            if not np.any(np.abs(passo) > 1e-14):
+                break
+    return np.exp(log_tau)
+
+def model_ellis(gd, eta0, tau_meio, alfa):
+    """
+    Modelo de Ellis (implícito em tau): gamma_dot = (tau / eta0) * (1 + (tau / tau_1/2)^(alfa - 1))
+    """
+    return _tensao_ellis(gd, eta0, tau_meio, alfa)
+
+def jac_ellis(gd, eta0, tau_meio, alfa):
+    # Derivação implícita de G(tau, p) = gamma_dot(tau, p) - gamma_dot = 0: d tau/dp = -(dG/dp) / (dG/dtau)
+    tau = _tensao_ellis(gd, eta0, tau_meio, alfa)
+    r = np.power(tau / tau_meio, alfa - 1)
+    dgd_dtau = (1 + alfa * r) / eta0
+    return _empilhar_derivadas(tau * (1 + r) / eta0**2 / dgd_dtau,
+                               tau * r * (alfa - 1) / (eta0 * tau_meio) / dgd_dtau,
+                               -tau * r * np.log(tau / tau_meio) / eta0 / dgd_dtau)
+
+def model_robertson_stiff(gd, K_rs, gd0, n_rs):
+    """
+    Modelo de Robertson-Stiff: tau = K * (gamma_dot + gamma_dot_0)^n
+    """
+    return K_rs * np.power(np.maximum(gd + gd0, 1e-9), n_rs)
+
+def jac_robertson_stiff(gd, K_rs, gd0, n_rs):
+    base = np.maximum(gd + gd0, 1e-9)
+    base_n = np.power(base, n_rs)
+    return _empilhar_derivadas(base_n, K_rs * n_rs * base_n / base, K_rs * base_n * np.log(base))
+
+def model_mizrahi_berk(gd, tau0_mb, K_mb, n_mb):
+    """
+    Modelo de Mizrahi-Berk: sqrt(tau) = sqrt(tau0) + K * (gamma_dot)^n
+    """
+    return (np.sqrt(np.maximum(tau0_mb, 0)) + K_mb * np.power(np.maximum(gd, 1e-9), n_mb))**2
+
+def jac_mizrahi_berk(gd, tau0_mb, K_mb, n_mb):
+    sqrt_tau0 = np.sqrt(np.maximum(tau0_mb, 0))
+    gd_c = np.maximum(gd, 1e-9)
+    gd_n = np.power(gd_c, n_mb)
+    raiz_tau = sqrt_tau0 + K_mb * gd_n
+    # Mesmo tratamento do Casson para d/dtau0 em tau0 = 0
+    return _empilhar_derivadas(raiz_tau / np.maximum(sqrt_tau0, 1e-6), 2 * raiz_tau * gd_n,
+                               2 * raiz_tau * K_mb * gd_n * np.log(gd_c))
+
+# -----------------------------------------------------------------------------
+# --- ESTIMATIVAS INICIAIS (CHUTES) A PARTIR DOS DADOS ---
+# -----------------------------------------------------------------------------
+def _reta(x, y):
+    """Coeficientes (inclinação, intercepto) da reta de mínimos quadrados y = a + b*x."""
+    slope, intercept = np.polyfit(x, y, 1)
+    return slope, intercept
+
+def _lei_potencia_log(gd, tau):
+    """(K, n) da regressão log-log ln(tau) = ln(K) + n*ln(gd), com n limitado a [0.05, 5]."""
+    slope, intercept = _reta(np.log(gd), np.log(np.maximum(tau, 1e-9)))
+    return float(np.exp(np.clip(intercept, -50, 50))), float(np.clip(slope, 0.05, 5.0))
+
+def _viscosidades_aparentes(gd, tau):
+    """Viscosidades aparentes tau/gd extremas e o 1/gd do ponto mais próximo da média geométrica delas."""
+    eta_a = tau / gd
+    eta_max, eta_min = float(np.max(eta_a)), float(np.min(eta_a))
+    i_meio = int(np.argmin(np.abs(np.log(eta_a) - 0.5 * np.log(eta_max * eta_min))))
+    return eta_max, eta_min, 1.0 / gd[i_meio]
+
 def guess_newtonian(gd, tau):
     eta_guess = np.mean(tau / gd)
     return [eta_guess]
@@ -45,49 +211,166 @@ def guess_newtonian(gd, tau):
 def guess_power_law(gd, tau):
     # Linearização log-log: ln(tau) = ln(K) + n*ln(gd)
     try:
-        slope, intercept, _, _, _ = linregress(np.log(gd), np.log(tau))
+        slope, intercept = _reta(np.log(gd), np.log(tau))
         return [np.exp(intercept), slope]
-    except:
+    except Exception:
         return [1.0, 1.0]
 
 def guess_bingham(gd, tau):
     # Regressão linear simples: tau = t0 + ep*gd
     try:
-        slope, intercept, _, _, _ = linregress(gd, tau)
+        slope, intercept = _reta(gd, tau)
         return [max(0, intercept), max(0, slope)]
-    except:
+    except Exception:
         return [0.0, 1.0]
 
 def guess_hb(gd, tau):
-    # Difícil estimar t0, K, n juntos. Chute inicial genérico.
-    # Assume t0 pequeno, e ajusta PL no restante
-    return [np.min(tau)*0.5, 1.0, 0.5]
+    # tau0 = metade da menor tensão; (K, n) pela regressão log-log de tau - tau0
+    try:
+        t0 = 0.5 * np.min(tau)
+        return [t0, *_lei_potencia_log(gd, tau - t0)]
+    except Exception:
+        return [np.min(tau) * 0.5, 1.0, 0.5]
 
 def guess_casson(gd, tau):
     # Linearização: sqrt(tau) = sqrt(t0) + sqrt(eta)*sqrt(gd)
     try:
-        slope, intercept, _, _, _ = linregress(np.sqrt(gd), np.sqrt(tau))
+        slope, intercept = _reta(np.sqrt(gd), np.sqrt(tau))
         return [max(0, intercept**2), max(0, slope**2)]
-    except:
+    except Exception:
         return [0.0, 1.0]
 
-from scipy.stats import linregress
-
-# Dicionário contendo as funções, nomes dos parâmetros, função de estimativa inicial e limites (bounds)
-# Formato: "Nome": (funcao_modelo, lista_nomes_params, funcao_chute_inicial, bounds)
-MODELS = {
-    "Newtoniano": (model_newtonian, ["eta"], guess_newtonian, ([1e-9], [np.inf])),
-    "Lei de Potencia": (model_power_law, ["K", "n"], guess_power_law, ([1e-9, 1e-9], [np.inf, 5.0])),
-    "Bingham": (model_bingham, ["tau0", "eta_p"], guess_bingham, ([0, 1e-9], [np.inf, np.inf])),
-    "Herschel-Bulkley": (model_hb, ["tau0", "K", "n"], guess_hb, ([0, 1e-9, 1e-9], [np.inf, np.inf, 5.0])),
-    "Casson": (model_casson, ["tau0", "eta_c"], guess_casson, ([0, 1e-9], [np.inf, np.inf]))
-}
-
-# Mapeamento de nomes de parâmetros para relatórios
-PARAM_NAMES_MAP = {
-    "Newtoniano": ["eta (Pa.s)"],
-    "Lei da Potência": ["K (Pa.s^n)", "n (-)"],
-    "Bingham": ["t0 (Pa)", "ep (Pa.s)"],
-    "Herschel-Bulkley": ["t0 (Pa)", "K (Pa.s^n)", "n (-)"],
-    "Casson": ["t0 (Pa)", "eta_cas (Pa.s)"]
-}
+def guess_sisko(gd, tau):
+    # eta_inf abaixo da menor viscosidade aparente; (K, n) pela regressão log-log do restante
+    try:
+        eta_inf = 0.5 * np.min(tau / gd)
+        return [eta_inf, *_lei_potencia_log(gd, tau - eta_inf * gd)]
+    except Exception:
+        return [0.0, 1.0, 0.5]
+
+def guess_cross(gd, tau):
+    # Patamares pelas viscosidades aparentes extremas; 1/lambda na transição; m pela inclinação log-log
+    try:
+        eta_max, eta_min, lam = _viscosidades_aparentes(gd, tau)
+        _, n_ll = _lei_potencia_log(gd, tau)
+        return [eta_max, 0.1 * eta_min, lam, float(np.clip(1 - n_ll, 0.2, 2.0))]
+    except Exception:
+        return [1.0, 0.0, 1.0, 1.0]
+
+def guess_carreau_yasuda(gd, tau):
+    # Como no Cross; n é a inclinação log-log (ramo de lei de potência) e a = 2 (Carreau)
+    try:
+        eta_max, eta_min, lam = _viscosidades_aparentes(gd, tau)
+        _, n_ll = _lei_potencia_log(gd, tau)
+        return [eta_max, 0.1 * eta_min, lam, 2.0, float(np.clip(n_ll, 0.05, 1.0))]
+    except Exception:
+        return [1.0, 0.0, 1.0, 2.0, 0.5]
+
+def guess_ellis(gd, tau):
+    # Ramo de altas tensões: tau ~ gd^(1/alfa); tau_1/2 na tensão mediana
+    try:
+        _, n_ll = _lei_potencia_log(gd, tau)
+        return [1.2 * np.max(tau / gd), float(np.median(tau)), float(np.clip(1 / n_ll, 1.0, 10.0))]
+    except Exception:
+        return [1.0, 1.0, 2.0]
+
+def guess_robertson_stiff(gd, tau):
+    # gamma_dot_0 pequeno frente às taxas medidas; (K, n) pela regressão log-log em gd + gd0
+    try:
+        gd0 = 0.1 * np.min(gd)
+        K, n = _lei_potencia_log(gd + gd0, tau)
+        return [K, gd0, n]
+    except Exception:
+        return [1.0, 0.0, 0.5]
+
+def guess_mizrahi_berk(gd, tau):
+    # Casson generalizado: com n = 0.5 é linear em sqrt(tau) x sqrt(gd)
+    try:
+        slope, intercept = _reta(np.sqrt(gd), np.sqrt(tau))
+        return [max(0, intercept)**2, max(slope, 1e-9), 0.5]
+    except Exception:
+        return [0.0, 1.0, 0.5]
+
+# -----------------------------------------------------------------------------
+# --- REGISTRO DE MODELOS ---
+# -----------------------------------------------------------------------------
+class ModeloReologico(NamedTuple):
+    """
+    Entrada do registro. A ordem dos campos é a dos antigos 5-tuplos de MODELS
+    (funcao_modelo, lista_nomes_params, funcao_chute_inicial, bounds, jacobiano): o desempacotamento continua válido.
+    """
+    func: Callable
+    param_names: list
+    guess: Callable
+    bounds: tuple
+    jac: Callable
+
+REGISTRO_MODELOS = {}   # Todos os modelos disponíveis
+MODELS = {}             # Modelos comparados por padrão em ajustar_modelos
+NOMES_EXIBICAO = {}     # Nome para relatórios/gráficos (os nomes-chave não têm acento)
+PARAM_NAMES_MAP = {}    # Rótulos dos parâmetros (com unidades) para relatórios
+
+def registrar_modelo(nome, func, jac, param_names, bounds, guess, nome_exibicao=None, rotulos_params=None,
+                     padrao=False):
+    """
+    Declara um modelo: kernel vetorizado, jacobiano, nomes e limites dos parâmetros, chute inicial e
+    nomes para relatórios. Com padrao=True o modelo também entra em MODELS.
+    """
+    if len(bounds[0]) != len(param_names) or len(bounds[1]) != len(param_names):
+        raise ValueError(f"Modelo '{nome}': bounds incompatíveis com {len(param_names)} parâmetros")
+    modelo = ModeloReologico(func, list(param_names), guess, (list(bounds[0]), list(bounds[1])), jac)
+    REGISTRO_MODELOS[nome] = modelo
+    NOMES_EXIBICAO[nome] = nome_exibicao or nome
+    PARAM_NAMES_MAP[nome] = list(rotulos_params or param_names)
+    if padrao:
+        MODELS[nome] = modelo
+    return modelo
+
+def selecionar_modelos(modelos=None):
+    """
+    Resolve uma seleção de modelos em {nome: ModeloReologico}: None -> MODELS (padrão),
+    'todos' -> REGISTRO_MODELOS, ou um nome / lista de nomes do registro.
+    """
+    if modelos is None:
+        return dict(MODELS)
+    if isinstance(modelos, str):
+        if modelos == 'todos':
+            return dict(REGISTRO_MODELOS)
+        modelos = [modelos]
+    desconhecidos = [nome for nome in modelos if nome not in REGISTRO_MODELOS]
+    if desconhecidos:
+        raise ValueError(f"Modelo(s) desconhecido(s): {desconhecidos} (disponíveis: {list(REGISTRO_MODELOS)})")
+    return {nome: REGISTRO_MODELOS[nome] for nome in dict.fromkeys(modelos)}
+
+def nome_exibicao(nome):
+    """Nome do modelo para relatórios, legendas e PDF (o próprio nome-chave se não for um modelo registrado)."""
+    return NOMES_EXIBICAO.get(nome, nome)
+
+INF = np.inf
+registrar_modelo("Newtoniano", model_newtonian, jac_newtonian, ["eta"], ([1e-9], [INF]), guess_newtonian,
+                 rotulos_params=["eta (Pa.s)"], padrao=True)
+registrar_modelo("Lei de Potencia", model_power_law, jac_power_law, ["K", "n"], ([1e-9, 1e-9], [INF, 5.0]),
+                 guess_power_law, nome_exibicao="Lei da Potência", rotulos_params=["K (Pa.s^n)", "n (-)"], padrao=True)
+registrar_modelo("Bingham", model_bingham, jac_bingham, ["tau0", "eta_p"], ([0, 1e-9], [INF, INF]), guess_bingham,
+                 rotulos_params=["t0 (Pa)", "ep (Pa.s)"], padrao=True)
+registrar_modelo("Herschel-Bulkley", model_hb, jac_hb, ["tau0", "K", "n"], ([0, 1e-9, 1e-9], [INF, INF, 5.0]),
+                 guess_hb, rotulos_params=["t0 (Pa)", "K (Pa.s^n)", "n (-)"], padrao=True)
+registrar_modelo("Casson", model_casson, jac_casson, ["tau0", "eta_c"], ([0, 1e-9], [INF, INF]), guess_casson,
+                 rotulos_params=["t0 (Pa)", "eta_cas (Pa.s)"], padrao=True)
+# Modelos adicionais: disponíveis via ajustar_modelos(..., modelos=[...] ou 'todos')
+registrar_modelo("Sisko", model_sisko, jac_sisko, ["eta_inf", "K", "n"], ([0, 1e-9, 1e-9], [INF, INF, 5.0]),
+                 guess_sisko, rotulos_params=["eta_inf (Pa.s)", "K (Pa.s^n)", "n (-)"])
+registrar_modelo("Cross", model_cross, jac_cross, ["eta0", "eta_inf", "lambda", "m"],
+                 ([1e-9, 0, 1e-12, 1e-3], [INF, INF, INF, 5.0]), guess_cross,
+                 rotulos_params=["eta0 (Pa.s)", "eta_inf (Pa.s)", "lambda (s)", "m (-)"])
+registrar_modelo("Carreau-Yasuda", model_carreau_yasuda, jac_carreau_yasuda, ["eta0", "eta_inf", "lambda", "a", "n"],
+                 ([1e-9, 0, 1e-12, 0.1, 1e-9], [INF, INF, INF, 10.0, 2.0]), guess_carreau_yasuda,
+                 rotulos_params=["eta0 (Pa.s)", "eta_inf (Pa.s)", "lambda (s)", "a (-)", "n (-)"])
+registrar_modelo("Ellis", model_ellis, jac_ellis, ["eta0", "tau_1/2", "alfa"], ([1e-9, 1e-9, 0.1], [INF, INF, 10.0]),
+                 guess_ellis, rotulos_params=["eta0 (Pa.s)", "tau_1/2 (Pa)", "alfa (-)"])
+registrar_modelo("Robertson-Stiff", model_robertson_stiff, jac_robertson_stiff, ["K", "gd0", "n"],
+                 ([1e-9, 0, 1e-9], [INF, INF, 5.0]), guess_robertson_stiff,
+                 rotulos_params=["K (Pa.s^n)", "gd0 (1/s)", "n (-)"])
+registrar_modelo("Mizrahi-Berk", model_mizrahi_berk, jac_mizrahi_berk, ["tau0", "K", "n"],
+                 ([0, 1e-9, 1e-9], [INF, INF, 5.0]), guess_mizrahi_berk,
+                 rotulos_params=["t0 (Pa)", "K (Pa^0.5.s^n)", "n (-)"])
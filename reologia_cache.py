@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Cache endereçado por conteúdo para produtos de análise.
+
+A chave é o hash (SHA-256) dos digests dos arquivos de entrada e dos parâmetros da análise;
+cada entrada é uma pasta '<pasta_cache>/<chave>/' com 'arrays.npz' e 'metadados.json'. A pasta é
+podada por tamanho como o ArmazemLimitado: as entradas menos recentemente usadas saem primeiro.
+"""
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+import utils_reologia
+
+VERSAO_CACHE = 3  # Incrementar quando a forma de calcular os produtos mudar (invalida o cache antigo)
+PASTA_CACHE_PADRAO = utils_reologia.CONSTANTS['CACHE_FOLDER']
+LIMITE_CACHE_PRODUTOS_MB = 200  # Tamanho máximo da pasta de produtos antes da poda
+
+def digest_arquivo(caminho, tamanho_bloco=1 << 20):
+    """Retorna o SHA-256 (hex) do conteúdo de um arquivo."""
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+def chave_conteudo(caminhos_arquivos, parametros):
+    """
+    Calcula a chave do cache a partir do conteúdo dos arquivos (na ordem dada) e dos parâmetros.
+    Retorna None se algum arquivo não puder ser lido (a análise segue sem cache).
+    """
+    try:
+        digests = [digest_arquivo(c) for c in caminhos_arquivos]
+    except OSError as e:
+        print(f"  AVISO: Cache desativado (arquivo de entrada ilegível: {e}).")
+        return None
+    descricao = json.dumps({'versao': VERSAO_CACHE, 'arquivos': digests, 'parametros': parametros},
+                           sort_keys=True, default=_serializar_json)
+    return hashlib.sha256(descricao.encode('utf-8')).hexdigest()
+
+def _serializar_json(obj):
+    """Converte tipos NumPy para JSON (arrays ficam marcados para voltarem como ndarray)."""
+    if isinstance(obj, np.ndarray):
+        return {'__ndarray__': obj.tolist()}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Tipo não serializável no cache: {type(obj).__name__}")
+
+def _desserializar_json(obj):
+    if '__ndarray__' in obj and len(obj) == 1:
+        return np.array(obj['__ndarray__'])
+    return obj
+
+def salvar_produtos(chave, arrays, metadados, pasta_cache=None, limite_mb=LIMITE_CACHE_PRODUTOS_MB):
+    """
+    Grava os produtos de uma análise: 'arrays' (dict nome -> ndarray) e 'metadados' (dict serializável
+    em JSON; ndarrays internos são preservados). A escrita é atômica e sob bloqueio da pasta de cache.
+    Se a pasta passar de 'limite_mb', as entradas mais antigas são removidas (ver podar_produtos).
+    """
+    pasta_cache = pasta_cache or PASTA_CACHE_PADRAO
+    pasta_entrada = os.path.join(pasta_cache, chave)
+    try:
+        with utils_reologia.bloquear_pasta(pasta_cache):
+            os.makedirs(pasta_entrada, exist_ok=True)
+            with utils_reologia.escrita_atomica(os.path.join(pasta_entrada, "arrays.npz"), 'wb') as f:
+                np.savez(f, **{nome: np.asarray(v, dtype=float) for nome, v in arrays.items()})
+            # metadados.json por último: sua presença marca a entrada como completa
+            utils_reologia.salvar_json_atomico(os.path.join(pasta_entrada, "metadados.json"), metadados,
+                                               indent=2, default=_serializar_json)
+            podar_produtos(pasta_cache, int(limite_mb * 1024**2), manter=chave)
+        return pasta_entrada
+    except Exception as e:
+        print(f"  AVISO: Não foi possível gravar o cache: {e}")
+        return None
+
+def carregar_produtos(chave, pasta_cache=None):
+    """Retorna (arrays, metadados) de uma entrada do cache, ou None se não existir/estiver corrompida."""
+    pasta_entrada = os.path.join(pasta_cache or PASTA_CACHE_PADRAO, chave)
+    caminho_meta = os.path.join(pasta_entrada, "metadados.json")
+    if not os.path.exists(caminho_meta):
+        return None
+    try:
+        with open(caminho_meta, 'r', encoding='utf-8') as f:
+            metadados = json.load(f, object_hook=_desserializar_json)
+        with np.load(os.path.join(pasta_entrada, "arrays.npz"), allow_pickle=False) as npz:
+            arrays = {nome: npz[nome] for nome in npz.files}
+        os.utime(caminho_meta)  # Leituras renovam a entrada (ordem de poda)
+        return arrays, metadados
+    except Exception as e:
+        print(f"  AVISO: Entrada de cache ilegível ({e}). Recalculando.")
+        return None
+
+def podar_produtos(pasta_cache, limite_bytes, fracao_alvo=0.8, manter=None):
+    """
+    Se o total das entradas passar de 'limite_bytes', remove as menos recentemente usadas (mtime de
+    'metadados.json'; entradas incompletas contam como as mais antigas) até restar fracao_alvo * limite.
+    A entrada 'manter' (a recém-gravada) nunca é removida. Deve ser chamada sob bloquear_pasta(pasta_cache).
+    """
+    entradas = []
+    with os.scandir(pasta_cache) as itens:
+        for item in itens:
+            if not item.is_dir() or item.name == manter:
+                continue
+            tamanho, mtime = 0, 0
+            for arquivo in os.scandir(item.path):
+                st = arquivo.stat()
+                tamanho += st.st_size
+                if arquivo.name == "metadados.json":
+                    mtime = st.st_mtime_ns
+            entradas.append((mtime, tamanho, item.path))
+    total = sum(t for _, t, _ in entradas)
+    if manter is not None:
+        pasta_mantida = os.path.join(pasta_cache, manter)
+        total += sum(a.stat().st_size for a in os.scandir(pasta_mantida)) if os.path.isdir(pasta_mantida) else 0
+    if total <= limite_bytes:
+        return total
+    for _, tamanho, caminho in sorted(entradas):
+        if total <= fracao_alvo * limite_bytes:
+            break
+        shutil.rmtree(caminho, ignore_errors=True)
+        total -= tamanho
+    return total
+
+class ArmazemLimitado:
+    """
+    Armazém persistente de pequenos itens JSON ('<pasta>/<chave>.json') com limite de tamanho total.
+    Ao ultrapassar 'limite_bytes', os itens menos recentemente usados (por mtime; leituras renovam
+    o mtime) são removidos até restar ~80% do limite.
+    """
+    def __init__(self, pasta, limite_bytes=20 * 1024**2):
+        self.pasta = pasta
+        self.limite_bytes = limite_bytes
+        self._tamanho_total = None  # Calculado na primeira gravação; depois mantido incrementalmente
+
+    def _caminho(self, chave):
+        return os.path.join(self.pasta, f"{chave}.json")
+
+    def carregar(self, chave):
+        """Retorna o item gravado sob 'chave' ou None (ausente ou ilegível)."""
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                dados = json.load(f, object_hook=_desserializar_json)
+            os.utime(caminho)
+            return dados
+        except (OSError, ValueError):
+            return None
+
+    def salvar(self, chave, dados):
+        try:
+            caminho = utils_reologia.salvar_json_atomico(self._caminho(chave), dados, default=_serializar_json)
+            if self._tamanho_total is None:
+                self._tamanho_total = sum(t for _, t, _ in self._itens())
+            else:
+                self._tamanho_total += os.path.getsize(caminho)
+            if self._tamanho_total > self.limite_bytes:
+                self.podar()
+        except Exception as e:
+            print(f"  AVISO: Não foi possível gravar no cache '{self.pasta}': {e}")
+
+    def _itens(self):
+        itens = []
+        with os.scandir(self.pasta) as entradas:
+            for entrada in entradas:
+                if entrada.name.endswith('.json') and entrada.is_file():
+                    st = entrada.stat()
+                    itens.append((st.st_mtime_ns, st.st_size, entrada.path))
+        return itens
+
+    def podar(self, fracao_alvo=0.8):
+        """Remove os itens mais antigos até o total ficar abaixo de fracao_alvo * limite_bytes."""
+        itens = sorted(self._itens())
+        total = sum(t for _, t, _ in itens)
+        for _, tamanho, caminho in itens:
+            if total <= fracao_alvo * self.limite_bytes:
+                break
+            try:
+                os.remove(caminho)
+                total -= tamanho
+            except OSError:
+                pass
+        self._tamanho_total = total
@@ -1,12 +1,70 @@
 # -*- coding: utf-8 -*-
 import numpy as np
 import reologia_plot
-from scipy.stats import linregress
 
-def perform_bagley_correction(lista_cap_data_bagley, common_D_mm_bagley, rho_si, t_ext_s_array_map, output_folder, timestamp, num_bagley_pts_final=15):
+# -----------------------------------------------------------------------------
+# --- INTERPOLAÇÃO E REGRESSÃO EM LOTE (TODOS OS ALVOS DE UMA VEZ) ---
+# -----------------------------------------------------------------------------
+def _curva_ordenada(x, y):
+    """Ordena a curva de um capilar por x (feito uma vez por capilar, não por alvo)."""
+    ordem = np.argsort(x)
+    return x[ordem], y[ordem]
+
+def interpolar_curvas(curvas, alvos):
+    """
+    Interpola cada curva ordenada (x, y) de 'curvas' em todos os 'alvos' (uma chamada de np.interp por curva).
+    Retorna (Y, cobertura), ambos (n_alvos, n_curvas): cobertura marca os alvos dentro da faixa medida de cada
+    curva (curvas com menos de 2 pontos não cobrem nenhum alvo); fora dela Y é NaN.
+    """
+    alvos = np.asarray(alvos, dtype=float)
+    Y = np.full((len(alvos), len(curvas)), np.nan)
+    cobertura = np.zeros(Y.shape, dtype=bool)
+    for j, (x, y) in enumerate(curvas):
+        if x.size > 1:
+            cobertura[:, j] = (alvos >= x[0]) & (alvos <= x[-1])
+            Y[cobertura[:, j], j] = np.interp(alvos[cobertura[:, j]], x, y)
+    return Y, cobertura
+
+def regressao_linear_lote(x, Y, mascara):
+    """
+    Regressão y = intercepto + inclinacao * x para cada linha de Y (n_alvos, n_curvas), usando só os pontos
+    marcados em 'mascara'; x tem uma entrada por curva. Forma fechada com somas centradas.
+
+    Returns:
+        dict de arrays (n_alvos,): 'inclinacao', 'intercepto', os erros-padrão 'erro_inclinacao' e
+        'erro_intercepto' (NaN com menos de 3 pontos), 'r2' e 'n'. Linhas com menos de 2 pontos (ou x
+        constante) ficam NaN.
+    """
+    w = np.asarray(mascara, dtype=float)
+    x = np.broadcast_to(np.asarray(x, dtype=float), w.shape)
+    Y = np.where(mascara, Y, 0.0)
+    n = w.sum(1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_medio = (w * x).sum(1) / n
+        y_medio = (w * Y).sum(1) / n
+        xc, yc = w * (x - x_medio[:, None]), w * (Y - y_medio[:, None])
+        Sxx, Sxy, Syy = (xc * xc).sum(1), (xc * yc).sum(1), (yc * yc).sum(1)
+        valido = (n >= 2) & (Sxx > 0)
+        inclinacao = np.where(valido, Sxy / Sxx, np.nan)
+        intercepto = y_medio - inclinacao * x_medio
+        sse = np.maximum(Syy - inclinacao * Sxy, 0.0)
+        s2 = np.where(n > 2, sse / (n - 2), np.nan)
+        erro_inclinacao = np.sqrt(s2 / Sxx)
+        erro_intercepto = np.sqrt(s2 * (1 / n + x_medio**2 / Sxx))
+        r2 = np.where(Syy > 0, 1 - sse / Syy, 1.0)
+    return {'inclinacao': inclinacao, 'intercepto': intercepto, 'erro_inclinacao': erro_inclinacao,
+            'erro_intercepto': erro_intercepto, 'r2': np.where(valido, r2, np.nan), 'n': n.astype(int)}
+
+def perform_bagley_correction(lista_cap_data_bagley, common_D_mm_bagley, rho_si, t_ext_s_array_map, output_folder, timestamp, num_bagley_pts_final=15,
+                              retornar_detalhes=False):
     """
     Executa a correção de Bagley completa. Usa dados de capilares de diferentes comprimentos
-    para determinar a tensão de cisalhamento na parede corrigida.
+    para determinar a tensão de cisalhamento na parede corrigida: P = 2 tau_w (L/R) + P_e.
+    As curvas P x gamma_aw de cada capilar são interpoladas em todos os alvos de uma vez e as
+    regressões de P em L/R de todos os alvos são resolvidas juntas (regressao_linear_lote).
+
+    Com retornar_detalhes=True, retorna também um dict de arrays alinhados aos alvos aceitos:
+    'P_entrada_Pa' (intercepto), 'erro_P_entrada_Pa', 'erro_tau_w' (erro-padrão), 'r2' e 'n_capilares'.
     """
     print("\n--- Iniciando Análise de Correção de Bagley ---")
     min_gamma_overall, max_gamma_overall = np.inf, -np.inf
@@ -31,45 +89,53 @@ def perform_bagley_correction(lista_cap_data_bagley, common_D_mm_bagley, rho_si,
             min_gamma_overall = min(min_gamma_overall, np.min(gamma_aw_flow))
             max_gamma_overall = max(max_gamma_overall, np.max(gamma_aw_flow))
 
+    vazio = (np.array([]), np.array([])) + (({},) if retornar_detalhes else ())
     if not (np.isfinite(min_gamma_overall) and np.isfinite(max_gamma_overall) and min_gamma_overall < max_gamma_overall):
-        print("ALERTA (Bagley): Faixa inválida de taxas de cisalhamento. Verifique dados."); return np.array([]), np.array([])
+        print("ALERTA (Bagley): Faixa inválida de taxas de cisalhamento. Verifique dados."); return vazio
 
     targets_gamma_aw = np.geomspace(max(1e-3, min_gamma_overall), max_gamma_overall, num_bagley_pts_final)
-    tau_w_corr_list, gamma_aw_targets_ok_list = [], []
 
-    for target_gamma_k_val in targets_gamma_aw:
-        P_target_list, L_R_target_list = [], []
-        for cap_data in lista_cap_data_bagley:
-            # Devemos ter certeza que o cap_data['gamma_dot_aw'] foi calculado
-            if 'gamma_dot_aw' not in cap_data: continue 
+    # Capilares com gamma_dot_aw calculado: cada curva é ordenada uma única vez
+    capilares = [cap_data for cap_data in lista_cap_data_bagley if 'gamma_dot_aw' in cap_data]
+    if not capilares:
+        return vazio
+    curvas = [_curva_ordenada(cap_data['gamma_dot_aw'], cap_data['pressoes_Pa']) for cap_data in capilares]
+    # Pressão de cada capilar em cada taxa alvo (alvos x capilares); fora da faixa medida o capilar não entra
+    P_alvos, cobertura = interpolar_curvas(curvas, targets_gamma_aw)
+    L_R = np.array([cap_data['L_mm'] / (cap_data['D_mm'] / 2.0) for cap_data in capilares])
+    reg = regressao_linear_lote(L_R, P_alvos, cobertura)
+    # Definição de Bagley: inclinação = 2 * tau_w; o intercepto é a perda de pressão nas extremidades
+    ok = reg['inclinacao'] > 0
 
-            sort_idx = np.argsort(cap_data['gamma_dot_aw'])
-            g_sorted = cap_data['gamma_dot_aw'][sort_idx]
-            P_sorted = cap_data['pressoes_Pa'][sort_idx]
-            
-            # Interpolação da Pressão para a taxa de cisalhamento alvo
-            if g_sorted.size > 1 and g_sorted[0] <= target_gamma_k_val <= g_sorted[-1]:
-                P_interp = np.interp(target_gamma_k_val, g_sorted, P_sorted)
-                P_target_list.append(P_interp)
-                L_R_target_list.append(cap_data['L_mm'] / cap_data['D_mm'])
-        
-        if len(P_target_list) >= 2:
-            slope, intercept, r_value, _, _ = linregress(L_R_target_list, P_target_list)
-            if slope > 0:
-                tau_w_corr = slope / 2.0 # Definição de Bagley: Slope = 2 * tau_w
-                tau_w_corr_list.append(tau_w_corr)
-                gamma_aw_targets_ok_list.append(target_gamma_k_val)
-                # Plota um exemplo de ajuste de Bagley (opcional, para não gerar muitos gráficos)
-                if target_gamma_k_val == targets_gamma_aw[len(targets_gamma_aw)//2]:
-                     reologia_plot.plotar_ajuste_bagley(L_R_target_list, P_target_list, slope, intercept, str(target_gamma_k_val), output_folder, timestamp)
-
-    return np.array(tau_w_corr_list), np.array(gamma_aw_targets_ok_list)
-
-def perform_mooney_correction(capilares_data, common_L_mm, rho_si, t_ext_s_array_map, output_folder, timestamp, tau_w_targets_ref=None):
+    # Plota um exemplo de ajuste de Bagley (opcional, para não gerar muitos gráficos)
+    meio = len(targets_gamma_aw) // 2
+    if ok[meio]:
+        reologia_plot.plotar_ajuste_bagley(list(L_R[cobertura[meio]]), list(P_alvos[meio, cobertura[meio]]), reg['inclinacao'][meio],
+                                           reg['intercepto'][meio], str(targets_gamma_aw[meio]), output_folder, timestamp)
+
+    tau_w_corr, gamma_aw_ok = reg['inclinacao'][ok] / 2.0, targets_gamma_aw[ok]
+    if ok.any():
+        print(f"  Perda de pressão nas extremidades (P_e): {np.median(reg['intercepto'][ok]) / 1e5:.3f} bar "
+              f"(mediana de {int(ok.sum())} taxas alvo)")
+    if not retornar_detalhes:
+        return tau_w_corr, gamma_aw_ok
+    detalhes = {'P_entrada_Pa': reg['intercepto'][ok], 'erro_P_entrada_Pa': reg['erro_intercepto'][ok],
+                'erro_tau_w': reg['erro_inclinacao'][ok] / 2.0, 'r2': reg['r2'][ok], 'n_capilares': reg['n'][ok]}
+    return tau_w_corr, gamma_aw_ok, detalhes
+
+def perform_mooney_correction(capilares_data, common_L_mm, rho_si, t_ext_s_array_map, output_folder, timestamp, tau_w_targets_ref=None,
+                              retornar_detalhes=False):
     """
     Executa a correção de Mooney completa (versão final com geração de alvos aprimorada).
+    gamma_aw de cada capilar é interpolado em todas as tensões alvo de uma vez e as regressões de gamma_aw
+    em 1/R de todos os alvos são resolvidas juntas (regressao_linear_lote).
+
+    Com retornar_detalhes=True, retorna também um dict de arrays alinhados aos alvos aceitos:
+    'V_slip_m_s' (velocidade de deslizamento), 'erro_V_slip_m_s', 'erro_gamma_dot_true' (erros-padrão),
+    'r2' e 'n_capilares'.
     """
     print("\n--- Iniciando Análise de Correção de Mooney ---")
+    vazio = (np.array([]), np.array([])) + (({},) if retornar_detalhes else ())
     
     # 1. Pré-processamento: Calcula gamma_aw e tau_w_aparente para cada capilar
     min_tau_overall, max_tau_overall = np.inf, -np.inf
@@ -101,55 +167,45 @@ def perform_mooney_correction(capilares_data, common_L_mm, rho_si, t_ext_s_array
     # 2. Definição dos Alvos de Tensão (Tau Targets)
     # Se recebermos alvos de Bagley (tau_w_targets_ref), usamos a interseção com o range disponível em Mooney
     if tau_w_targets_ref is not None and len(tau_w_targets_ref) > 0:
-        tau_targets = np.array([t for t in tau_w_targets_ref if min_tau_overall <= t <= max_tau_overall])
+        tau_w_targets_ref = np.asarray(tau_w_targets_ref, dtype=float)
+        tau_targets = tau_w_targets_ref[(tau_w_targets_ref >= min_tau_overall) & (tau_w_targets_ref <= max_tau_overall)]
         if len(tau_targets) < 3: # Se a interseção for muito pobre, faz fallback
              print("Aviso (Mooney): Alvos de Bagley fora do range de Mooney. Gerando novos alvos baseados em Mooney.")
              tau_targets = np.geomspace(max(1e-3, min_tau_overall), max_tau_overall, 15)
     else:
         # Se não houver Bagley, gera alvos baseados nos dados de Mooney
         if np.isinf(min_tau_overall) or np.isinf(max_tau_overall):
-             print("ERRO (Mooney): Não há dados válidos para gerar alvos de tensão."); return np.array([]), np.array([])
+             print("ERRO (Mooney): Não há dados válidos para gerar alvos de tensão."); return vazio
         tau_targets = np.geomspace(max(1e-3, min_tau_overall), max_tau_overall, 15)
 
-    gamma_dot_true_list = []
-    tau_w_final_list = []
-    
-    # 3. Loop de Correção para cada Tensão Alvo
-    for tau_target in tau_targets:
-        inv_R_vals = [] # 1/R
-        gamma_aw_vals = [] # Taxa aparente interpolada
-        
-        for cap in capilares_data:
-            if 'tau_w_aparente' not in cap: continue
-            
-            # Ordena para interpolação
-            sort_idx = np.argsort(cap['tau_w_aparente'])
-            tau_sorted = cap['tau_w_aparente'][sort_idx]
-            gamma_sorted = cap['gamma_dot_aw'][sort_idx]
-            
-            # Interpola gamma_aw para o tau_target
-            if tau_sorted.size > 1 and tau_sorted[0] <= tau_target <= tau_sorted[-1]:
-                gamma_interp = np.interp(tau_target, tau_sorted, gamma_sorted)
-                inv_R_vals.append(1.0 / cap['R_m'])
-                gamma_aw_vals.append(gamma_interp)
-        
-        # Requer pelo menos 2 diâmetros para regressão
-        if len(inv_R_vals) >= 2:
-            # Mooney: gamma_aw = gamma_true + (8 * V_slip / D) -> gamma_aw = gamma_true + (4 * V_slip) * (1/R)
-            # Plot: Y = gamma_aw, X = 1/R
-            # Intercept = gamma_true (Taxa de cisalhamento real na parede sem deslizamento)
-            # Slope = 4 * V_slip
-            
-            slope, intercept, r_value, _, _ = linregress(inv_R_vals, gamma_aw_vals)
-            
-            # O intercept é a taxa de cisalhamento corrigida (gamma_dot_true)
-            # Deve ser positivo. Se for negativo, indica problemas nos dados ou "deslizamento negativo" (físicamente impossível neste modelo simples)
-            if intercept > 0:
-                gamma_dot_true_list.append(intercept)
-                tau_w_final_list.append(tau_target)
-            else:
-                 # Fallback: Se intercept < 0, assume deslizamento desprezível ou erro, 
-                 # pode-se pegar a média dos gamma_aw ou ignorar. Aqui ignoramos.
-                 pass
-
-    return np.array(tau_w_final_list), np.array(gamma_dot_true_list)
+    tau_targets = np.asarray(tau_targets, dtype=float)
+
+    # 3. Correção de todas as tensões alvo de uma vez: cada capilar é ordenado uma única vez e
+    #    gamma_aw é interpolado em todos os alvos (matriz alvos x capilares, com máscara de cobertura)
+    capilares = [cap for cap in capilares_data if 'tau_w_aparente' in cap]
+    if not capilares or len(tau_targets) == 0:
+        return vazio
+    curvas = [_curva_ordenada(cap['tau_w_aparente'], cap['gamma_dot_aw']) for cap in capilares]
+    gamma_aw_alvos, cobertura = interpolar_curvas(curvas, tau_targets)
+
+    # Mooney: gamma_aw = gamma_true + (8 * V_slip / D) -> gamma_aw = gamma_true + (4 * V_slip) * (1/R)
+    # Plot: Y = gamma_aw, X = 1/R
+    # Intercept = gamma_true (Taxa de cisalhamento real na parede sem deslizamento)
+    # Slope = 4 * V_slip
+    # Requer pelo menos 2 diâmetros por alvo (alvos com menos ficam NaN e são descartados)
+    inv_R = np.array([1.0 / cap['R_m'] for cap in capilares])
+    reg = regressao_linear_lote(inv_R, gamma_aw_alvos, cobertura)
+
+    # O intercept é a taxa de cisalhamento corrigida (gamma_dot_true)
+    # Deve ser positivo. Se for negativo, indica problemas nos dados ou "deslizamento negativo" (físicamente impossível neste modelo simples)
+    # Nesses alvos assume-se erro nos dados e o ponto é ignorado.
+    ok = reg['intercepto'] > 0
+    tau_w_final, gamma_dot_true = tau_targets[ok], reg['intercepto'][ok]
+    if ok.any():
+        print(f"  Velocidade de deslizamento (V_slip): {np.median(reg['inclinacao'][ok]) / 4.0 * 1e3:.4f} mm/s "
+              f"(mediana de {int(ok.sum())} tensões alvo)")
+    if not retornar_detalhes:
+        return tau_w_final, gamma_dot_true
+    detalhes = {'V_slip_m_s': reg['inclinacao'][ok] / 4.0, 'erro_V_slip_m_s': reg['erro_inclinacao'][ok] / 4.0,
+                'erro_gamma_dot_true': reg['erro_intercepto'][ok], 'r2': reg['r2'][ok], 'n_capilares': reg['n'][ok]}
+    return tau_w_final, gamma_dot_true, detalhes
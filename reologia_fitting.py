@@ -1,65 +1,1130 @@
 # -*- coding: utf-8 -*-
+import os
+import atexit
+import hashlib
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
 import numpy as np
 import pandas as pd
-from scipy.optimize import curve_fit
-from sklearn.metrics import r2_score
-from modelos_reologicos import MODELS
+from scipy.optimize import curve_fit, least_squares, minimize_scalar
+from scipy.special import ndtr, ndtri
+import reologia_metricas
+from modelos_reologicos import REGISTRO_MODELOS, selecionar_modelos
+from reologia_kernels import avaliar_modelo, residuos_modelo, jacobiano_modelo, residuos_lote, jacobiano_lote
 
-def ajustar_modelos(gamma_dot, tau_w):
+# -----------------------------------------------------------------------------
+# --- SOLVERS DIRETOS (FORMA FECHADA / PROJEÇÃO DE VARIÁVEIS) ---
+# -----------------------------------------------------------------------------
+# Newtoniano e Bingham são lineares nos parâmetros; Lei de Potência e Herschel-Bulkley são lineares
+# em (tau0, K) para n fixo, então n é buscado em 1-D com (tau0, K) resolvidos exatamente (variable projection).
+# Casson é linear em sqrt(tau) x sqrt(gamma_dot): resolvido em forma fechada e refinado no espaço de tau.
+LIMITES_N = (1e-9, 5.0)      # Mesmos limites de n usados nos bounds de MODELS
+PARAM_MINIMO = 1e-9          # Limite inferior de K / eta nos bounds de MODELS
+GRADE_N = np.concatenate([np.linspace(0.02, 1.5, 75), np.linspace(1.55, LIMITES_N[1], 70)])
+
+def _somas_mq(x, y, w):
+    """Estatísticas suficientes (Sw, Sx, Sy, Sxx, Sxy, Syy) de y = a + b*x, empilhadas no eixo 0."""
+    return np.stack(np.broadcast_arrays(w.sum(-1), (w * x).sum(-1), (w * y).sum(-1),
+                                        (w * x * x).sum(-1), (w * x * y).sum(-1), (w * y * y).sum(-1)))
+
+def _resolver_somas(somas, com_intercepto=True):
+    """Solução com a, b >= 0 a partir das somas de _somas_mq. Retorna (a, b, sse)."""
+    Sw, Sx, Sy, Sxx, Sxy, Syy = somas
+    sse = lambda a, b: Syy - 2 * a * Sy - 2 * b * Sxy + a * a * Sw + 2 * a * b * Sx + b * b * Sxx
+
+    # Candidato com a = 0 (sempre viável se b >= 0)
+    b0 = np.maximum(Sxy / np.where(Sxx > 0, Sxx, np.inf), 0.0)
+    a_melhor, b_melhor = np.zeros_like(b0), b0
+    if com_intercepto:
+        det = Sw * Sxx - Sx * Sx
+        with np.errstate(divide='ignore', invalid='ignore'):
+            b_livre = (Sw * Sxy - Sx * Sy) / det
+            a_livre = (Sy - b_livre * Sx) / Sw
+        livre_ok = (det > 0) & (a_livre >= 0) & (b_livre >= 0)
+        a_so = np.broadcast_to(np.maximum(Sy / Sw, 0.0), b0.shape)  # Candidato com b = 0
+        usar_so = sse(a_so, 0.0) < sse(a_melhor, b_melhor)
+        a_melhor, b_melhor = np.where(usar_so, a_so, a_melhor), np.where(usar_so, 0.0, b_melhor)
+        usar_livre = livre_ok & (sse(np.nan_to_num(a_livre), np.nan_to_num(b_livre)) <= sse(a_melhor, b_melhor))
+        a_melhor = np.where(usar_livre, a_livre, a_melhor)
+        b_melhor = np.where(usar_livre, b_livre, b_melhor)
+    return a_melhor, b_melhor, np.maximum(sse(a_melhor, b_melhor), 0.0)
+
+def _mq_afim_nao_negativo(x, y, w, com_intercepto=True):
+    """
+    Mínimos quadrados ponderados de y = a + b*x com a, b >= 0 (forma fechada, vetorizada nas linhas).
+    x, y, w: (..., N), broadcast entre si (ex.: grade de x para um único y, ou um lote de conjuntos;
+    pontos com w = 0 são ignorados). Retorna (a, b, sse) com o shape das linhas.
+    """
+    return _resolver_somas(_somas_mq(x, y, w), com_intercepto)
+
+def _busca_expoente(gd, tau, w, com_intercepto):
+    """Projeção de variáveis para tau = a + b*gd^n: grade em n, refinada por Brent no intervalo vizinho."""
+    log_gd = np.log(np.maximum(gd, 1e-9))
+    _, _, sse_grade = _mq_afim_nao_negativo(np.exp(np.outer(GRADE_N, log_gd)), tau, w, com_intercepto)
+    i = int(np.argmin(sse_grade))
+    custo = lambda n: float(_mq_afim_nao_negativo(np.exp(n * log_gd), tau, w, com_intercepto)[2])
+    lim_inf = GRADE_N[i - 1] if i > 0 else LIMITES_N[0]
+    lim_sup = GRADE_N[i + 1] if i < len(GRADE_N) - 1 else LIMITES_N[1]
+    res = minimize_scalar(custo, bounds=(lim_inf, lim_sup), method='bounded', options={'xatol': 1e-7})
+    n = res.x if res.fun <= sse_grade[i] else GRADE_N[i]
+    a, b, _ = _mq_afim_nao_negativo(np.exp(n * log_gd), tau, w, com_intercepto)
+    return float(a), float(b), float(n)
+
+def _pesos(tau, pesos):
+    return np.ones_like(tau) if pesos is None else np.asarray(pesos, dtype=float)
+
+def resolver_newtoniano(gd, tau, pesos=None):
+    _, eta, _ = _mq_afim_nao_negativo(gd, tau, _pesos(tau, pesos), com_intercepto=False)
+    return np.array([max(float(eta), PARAM_MINIMO)])
+
+def resolver_bingham(gd, tau, pesos=None):
+    t0, ep, _ = _mq_afim_nao_negativo(gd, tau, _pesos(tau, pesos))
+    return np.array([float(t0), max(float(ep), PARAM_MINIMO)])
+
+def resolver_lei_potencia(gd, tau, pesos=None):
+    _, K, n = _busca_expoente(gd, tau, _pesos(tau, pesos), com_intercepto=False)
+    return np.array([max(K, PARAM_MINIMO), n])
+
+def resolver_hb(gd, tau, pesos=None):
+    t0, K, n = _busca_expoente(gd, tau, _pesos(tau, pesos), com_intercepto=True)
+    return np.array([t0, max(K, PARAM_MINIMO), n])
+
+def resolver_casson(gd, tau, pesos=None):
+    w = _pesos(tau, pesos)
+    # Forma fechada em sqrt: peso 4*tau converte o resíduo em sqrt(tau) para a escala de tau (1a ordem)
+    raiz_t0, raiz_eta, _ = _mq_afim_nao_negativo(np.sqrt(gd), np.sqrt(tau), w * 4 * tau)
+    p0 = np.array([raiz_t0**2, max(raiz_eta**2, PARAM_MINIMO)])
+    # Refinamento curto no espaço de tau (mesmo critério dos demais modelos)
+    bounds = REGISTRO_MODELOS["Casson"].bounds
+    raiz_w = np.sqrt(w)
+    res = least_squares(lambda p: raiz_w * residuos_modelo("Casson", gd, tau, p), p0, bounds=bounds,
+                        jac=lambda p: raiz_w[:, None] * jacobiano_modelo("Casson", gd, p), method='trf')
+    return res.x
+
+SOLVERS_DIRETOS = {
+    "Newtoniano": resolver_newtoniano,
+    "Lei de Potencia": resolver_lei_potencia,
+    "Bingham": resolver_bingham,
+    "Herschel-Bulkley": resolver_hb,
+    "Casson": resolver_casson,
+}
+
+# Modelos lineares nos parâmetros (nome -> com_intercepto): solução exata pelas somas normais,
+# e a remoção de um ponto é um downdate de posto 1 dessas somas (ver AjusteIncremental)
+MODELOS_LINEARES = {"Newtoniano": False, "Bingham": True}
+
+# -----------------------------------------------------------------------------
+# --- PARTIDAS MÚLTIPLAS (BUSCA GLOBAL EM GRADE PARA HERSCHEL-BULKLEY E CASSON) ---
+# -----------------------------------------------------------------------------
+# Sem solver direto (metodo='curve_fit' ou reserva), uma única estimativa inicial pode levar o otimizador
+# local a um mínimo ruim. A grade avalia o SSE em todos os pares (n, tau0) de uma vez, com o parâmetro
+# linear restante (K) em forma fechada; os melhores mínimos locais da grade são refinados e vence o de menor SSE.
+# Casson é o caso n = 1/2 em sqrt(tau): a grade é em tau0, com sqrt(eta) resolvido em sqrt(tau).
+RESOLUCAO_PARTIDAS = {"Herschel-Bulkley": (40, 25), "Casson": (60,)}  # (pontos em n, em tau0) / (em tau0,)
+N_PARTIDAS_REFINADAS = 3
+MAXFEV_PARTIDA = 2000  # Por partida (o ajuste de partida única usa até 10000)
+
+def _minimos_locais(sse_grade, n_melhores):
+    """Índices (em sse_grade.ravel()) dos n_melhores mínimos locais da grade (vizinhança em cada eixo)."""
+    sse_grade = np.where(np.isfinite(sse_grade), sse_grade, np.inf)
+    minimo = np.ones(sse_grade.shape, dtype=bool)
+    for eixo in range(sse_grade.ndim):
+        borda = [(0, 0)] * sse_grade.ndim
+        borda[eixo] = (1, 1)
+        estendida = np.pad(sse_grade, borda, constant_values=np.inf)
+        anterior = np.take(estendida, np.arange(sse_grade.shape[eixo]), axis=eixo)
+        seguinte = np.take(estendida, np.arange(2, sse_grade.shape[eixo] + 2), axis=eixo)
+        minimo &= (sse_grade <= anterior) & (sse_grade <= seguinte)
+    candidatos = np.flatnonzero(minimo & np.isfinite(sse_grade))
+    if len(candidatos) == 0:
+        candidatos = np.array([int(np.argmin(sse_grade))])
+    return candidatos[np.argsort(sse_grade.ravel()[candidatos], kind='stable')[:n_melhores]]
+
+def partidas_multiplas(nome_modelo, gd, tau, pesos=None, n_melhores=N_PARTIDAS_REFINADAS, resolucao=None):
+    """
+    Estimativas iniciais (até n_melhores, shape (k, p), melhor primeiro) para Herschel-Bulkley ou Casson,
+    escolhidas numa grade avaliada numa única operação vetorizada. 'resolucao' substitui
+    RESOLUCAO_PARTIDAS[nome_modelo]. tau0 varre [0, 0.98 * min(tau)); n varre LIMITES_N em escala log.
+    """
+    gd, tau = np.asarray(gd, dtype=float), np.asarray(tau, dtype=float)
+    w = _pesos(tau, pesos)
+    resolucao = resolucao or RESOLUCAO_PARTIDAS[nome_modelo]
+    grade_t0 = np.linspace(0.0, 0.98 * np.min(tau), resolucao[-1])
+    if nome_modelo == "Herschel-Bulkley":
+        grade_n = np.geomspace(0.05, LIMITES_N[1], resolucao[0])
+        x = np.exp(np.outer(grade_n, np.log(np.maximum(gd, 1e-9))))[:, None, :]   # (Rn, 1, N)
+        y = (tau - grade_t0[:, None])[None, :, :]                                 # (1, Rt, N)
+        K = np.maximum(np.sum(w * x * y, -1) / np.sum(w * x * x, -1), PARAM_MINIMO)  # (Rn, Rt)
+        sse_grade = np.sum(w * (y - K[..., None] * x)**2, -1)
+        i_n, i_t0 = np.unravel_index(_minimos_locais(sse_grade, n_melhores), sse_grade.shape)
+        return np.column_stack([grade_t0[i_t0], K[i_n, i_t0], grade_n[i_n]])
+    if nome_modelo == "Casson":
+        raiz_gd = np.sqrt(gd)
+        y = np.sqrt(tau) - np.sqrt(grade_t0)[:, None]                            # (Rt, N)
+        # Peso 4*tau leva o resíduo em sqrt(tau) à escala de tau (como em resolver_casson)
+        raiz_eta = np.maximum(np.sum(w * tau * raiz_gd * y, -1) / np.sum(w * tau * raiz_gd**2), np.sqrt(PARAM_MINIMO))
+        tau_grade = (np.sqrt(grade_t0)[:, None] + raiz_eta[:, None] * raiz_gd)**2
+        sse_grade = np.sum(w * (tau_grade - tau)**2, -1)
+        i_t0 = _minimos_locais(sse_grade, n_melhores)
+        return np.column_stack([grade_t0[i_t0], raiz_eta[i_t0]**2])
+    raise ValueError(f"Partidas múltiplas não disponíveis para o modelo {nome_modelo!r}")
+
+# -----------------------------------------------------------------------------
+# --- AJUSTE EM LOTE (LEVENBERG-MARQUARDT VETORIZADO) ---
+# -----------------------------------------------------------------------------
+def empilhar_conjuntos(conjuntos):
+    """
+    Converte uma coleção irregular [(gamma_dot, tau), ...] em arrays preenchidos (B, N_max)
+    e a máscara de pontos válidos (gamma_dot > 0, tau > 0, finitos).
+    """
+    n_max = max((len(gd) for gd, _ in conjuntos), default=0)
+    gd_pad = np.ones((len(conjuntos), n_max))
+    tau_pad = np.ones((len(conjuntos), n_max))
+    mascara = np.zeros((len(conjuntos), n_max), dtype=bool)
+    for i, (gd, tau) in enumerate(conjuntos):
+        gd, tau = np.asarray(gd, dtype=float), np.asarray(tau, dtype=float)
+        gd_pad[i, :len(gd)], tau_pad[i, :len(tau)] = gd, tau
+        mascara[i, :len(gd)] = True
+    return gd_pad, tau_pad, mascara
+
+def _chute_lote(nome_modelo, gd, tau, w):
+    """Estimativas iniciais vetorizadas (forma fechada) para o lote; pontos com w = 0 são ignorados."""
+    if nome_modelo == "Newtoniano":
+        return _mq_afim_nao_negativo(gd, tau, w, com_intercepto=False)[1][:, None]
+    if nome_modelo == "Bingham":
+        t0, ep, _ = _mq_afim_nao_negativo(gd, tau, w)
+        return np.stack([t0, ep], axis=-1)
+    if nome_modelo == "Casson":
+        raiz_t0, raiz_eta, _ = _mq_afim_nao_negativo(np.sqrt(gd), np.sqrt(tau), w * 4 * tau)
+        return np.stack([raiz_t0**2, raiz_eta**2], axis=-1)
+    if nome_modelo not in ("Lei de Potencia", "Herschel-Bulkley"):
+        # Demais modelos do registro: chute de cada conjunto pela rotina do modelo (só pontos com peso)
+        chute = REGISTRO_MODELOS[nome_modelo].guess
+        return np.array([chute(g[p > 0], t[p > 0]) if np.any(p > 0) else chute(g, t) for g, t, p in zip(gd, tau, w)],
+                        dtype=float)
+    # Lei de Potência / HB: regressão log-log (no HB, de tau - tau0 com tau0 = metade da menor tensão)
+    t0 = 0.5 * np.min(np.where(w > 0, tau, np.inf), axis=-1) if nome_modelo == "Herschel-Bulkley" else np.zeros(len(tau))
+    log_gd, log_tau = np.log(gd), np.log(np.maximum(tau - t0[:, None], 1e-9))
+    Sw, Sx, Sy = w.sum(-1), (w * log_gd).sum(-1), (w * log_tau).sum(-1)
+    Sxx, Sxy = (w * log_gd**2).sum(-1), (w * log_gd * log_tau).sum(-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        n = (Sw * Sxy - Sx * Sy) / (Sw * Sxx - Sx**2)
+        log_K = (Sy - n * Sx) / Sw
+    n = np.clip(np.nan_to_num(n, nan=0.5), 0.05, LIMITES_N[1])
+    K = np.exp(np.clip(np.nan_to_num(log_K), -50, 50))
+    return np.stack([K, n], axis=-1) if nome_modelo == "Lei de Potencia" else np.stack([t0, K, n], axis=-1)
+
+def _lm_lote(nome_modelo, gd, tau, w, max_iter=200, tol=1e-10, P0=None):
+    """
+    Levenberg-Marquardt empilhado: todos os conjuntos iteram juntos, cada um com seu próprio lambda.
+    P0 (p,) ou (B, p) substitui as estimativas iniciais de _chute_lote (partida a quente).
+    Retorna (params (B, p), sse (B,), iteracoes (B,), convergiu (B,)).
+    """
+    _, param_names, _, bounds, _ = REGISTRO_MODELOS[nome_modelo]
+    lb, ub = np.asarray(bounds[0], dtype=float), np.asarray(bounds[1], dtype=float)
+    raiz_w = np.sqrt(w)
+    custo = lambda P: np.sum(residuos_lote(nome_modelo, gd, tau, raiz_w, P)**2, axis=-1)
+
+    if P0 is None:
+        P = np.clip(_chute_lote(nome_modelo, gd, tau, w), lb, ub)
+    else:
+        P = np.clip(np.broadcast_to(np.asarray(P0, dtype=float), (len(gd), len(param_names))), lb, ub)
+    sse = custo(P)
+    lam = np.full(len(P), 1e-3)
+    iteracoes = np.zeros(len(P), dtype=int)
+    ativo = np.isfinite(sse)
+    identidade = np.eye(P.shape[1])
+    for _ in range(max_iter):
+        if not ativo.any():
+            break
+        r = residuos_lote(nome_modelo, gd, tau, raiz_w, P)              # (B, N)
+        J = jacobiano_lote(nome_modelo, gd, raiz_w, P)                  # (B, N, p)
+        JtJ = np.einsum('bni,bnj->bij', J, J)
+        Jtr = np.einsum('bni,bn->bi', J, r)
+        diag = np.maximum(np.diagonal(JtJ, axis1=1, axis2=2), 1e-12)
+        A = JtJ + lam[:, None, None] * diag[:, :, None] * identidade
+        # Conjunto ativo: parâmetros no limite com o gradiente empurrando para fora ficam fixos neste passo
+        fixo = ((P <= lb) & (Jtr > 0)) | ((P >= ub) & (Jtr < 0))
+        livre = ~fixo
+        A = A * (livre[:, :, None] & livre[:, None, :]) + fixo[:, :, None] * identidade
+        try:
+            passo = np.linalg.solve(A, np.where(fixo, 0.0, -Jtr)[..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            passo = -Jtr / diag
+        passo = np.where(np.isfinite(passo), passo, 0.0)
+        P_novo = np.clip(P + passo, lb, ub)
+        sse_novo = custo(P_novo)
+
+        aceito = ativo & np.isfinite(sse_novo) & (sse_novo <= sse)
+        reducao = np.where(aceito, (sse - sse_novo) / np.maximum(sse, 1e-300), 0.0)
+        variacao = np.max(np.abs(P_novo - P) / np.maximum(np.abs(P), 1e-12), axis=1)
+        P = np.where(aceito[:, None], P_novo, P)
+        sse = np.where(aceito, sse_novo, sse)
+        lam = np.where(aceito, np.maximum(lam / 3, 1e-12), np.minimum(lam * 4, 1e12))
+        iteracoes += ativo
+        # Para quando a melhora relativa fica desprezível ou lambda satura sem progresso
+        ativo &= ~((aceito & ((reducao < tol) | (variacao < 1e-9))) | (lam >= 1e12) | (sse <= 1e-300))
+    return P, sse, iteracoes, ~ativo
+
+def ajustar_modelos_lote(conjuntos=None, gamma_dot=None, tau_w=None, mascara=None, max_iter=200, modelos=None):
+    """
+    Ajusta os modelos (MODELS, ou a seleção 'modelos', ver selecionar_modelos) a muitos conjuntos de
+    dados de uma vez (LM vetorizado em NumPy).
+
+    Args:
+        conjuntos (list): Coleção irregular [(gamma_dot, tau_w), ...], ou
+        gamma_dot, tau_w (array 2-D): Conjuntos preenchidos (B, N), com 'mascara' (B, N) opcional
+            indicando os pontos válidos de cada linha.
+        max_iter (int): Máximo de iterações LM.
+        modelos: Seleção de modelos do registro (None = MODELS).
+
+    Returns:
+        DataFrame: uma linha por (conjunto, modelo) com 'Conjunto', 'Modelo', 'N', 'R2', 'R2 ajustado',
+            'RMSE', 'SSE', 'AICc', 'Iteracoes', 'Convergiu' e uma coluna por nome de parâmetro (NaN se não se aplica ao modelo).
+    """
+    if conjuntos is not None:
+        gd, tau, mascara = empilhar_conjuntos(conjuntos)
+    else:
+        gd, tau = np.atleast_2d(np.asarray(gamma_dot, dtype=float)), np.atleast_2d(np.asarray(tau_w, dtype=float))
+        mascara = np.ones(gd.shape, dtype=bool) if mascara is None else np.asarray(mascara, dtype=bool)
+    # Mesmo filtro de ajustar_modelos; pontos fora da máscara recebem peso zero e valores neutros
+    mascara = mascara & np.isfinite(gd) & np.isfinite(tau) & (gd > 0) & (tau > 0)
+    gd, tau = np.where(mascara, gd, 1.0), np.where(mascara, tau, 1.0)
+    w = mascara.astype(float)
+    n_pontos = mascara.sum(axis=1)
+    suficiente = n_pontos >= 3
+    w[~suficiente] = 0.0
+
+    selecao = selecionar_modelos(modelos)
+    nomes_params = list(dict.fromkeys(nome for m in selecao.values() for nome in m[1]))
+    tabelas = []
+    for nome_modelo, (_, param_names, _, _, _) in selecao.items():
+        # Conjuntos sem pontos suficientes (peso zero) geram NaN internamente: avisos silenciados
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            P, sse, iteracoes, convergiu = _lm_lote(nome_modelo, gd, tau, w, max_iter=max_iter)
+            # Métricas de todo o lote numa chamada (w é 0/1: os resíduos de residuos_lote já vêm mascarados)
+            tau_pred = tau + residuos_lote(nome_modelo, gd, tau, w, P)
+            metricas = reologia_metricas.metricas_ajuste(tau, tau_pred, len(param_names), mascara=w > 0)
+            aicc = reologia_metricas.criterios_de_sse(sse, n_pontos, len(param_names))['AICc']
+        # Montagem por colunas (uma tabela por modelo); conjuntos com < 3 pontos ficam NaN / não convergidos
+        tabela = {'Conjunto': np.arange(len(P)), 'Modelo': nome_modelo, 'N': n_pontos,
+                  **{nome: np.where(suficiente, metricas[nome], np.nan) for nome in ('R2', 'R2 ajustado', 'RMSE')},
+                  'SSE': np.where(suficiente, sse, np.nan), 'AICc': np.where(suficiente, aicc, np.nan),
+                  'Iteracoes': np.where(suficiente, iteracoes, 0), 'Convergiu': suficiente & convergiu}
+        for nome in nomes_params:
+            tabela[nome] = np.where(suficiente, P[:, param_names.index(nome)], np.nan) if nome in param_names else np.nan
+        tabelas.append(pd.DataFrame(tabela))
+    return pd.concat(tabelas, ignore_index=True)
+
+# -----------------------------------------------------------------------------
+# --- INTERVALOS DE CONFIANÇA POR BOOTSTRAP ---
+# -----------------------------------------------------------------------------
+def _quantis_bca(amostras, estimativa, jackknife, alfas):
+    """
+    Quantis BCa (bias-corrected and accelerated) de 'amostras' (B,) para os níveis 'alfas'.
+    'jackknife' (N,) são as estimativas leave-one-out, usadas para a aceleração.
+    """
+    B = len(amostras)
+    # Empates contam meio: parâmetros presos no limite (ex: tau0 = 0) não geram z0 infinito
+    prop = (np.sum(amostras < estimativa) + 0.5 * np.sum(amostras == estimativa)) / B
+    z0 = ndtri(np.clip(prop, 0.5 / B, 1 - 0.5 / B))
+    desvios = np.mean(jackknife) - jackknife
+    denominador = 6.0 * np.sum(desvios**2)**1.5
+    a = np.sum(desvios**3) / denominador if denominador > 0 else 0.0
+    z = ndtri(np.asarray(alfas))
+    alfas_bca = ndtr(z0 + (z0 + z) / (1 - a * (z0 + z)))
+    return np.quantile(amostras, alfas_bca)
+
+def bootstrap_parametros(gamma_dot, tau_w, n_reamostras=2000, tipo='residuos', nivel=0.95, semente=0,
+                         model_results=None, max_iter=100):
+    """
+    Intervalos de confiança dos parâmetros de todos os modelos por bootstrap.
+
+    Todas as reamostras são geradas de uma vez como uma matriz de índices (n_reamostras, N) com semente
+    fixa (resultado reprodutível) e reajustadas juntas pelo LM vetorizado (_lm_lote), partindo dos
+    parâmetros do ajuste original. A aceleração do BCa vem do jackknife, também ajustado em lote.
+
+    Args:
+        tipo (str): 'residuos' (tau* = tau_ajustado + resíduos centrados reamostrados; gamma_dot fixo) ou
+            'pares' (reamostra os pontos (gamma_dot, tau) inteiros).
+        nivel (float): Nível de confiança dos intervalos.
+        model_results (dict): Resultado de ajustar_modelos (evita reajustar os dados originais).
+
+    Returns:
+        DataFrame: uma linha por (modelo, parâmetro) com 'Valor', 'Erro Padrao', 'IC Percentil Inf/Sup',
+            'IC BCa Inf/Sup' e 'Reamostras' (nº de reajustes válidos).
+    """
+    if tipo not in ('residuos', 'pares'):
+        raise ValueError(f"Tipo de bootstrap inválido: {tipo!r} (use 'residuos' ou 'pares')")
+    gd_fit, tau_fit = _filtrar_dados_ajuste(gamma_dot, tau_w)
+    colunas = ['Modelo', 'Parametro', 'Valor', 'Erro Padrao', 'IC Percentil Inf', 'IC Percentil Sup',
+               'IC BCa Inf', 'IC BCa Sup', 'Reamostras']
+    if len(gd_fit) < 3:
+        print("  AVISO: Pontos insuficientes para bootstrap (mínimo 3).")
+        return pd.DataFrame(columns=colunas)
+    if model_results is None:
+        model_results = ajustar_modelos(gd_fit, tau_fit)[0]
+
+    N = len(gd_fit)
+    indices = np.random.default_rng(semente).integers(0, N, size=(n_reamostras, N))
+    alfas = [(1 - nivel) / 2, (1 + nivel) / 2]
+    # Jackknife: N conjuntos, cada um com um ponto de peso zero
+    w_jack = 1.0 - np.eye(N)
+    gd_jack, tau_jack = np.broadcast_to(gd_fit, (N, N)), np.broadcast_to(tau_fit, (N, N))
+
+    linhas = []
+    for nome_modelo in model_results:
+        func_modelo, param_names, _, _, _ = REGISTRO_MODELOS[nome_modelo]
+        popt = np.asarray(model_results[nome_modelo]['params'], dtype=float)
+        if tipo == 'residuos':
+            tau_ajustado = avaliar_modelo(nome_modelo, gd_fit, popt)
+            # Resíduos centrados (modelos sem intercepto não têm resíduo de média nula) e reescalados por
+            # sqrt(N/(N - p)), compensando a variância subestimada pelos resíduos do ajuste
+            residuos = tau_fit - tau_ajustado
+            residuos = (residuos - residuos.mean()) * np.sqrt(N / max(N - len(popt), 1))
+            gd_b = np.broadcast_to(gd_fit, indices.shape)
+            tau_b = tau_ajustado + residuos[indices]
+        else:
+            gd_b, tau_b = gd_fit[indices], tau_fit[indices]
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            P_b, sse_b, _, _ = _lm_lote(nome_modelo, gd_b, tau_b, np.ones(indices.shape), max_iter=max_iter, P0=popt)
+            P_jack, _, _, _ = _lm_lote(nome_modelo, gd_jack, tau_jack, w_jack, max_iter=max_iter, P0=popt)
+        validas = np.isfinite(sse_b) & np.all(np.isfinite(P_b), axis=1)
+        for j, nome_param in enumerate(param_names):
+            amostras = P_b[validas, j]
+            if len(amostras) < 2:
+                linhas.append([nome_modelo, nome_param, popt[j]] + [np.nan] * 5 + [len(amostras)])
+                continue
+            perc = np.quantile(amostras, alfas)
+            bca = _quantis_bca(amostras, popt[j], P_jack[:, j], alfas)
+            linhas.append([nome_modelo, nome_param, popt[j], np.std(amostras, ddof=1),
+                           perc[0], perc[1], bca[0], bca[1], len(amostras)])
+    return pd.DataFrame(linhas, columns=colunas)
+
+# -----------------------------------------------------------------------------
+# --- EXECUÇÃO PARALELA (POOL DE PROCESSOS) ---
+# -----------------------------------------------------------------------------
+_POOL_PROCESSOS = None
+
+def obter_pool_processos(max_workers=None):
+    """
+    Retorna o ProcessPoolExecutor compartilhado do módulo (criado na primeira chamada e reaproveitado,
+    evitando o custo de iniciar os processos a cada ajuste). É encerrado na saída do interpretador.
+    Scripts que o usam precisam da guarda 'if __name__ == "__main__":' (Windows inicia processos por spawn).
+    """
+    global _POOL_PROCESSOS
+    if _POOL_PROCESSOS is None:
+        _POOL_PROCESSOS = ProcessPoolExecutor(max_workers=max_workers)
+        atexit.register(encerrar_pool_processos)
+    return _POOL_PROCESSOS
+
+def encerrar_pool_processos():
+    global _POOL_PROCESSOS
+    if _POOL_PROCESSOS is not None:
+        _POOL_PROCESSOS.shutdown(wait=True)
+        _POOL_PROCESSOS = None
+
+def _resolver_executor(executor):
+    """executor: None (serial), 'processos' (pool compartilhado) ou uma instância de concurrent.futures.Executor."""
+    if executor is None or isinstance(executor, Executor):
+        return executor
+    if executor == 'processos':
+        return obter_pool_processos()
+    raise ValueError(f"Executor inválido: {executor!r} (use None, 'processos' ou um Executor)")
+
+def _tamanho_bloco(n_tarefas, executor):
+    """Blocos de tarefas por envio: ~4 blocos por processo, para diluir o custo de comunicação."""
+    n_workers = getattr(executor, '_max_workers', None) or os.cpu_count() or 1
+    return max(1, int(np.ceil(n_tarefas / (4 * n_workers))))
+
+# -----------------------------------------------------------------------------
+# --- CRITÉRIOS DE INFORMAÇÃO E SELEÇÃO DO MELHOR MODELO ---
+# -----------------------------------------------------------------------------
+# 'R2' é maximizado; os demais são minimizados. R² sempre favorece o modelo com mais parâmetros
+# (Herschel-Bulkley); AICc penaliza o parâmetro extra e é estável entre réplicas.
+CRITERIOS_SELECAO = ('R2', 'AIC', 'AICc', 'BIC', 'LOO')
+CRITERIO_SELECAO_PADRAO = 'AICc'
+
+def criterios_informacao(nome_modelo, popt, gd_fit, tau_fit, pesos=None):
+    """
+    AIC, AICc, BIC (erro gaussiano; k = nº de parâmetros + 1 pela variância) e o erro de predição
+    leave-one-out 'LOO' (RMSE, Pa), sem reajustes: e_i = r_i / (1 - h_ii), com h a diagonal da matriz
+    chapéu J (J'J)^-1 J'. Exato para modelos lineares; aproximação de 1a ordem para os não lineares.
+    Parâmetros presos em um limite (ex: tau0 = 0) não entram na matriz chapéu.
+    'pesos' (ex: pesos efetivos do ajuste robusto) ponderam resíduos e jacobiano.
+    """
+    bounds = REGISTRO_MODELOS[nome_modelo].bounds
+    popt = np.asarray(popt, dtype=float)
+    n = len(tau_fit)
+    raiz_w = np.ones(n) if pesos is None else np.sqrt(pesos)
+    residuos = raiz_w * (tau_fit - avaliar_modelo(nome_modelo, gd_fit, popt))
+    criterios = reologia_metricas.criterios_de_sse(np.sum(residuos**2), n, len(popt))
+
+    livres = (popt > np.asarray(bounds[0], dtype=float) + 1e-12) & (popt < np.asarray(bounds[1], dtype=float))
+    J = raiz_w[:, None] * np.asarray(jacobiano_modelo(nome_modelo, gd_fit, popt), dtype=float)[:, livres]
+    h = np.zeros(n)
+    if J.shape[1] > 0 and np.all(np.isfinite(J)):
+        U, S, _ = np.linalg.svd(J, full_matrices=False)
+        h = np.sum(U[:, S > S[0] * 1e-10]**2, axis=1)
+    loo = float(np.sqrt(np.mean((residuos / np.maximum(1 - h, 1e-12))**2)))
+    return {**criterios, 'LOO': loo}
+
+def criterio_comparavel(model_results, criterio=CRITERIO_SELECAO_PADRAO):
+    """
+    Critério efetivamente usado na comparação: 'criterio' se for finito para todos os modelos; senão o
+    primeiro de AIC, BIC ou R² que o seja. Comparar só o subconjunto finito (ex: AICc com poucos pontos,
+    infinito justamente para os modelos com mais parâmetros) excluiria esses modelos sem avaliá-los.
+    """
+    if criterio not in CRITERIOS_SELECAO:
+        raise ValueError(f"Critério de seleção inválido: {criterio!r} (use um de {CRITERIOS_SELECAO})")
+    if criterio == 'R2':
+        return criterio
+    for candidato in dict.fromkeys((criterio, 'AIC', 'BIC')):
+        if model_results and all(np.isfinite(r.get(candidato, np.nan)) for r in model_results.values()):
+            return candidato
+    return 'R2'
+
+def selecionar_melhor_modelo(model_results, criterio=CRITERIO_SELECAO_PADRAO):
+    """
+    Nome do melhor modelo segundo 'criterio' (ver CRITERIOS_SELECAO). Se o critério não for finito para
+    todos os modelos, todos são comparados pelo critério de criterio_comparavel.
+    """
+    criterio = criterio_comparavel(model_results, criterio)
+    if criterio != 'R2':
+        valores = {nome: r[criterio] for nome, r in model_results.items()}
+        return min(valores, key=valores.get)
+    valores = {nome: r['R2'] for nome, r in model_results.items() if np.isfinite(r['R2'])}
+    return max(valores, key=valores.get) if valores else ""
+
+# -----------------------------------------------------------------------------
+# --- CACHE DE AJUSTES (MEMÓRIA + ARMAZÉM PERSISTENTE OPCIONAL) ---
+# -----------------------------------------------------------------------------
+VERSAO_CACHE_AJUSTES = 2  # Incrementar quando os solvers mudarem (invalida ajustes persistidos)
+TAMANHO_CACHE_MEMORIA = 256  # Nº de conjuntos mantidos no LRU em memória
+_CACHE_AJUSTES = OrderedDict()
+_ARMAZEM_AJUSTES = None
+
+def ativar_cache_persistente(pasta=None, limite_mb=20):
+    """
+    Ativa a gravação dos ajustes em disco ('<CACHE_FOLDER>/ajustes' por padrão), para que scripts
+    diferentes (ex: 2.Analise e 2c) reaproveitem os ajustes um do outro. O armazém é podado por tamanho.
+    """
+    global _ARMAZEM_AJUSTES
+    import reologia_cache
+    pasta = pasta or os.path.join(reologia_cache.PASTA_CACHE_PADRAO, "ajustes")
+    _ARMAZEM_AJUSTES = reologia_cache.ArmazemLimitado(pasta, int(limite_mb * 1024**2))
+    return _ARMAZEM_AJUSTES
+
+def limpar_cache_ajustes(desativar_persistente=False):
+    """Esvazia o LRU em memória (e, opcionalmente, desativa o armazém persistente)."""
+    global _ARMAZEM_AJUSTES
+    _CACHE_AJUSTES.clear()
+    if desativar_persistente:
+        _ARMAZEM_AJUSTES = None
+
+def chave_ajuste(gd_fit, tau_fit, metodo, perda='linear', f_escala=None, modelos=None, ponderacao='absoluta', pesos=None):
+    """
+    Digest (BLAKE2b) dos bytes de (gamma_dot, tau_w, pesos), do conjunto de modelos e das opções do ajuste.
+    O critério de seleção não entra: os parâmetros ajustados não dependem dele (ver _consultar_cache).
+    """
+    h = hashlib.blake2b(digest_size=16)
+    modelos = [(nome, tuple(param_names)) for nome, (_, param_names, _, _, _) in selecionar_modelos(modelos).items()]
+    h.update(repr((VERSAO_CACHE_AJUSTES, metodo, perda, f_escala, modelos, ponderacao, pesos is None,
+                   len(gd_fit))).encode('utf-8'))
+    h.update(np.ascontiguousarray(gd_fit, dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(tau_fit, dtype=np.float64).tobytes())
+    if pesos is not None:
+        h.update(np.ascontiguousarray(pesos, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+def _consultar_cache(chave, gd_fit, tau_fit, criterio=CRITERIO_SELECAO_PADRAO, perda='linear', f_escala=None,
+                     pesos=None):
+    """
+    Retorna o resultado (model_results, best_model_nome, df_sum_modelo, falhas) de um ajuste anterior, ou None.
+    Os critérios de todos os modelos já estão em model_results: só a escolha e a ordem seguem 'criterio'.
+    """
+    if chave in _CACHE_AJUSTES:
+        _CACHE_AJUSTES.move_to_end(chave)
+        model_results, _, df_sum_modelo, falhas = _CACHE_AJUSTES[chave]
+        return (model_results, *_selecionar_e_ordenar(model_results, df_sum_modelo, criterio), falhas)
+    if _ARMAZEM_AJUSTES is not None:
+        dados = _ARMAZEM_AJUSTES.carregar(chave)
+        if isinstance(dados, dict):
+            # Ajustes que falharam são gravados como o texto do motivo (None em itens antigos)
+            falhou = {nome: popt is None or isinstance(popt, str) for nome, popt in dados.items()}
+            ajustes = {nome: (None if falhou[nome] else np.asarray(popt, dtype=float)) for nome, popt in dados.items()}
+            diagnosticos = {nome: {**DIAGNOSTICO_CACHE, 'status': 'falhou', 'motivo_falha': dados[nome]}
+                            for nome in dados if falhou[nome]}
+            resultado = _montar_resultados(ajustes, gd_fit, tau_fit, criterio, perda, f_escala, pesos, diagnosticos)
+            _guardar_em_memoria(chave, resultado)
+            return resultado
+    return None
+
+def _guardar_em_memoria(chave, resultado):
+    _CACHE_AJUSTES[chave] = resultado
+    _CACHE_AJUSTES.move_to_end(chave)
+    while len(_CACHE_AJUSTES) > TAMANHO_CACHE_MEMORIA:
+        _CACHE_AJUSTES.popitem(last=False)
+
+def _registrar_cache(chave, ajustes, resultado):
+    _guardar_em_memoria(chave, resultado)
+    if _ARMAZEM_AJUSTES is not None:
+        falhas = resultado[3]
+        _ARMAZEM_AJUSTES.salvar(chave, {nome: (falhas[nome]['motivo_falha'] if popt is None else popt)
+                                        for nome, popt in ajustes.items()})
+
+def _copiar_resultado(resultado):
+    """Cópia independente do resultado guardado (alterações feitas pelo chamador não contaminam o cache)."""
+    model_results, best_model_nome, df_sum_modelo, falhas = resultado
+    copia = {nome: {chave: (v.copy() if isinstance(v, (np.ndarray, dict)) else v) for chave, v in r.items()}
+             for nome, r in model_results.items()}
+    return copia, best_model_nome, df_sum_modelo.copy(), {nome: dict(d) for nome, d in falhas.items()}
+
+# -----------------------------------------------------------------------------
+# --- AJUSTE DE MODELOS ---
+# -----------------------------------------------------------------------------
+def _mascara_valida(gamma_dot, tau_w):
+    """Pontos válidos para ajuste (gamma_dot > 0, tau_w > 0, sem NaN)."""
+    return (gamma_dot > 0) & (tau_w > 0) & ~np.isnan(gamma_dot) & ~np.isnan(tau_w)
+
+def _filtrar_dados_ajuste(gamma_dot, tau_w):
+    """Filtra dados válidos para ajuste (gamma_dot > 0, tau_w > 0, sem NaN)."""
+    gamma_dot, tau_w = np.asarray(gamma_dot, dtype=float), np.asarray(tau_w, dtype=float)
+    valid_fit = _mascara_valida(gamma_dot, tau_w)
+    return gamma_dot[valid_fit], tau_w[valid_fit]
+
+# -----------------------------------------------------------------------------
+# --- AJUSTE ROBUSTO (PERDAS HUBER / SOFT-L1 / CAUCHY) ---
+# -----------------------------------------------------------------------------
+PERDAS_ROBUSTAS = ('huber', 'soft_l1', 'cauchy')  # Repassadas a scipy.optimize.least_squares(loss=...)
+LIMITE_OUTLIER_ROBUSTO = 3.0  # Ponto marcado como outlier se |resíduo| > LIMITE * f_escala
+
+def escala_robusta(residuos):
+    """Escala robusta dos resíduos: 1.4826 * MAD (igual ao desvio padrão para erro gaussiano)."""
+    residuos = np.asarray(residuos, dtype=float)
+    escala = 1.4826 * np.median(np.abs(residuos - np.median(residuos)))
+    return float(escala) if escala > 0 else float(max(np.std(residuos), 1e-12))
+
+def pesos_robustos(residuos, perda, f_escala):
+    """Peso efetivo de cada ponto no ajuste robusto (rho'(z), z = (r / f_escala)^2); 1 = peso integral."""
+    z = (np.asarray(residuos, dtype=float) / f_escala)**2
+    if perda == 'huber':
+        return np.where(z <= 1, 1.0, 1.0 / np.sqrt(np.maximum(z, 1.0)))
+    if perda == 'soft_l1':
+        return 1.0 / np.sqrt(1.0 + z)
+    if perda == 'cauchy':
+        return 1.0 / (1.0 + z)
+    return np.ones_like(z)
+
+def _ajuste_robusto(nome_modelo, gd_fit, tau_fit, p0, perda, f_escala=None):
+    """
+    Refina p0 (ajuste de mínimos quadrados) com perda robusta. Sem f_escala, usa a escala robusta
+    dos resíduos de p0, para que pontos a mais de ~1 desvio típico passem a pesar menos. Retorna o OptimizeResult.
+    """
+    bounds = REGISTRO_MODELOS[nome_modelo].bounds
+    if f_escala is None:
+        f_escala = escala_robusta(tau_fit - avaliar_modelo(nome_modelo, gd_fit, p0))
+    return least_squares(lambda p: residuos_modelo(nome_modelo, gd_fit, tau_fit, p), np.clip(p0, bounds[0], bounds[1]),
+                         jac=lambda p: jacobiano_modelo(nome_modelo, gd_fit, p), bounds=bounds, loss=perda, f_scale=f_escala,
+                         method='trf')
+
+def _diagnostico_robusto(nome_modelo, popt, gd_fit, tau_fit, perda, f_escala=None):
+    """Pesos por ponto, sinalização de outliers e a escala usada (f_escala ou a escala robusta final)."""
+    residuos = tau_fit - REGISTRO_MODELOS[nome_modelo][0](gd_fit, *popt)
+    f = f_escala if f_escala is not None else escala_robusta(residuos)
+    return {'pesos': pesos_robustos(residuos, perda, f), 'outliers': np.abs(residuos) > LIMITE_OUTLIER_ROBUSTO * f,
+            'f_escala': f}
+
+def _expandir_por_ponto(resultado, valid_fit):
+    """Realinha 'pesos' / 'outliers' (calculados nos pontos válidos) ao tamanho da entrada original."""
+    for r in resultado[0].values():
+        if 'pesos' in r:
+            pesos, outliers = np.full(len(valid_fit), np.nan), np.zeros(len(valid_fit), dtype=bool)
+            pesos[valid_fit], outliers[valid_fit] = r['pesos'], r['outliers']
+            r['pesos'], r['outliers'] = pesos, outliers
+    return resultado
+
+# -----------------------------------------------------------------------------
+# --- PONDERAÇÃO DOS RESÍDUOS (RELATIVA / LOG / SIGMA) ---
+# -----------------------------------------------------------------------------
+# Em curvas que cobrem várias décadas de taxa, os resíduos absolutos dos pontos de maior tensão dominam o
+# ajuste. 'relativa' minimiza sum(((f - tau) / tau)^2) (mínimos quadrados ponderados, w = 1/tau^2); 'log'
+# minimiza sum((ln f - ln tau)^2), com jacobiano J / f, partindo do ajuste relativo (equivalente em 1a ordem).
+# Com 'sigma' (incerteza de cada ponto, ex: das réplicas no 2b) os resíduos absolutos são divididos por sigma.
+PONDERACOES = ('absoluta', 'relativa', 'log')
+
+def pesos_ponderacao(tau_fit, ponderacao='absoluta', sigma=None):
+    """Pesos w = 1/sigma^2 dos mínimos quadrados para a ponderação (None = pesos iguais)."""
+    if sigma is not None:
+        return 1.0 / np.asarray(sigma, dtype=float)**2
+    if ponderacao in ('relativa', 'log'):
+        return 1.0 / np.asarray(tau_fit, dtype=float)**2
+    return None
+
+def sigma_de_replicas(tau_medio, tau_desvio, n_replicas=None):
+    """
+    Incerteza (Pa) de cada tensão média a partir das réplicas: desvio padrão / sqrt(n). Pontos sem
+    dispersão estimável (réplica única, desvio 0 ou NaN) recebem o coeficiente de variação mediano dos demais.
+    """
+    tau_medio = np.asarray(tau_medio, dtype=float)
+    sigma = np.asarray(tau_desvio, dtype=float)
+    if n_replicas is not None:
+        sigma = sigma / np.sqrt(np.maximum(np.asarray(n_replicas, dtype=float), 1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cv = sigma / np.abs(tau_medio)
+    estimavel = np.isfinite(cv) & (cv > 0)
+    cv_tipico = np.median(cv[estimavel]) if estimavel.any() else 1.0
+    return np.where(estimavel, sigma, cv_tipico * np.abs(tau_medio))
+
+def _refinar_log(nome_modelo, gd_fit, tau_fit, p0):
+    """Mínimos quadrados em ln(tau) a partir de p0 (retorna o OptimizeResult); o jacobiano de ln f é J / f."""
+    bounds = REGISTRO_MODELOS[nome_modelo].bounds
+    log_tau = np.log(tau_fit)
+    def residuos(p):
+        return np.log(np.maximum(avaliar_modelo(nome_modelo, gd_fit, p), 1e-300)) - log_tau
+    def jacobiano(p):
+        f = np.maximum(avaliar_modelo(nome_modelo, gd_fit, p), 1e-300)
+        return jacobiano_modelo(nome_modelo, gd_fit, p) / f[:, None]
+    return least_squares(residuos, np.clip(p0, bounds[0], bounds[1]), jac=jacobiano, bounds=bounds, method='trf')
+
+# -----------------------------------------------------------------------------
+# --- DIAGNÓSTICO E DESEMPENHO DOS AJUSTES ---
+# -----------------------------------------------------------------------------
+# Cada entrada de model_results traz 'diagnostico' com:
+#   status        'ok', 'limite_iteracoes' (LM aceito sem convergir) ou 'cache' (reconstruído de ajuste gravado)
+#   solver        'lm', 'direto', 'curve_fit' ou 'downdate', com sufixos '+log' / '+robusto' dos refinamentos
+#   nfev          avaliações do modelo pelo otimizador iterativo (0 nos solvers em forma fechada)
+#   tempo_s       tempo de parede do ajuste do modelo
+#   motivo_falha  None; modelos que falham não entram em model_results: seu diagnóstico (status 'falhou' e
+#                 'motivo_falha' = "TipoDaExceção: mensagem") vem no dict 'falhas' (ajustar_modelos(..., retornar_falhas=True))
+#   limites_ativos, cond_jacobiano  ver diagnostico_numerico
+# Todos os ajustes executados (não os lidos do cache) somam-se ao resumo agregado por modelo.
+_DESEMPENHO_AJUSTES = {}
+DIAGNOSTICO_CACHE = {'status': 'cache', 'solver': None, 'nfev': 0, 'tempo_s': 0.0, 'motivo_falha': None}
+
+def diagnostico_numerico(nome_modelo, popt, gd_fit, pesos=None):
+    """
+    Parâmetros presos em um limite ('limites_ativos', nomes) e número de condição do jacobiano
+    (ponderado) na solução ('cond_jacobiano'; inf se singular). Condição alta indica parâmetros mal
+    determinados pelos dados (ex: n e K do Herschel-Bulkley numa faixa estreita de taxas).
+    """
+    _, param_names, _, bounds, _ = REGISTRO_MODELOS[nome_modelo]
+    popt = np.asarray(popt, dtype=float)
+    lb, ub = np.asarray(bounds[0], dtype=float), np.asarray(bounds[1], dtype=float)
+    folga = 1e-12 * np.maximum(np.abs(popt), 1)
+    no_limite = (popt - lb <= folga) | (ub - popt <= folga)
+    J = np.asarray(jacobiano_modelo(nome_modelo, gd_fit, popt), dtype=float)
+    if pesos is not None:
+        J = np.sqrt(pesos)[:, None] * J
+    cond = np.inf
+    if np.all(np.isfinite(J)):
+        S = np.linalg.svd(J, compute_uv=False)
+        cond = float(S[0] / S[-1]) if S[-1] > 0 else np.inf
+    return {'limites_ativos': [nome for nome, preso in zip(param_names, no_limite) if preso], 'cond_jacobiano': cond}
+
+def _registrar_desempenho(nome_modelo, diagnostico):
+    estat = _DESEMPENHO_AJUSTES.setdefault(nome_modelo, {'Ajustes': 0, 'Falhas': 0, 'Sem convergencia': 0,
+                                                         'Tempo total (s)': 0.0, 'Tempo max. (ms)': 0.0, 'nfev': 0,
+                                                         'Ultima falha': None})
+    estat['Ajustes'] += 1
+    estat['Falhas'] += diagnostico['status'] == 'falhou'
+    estat['Sem convergencia'] += diagnostico['status'] == 'limite_iteracoes'
+    estat['Tempo total (s)'] += diagnostico['tempo_s']
+    estat['Tempo max. (ms)'] = max(estat['Tempo max. (ms)'], diagnostico['tempo_s'] * 1e3)
+    estat['nfev'] += diagnostico['nfev']
+    if diagnostico['motivo_falha']:
+        estat['Ultima falha'] = diagnostico['motivo_falha']
+
+def resumo_desempenho_ajustes():
+    """
+    DataFrame com o desempenho agregado, por modelo, de todos os ajustes executados no processo desde o
+    início (ou desde zerar_desempenho_ajustes): nº de ajustes, falhas, LM sem convergência, tempos total,
+    médio e máximo, nfev médio e o motivo da última falha. Ajustes feitos em processos do pool entram
+    pelo diagnóstico devolvido, então o resumo também cobre a execução paralela.
+    """
+    linhas = []
+    for nome, estat in _DESEMPENHO_AJUSTES.items():
+        n = max(estat['Ajustes'], 1)
+        linhas.append({'Modelo': nome, **{k: v for k, v in estat.items() if k not in ('nfev', 'Ultima falha')},
+                       'Tempo medio (ms)': estat['Tempo total (s)'] / n * 1e3, 'nfev medio': estat['nfev'] / n,
+                       'Ultima falha': estat['Ultima falha']})
+    return pd.DataFrame(linhas)
+
+def zerar_desempenho_ajustes():
+    _DESEMPENHO_AJUSTES.clear()
+
+def _curve_fit_partidas(nome_modelo, gd_fit, tau_fit, partidas, pesos=None, maxfev=10000):
+    """
+    curve_fit a partir de cada estimativa em 'partidas' (melhor primeiro); retorna (popt de menor SSE
+    ponderado, nfev somado). Partidas cujo SSE inicial já não supera o melhor ajuste refinado são puladas.
+    Se todas as partidas falharem, propaga a exceção da última.
+    """
+    bounds = REGISTRO_MODELOS[nome_modelo].bounds
+    w = _pesos(tau_fit, pesos)
+    sigma = None if pesos is None else 1.0 / np.sqrt(pesos)
+    sse = lambda p: np.sum(w * residuos_modelo(nome_modelo, gd_fit, tau_fit, p)**2)
+    melhor, sse_melhor, nfev, erro = None, np.inf, 0, None
+    for p0 in partidas:
+        if melhor is not None and sse(np.clip(p0, bounds[0], bounds[1])) >= sse_melhor:
+            continue
+        try:
+            # Ajuste com limites (bounds) para garantir parâmetros físicos; jacobiano analítico evita diferenças finitas
+            popt, _, info, _, _ = curve_fit(lambda x, *p: avaliar_modelo(nome_modelo, x, p), gd_fit, tau_fit,
+                                            p0=np.clip(p0, bounds[0], bounds[1]), bounds=bounds,
+                                            jac=lambda x, *p: jacobiano_modelo(nome_modelo, x, p), maxfev=maxfev,
+                                            sigma=sigma, full_output=True)
+        except (RuntimeError, ValueError) as e:
+            erro = e
+            continue
+        nfev += int(info['nfev'])
+        sse_popt = sse(popt)
+        if sse_popt < sse_melhor:
+            melhor, sse_melhor = popt, sse_popt
+    if melhor is None:
+        raise erro
+    return melhor, nfev
+
+def _ajustar_um_modelo(nome_modelo, gd_fit, tau_fit, metodo='direto', p0=None, perda='linear', f_escala=None,
+                       ponderacao='absoluta', pesos=None, diagnostico=None):
     """
-    Ajusta todos os modelos reológicos disponíveis aos dados fornecidos.
+    Ajusta um único modelo do registro, partindo de p0 se fornecido (partida a quente).
+    'pesos' (ver pesos_ponderacao) ponderam os mínimos quadrados; com ponderacao='log' o resultado é
+    refinado em ln(tau). Com perda robusta, o ajuste de mínimos quadrados é refinado por _ajuste_robusto.
+    Retorna os parâmetros (array) ou None se o ajuste falhar. Se 'diagnostico' (dict) for dado, recebe
+    'status', 'solver', 'nfev', 'tempo_s' e 'motivo_falha' (ver a seção DIAGNÓSTICO E DESEMPENHO).
+    """
+    _, _, initial_guess_func, bounds, _ = REGISTRO_MODELOS[nome_modelo]
+    diag = {'status': 'ok', 'solver': None, 'nfev': 0, 'tempo_s': 0.0, 'motivo_falha': None}
+    t0 = time.perf_counter()
+    popt = None
+    try:
+        sem_solver = nome_modelo not in SOLVERS_DIRETOS
+        if metodo == 'direto' and ((p0 is not None and nome_modelo not in MODELOS_LINEARES) or sem_solver):
+            # Partida a quente: poucas iterações de LM a partir do ajuste anterior, no lugar da busca global.
+            # Modelos sem solver dedicado também usam o LM (jacobiano analítico, nº de iterações limitado):
+            # em dados que o modelo não descreve (parâmetros degenerando) o LM esgota as iterações com o
+            # mesmo SSE que o curve_fit atingiria só após milhares de avaliações, então o resultado é aceito
+            w = np.ones((1, len(gd_fit))) if pesos is None else pesos[None]
+            P, sse, iteracoes, convergiu = _lm_lote(nome_modelo, gd_fit[None], tau_fit[None], w, P0=p0)
+            diag['nfev'] += 2 * int(iteracoes[0]) + 1  # Resíduos + jacobiano por iteração, mais o custo inicial
+            if (convergiu[0] or sem_solver) and np.isfinite(sse[0]) and np.all(np.isfinite(P[0])):
+                popt, diag['solver'] = P[0], 'lm'
+                if not convergiu[0]:
+                    diag['status'] = 'limite_iteracoes'
+        if popt is None and metodo == 'direto' and not sem_solver:
+            popt, diag['solver'] = SOLVERS_DIRETOS[nome_modelo](gd_fit, tau_fit, pesos), 'direto'
+            if not np.all(np.isfinite(popt)): popt = None
+        if popt is None:
+            diag['solver'] = 'curve_fit'
+            if p0 is None and nome_modelo in RESOLUCAO_PARTIDAS:
+                # Busca global em grade: refina só os melhores pontos de partida, com maxfev menor cada
+                partidas, maxfev = partidas_multiplas(nome_modelo, gd_fit, tau_fit, pesos), MAXFEV_PARTIDA
+                diag['solver'] = 'grade+curve_fit'
+            else:
+                partidas = [initial_guess_func(gd_fit, tau_fit) if p0 is None else np.clip(p0, bounds[0], bounds[1])]
+                maxfev = 10000
+            popt, nfev = _curve_fit_partidas(nome_modelo, gd_fit, tau_fit, partidas, pesos, maxfev)
+            diag['nfev'] += nfev
+        if ponderacao == 'log':
+            res = _refinar_log(nome_modelo, gd_fit, tau_fit, popt)
+            popt, diag['solver'], diag['nfev'] = res.x, diag['solver'] + '+log', diag['nfev'] + int(res.nfev)
+        if perda != 'linear':
+            res = _ajuste_robusto(nome_modelo, gd_fit, tau_fit, popt, perda, f_escala)
+            popt, diag['solver'], diag['nfev'] = res.x, diag['solver'] + '+robusto', diag['nfev'] + int(res.nfev)
+    except Exception as e:
+        # Falhas pontuais em um modelo não devem parar o processo; o motivo fica no diagnóstico
+        popt = None
+        diag['status'], diag['motivo_falha'] = 'falhou', f"{type(e).__name__}: {e}"
+    diag['tempo_s'] = time.perf_counter() - t0
+    if diagnostico is not None:
+        diagnostico.update(diag)
+    return popt
+
+def _executar_tarefa_ajuste(tarefa):
+    indice, nome_modelo, gd_fit, tau_fit, metodo, p0, perda, f_escala, ponderacao, pesos = tarefa
+    diagnostico = {}
+    popt = _ajustar_um_modelo(nome_modelo, gd_fit, tau_fit, metodo, p0, perda, f_escala, ponderacao, pesos, diagnostico)
+    return indice, nome_modelo, popt, diagnostico
+
+def _montar_resultados(ajustes, gd_fit, tau_fit, criterio=CRITERIO_SELECAO_PADRAO, perda='linear', f_escala=None,
+                       pesos=None, diagnosticos=None):
+    """
+    Monta (model_results, best_model_nome, df_sum_modelo, falhas) a partir de {nome_modelo: popt}; 'falhas'
+    traz o diagnóstico dos modelos cujo popt é None.
+    Os critérios de seleção usam os mesmos pesos do ajuste; o R² é sempre o das tensões, sem ponderação.
+    'diagnosticos' ({nome_modelo: dict} de _ajustar_um_modelo) vão para model_results[nome]['diagnostico'];
+    sem eles (ajustes lidos do armazém persistente), o diagnóstico fica com status 'cache'.
+    """
+    model_results, falhas = {}, {}
+    summary_list = []
+    diagnosticos = diagnosticos or {}
+
+    for nome_modelo, popt in ajustes.items():
+        if popt is None:
+            falhas[nome_modelo] = dict(diagnosticos.get(nome_modelo) or {**DIAGNOSTICO_CACHE, 'status': 'falhou'})
+            print(f"  AVISO: Falha ao ajustar {nome_modelo}: {falhas[nome_modelo]['motivo_falha'] or 'motivo não registrado'}")
+            continue
+        param_names = REGISTRO_MODELOS[nome_modelo].param_names
+        tau_pred = avaliar_modelo(nome_modelo, gd_fit, popt)
+        r2 = reologia_metricas.r2(tau_fit, tau_pred)
+        # No modo robusto, os critérios usam os pesos efetivos (outliers não decidem o melhor modelo)
+        robusto = _diagnostico_robusto(nome_modelo, popt, gd_fit, tau_fit, perda, f_escala) if perda != 'linear' else {}
+        criterios = criterios_informacao(nome_modelo, popt, gd_fit, tau_fit, robusto.get('pesos', pesos))
+        diagnostico = dict(diagnosticos.get(nome_modelo) or DIAGNOSTICO_CACHE)
+        diagnostico.update(diagnostico_numerico(nome_modelo, popt, gd_fit, robusto.get('pesos', pesos)))
+
+        model_results[nome_modelo] = {'params': popt, 'R2': r2, **criterios, **robusto, 'diagnostico': diagnostico}
+        
+        # Formata parâmetros para o resumo
+        params_str = ", ".join([f"{n}={v:.4g}" for n, v in zip(param_names, popt)])
+        summary_list.append({'Modelo': nome_modelo, 'R2': r2, 'AICc': criterios['AICc'], 'BIC': criterios['BIC'],
+                             'LOO RMSE': criterios['LOO'], 'Parametros': params_str})
+
+    best_model_nome, df_sum_modelo = _selecionar_e_ordenar(model_results, pd.DataFrame(summary_list), criterio)
+    return model_results, best_model_nome, df_sum_modelo, falhas
+
+def _selecionar_e_ordenar(model_results, df_sum_modelo, criterio):
+    """(best_model_nome, df_sum_modelo ordenado pelo critério efetivamente usado na seleção, melhor primeiro)."""
+    best_model_nome = selecionar_melhor_modelo(model_results, criterio)
+    criterio_usado = criterio_comparavel(model_results, criterio)
+    if criterio_usado != criterio:
+        print(f"  AVISO: {criterio} indefinido para algum modelo (poucos pontos); modelos comparados por {criterio_usado}.")
+    if not df_sum_modelo.empty:
+        if criterio_usado == 'R2':
+            ordem = np.argsort(-df_sum_modelo['R2'].to_numpy(), kind='stable')
+        else:
+            ordem = np.argsort([model_results[nome][criterio_usado] for nome in df_sum_modelo['Modelo']], kind='stable')
+        df_sum_modelo = df_sum_modelo.iloc[ordem]
+    return best_model_nome, df_sum_modelo
+
+def ajustar_modelos(gamma_dot, tau_w, metodo='direto', executor=None, usar_cache=True, params_iniciais=None,
+                    criterio=CRITERIO_SELECAO_PADRAO, perda='linear', f_escala=None, modelos=None,
+                    ponderacao='absoluta', sigma=None, retornar_falhas=False):
+    """
+    Ajusta os modelos reológicos aos dados fornecidos.
     
     Args:
         gamma_dot (array): Taxa de cisalhamento (s-1).
         tau_w (array): Tensão de cisalhamento (Pa).
+        metodo (str): 'direto' usa os solvers de SOLVERS_DIRETOS (forma fechada / projeção de variáveis),
+            com curve_fit como reserva; 'curve_fit' usa apenas o ajuste não linear genérico.
+        executor: None (serial), 'processos' (pool compartilhado, ver obter_pool_processos) ou um
+            concurrent.futures.Executor. Os modelos são ajustados em paralelo; o resultado é idêntico ao serial.
+        usar_cache (bool): Reaproveita ajustes anteriores dos mesmos dados (LRU em memória e, se ativado
+            com ativar_cache_persistente, o armazém em disco).
+        params_iniciais (dict): {nome_modelo: params} de um ajuste anterior (ex: antes de remover pontos),
+            usados como partida a quente. Ajustes com partida a quente não passam pelo cache.
+        criterio (str): Política de escolha do melhor modelo: 'AICc' (padrão), 'AIC', 'BIC', 'LOO' ou 'R2'.
+        perda (str): 'linear' (mínimos quadrados) ou uma perda robusta de PERDAS_ROBUSTAS ('huber',
+            'soft_l1', 'cauchy'), que reduz o peso dos outliers num único ajuste, sem rodadas de filtragem.
+        f_escala (float): Escala (Pa) a partir da qual o resíduo é tratado como outlier pela perda robusta;
+            None estima 1.4826 * MAD dos resíduos de cada modelo.
+        modelos: Modelos comparados: None (MODELS, os cinco clássicos), 'todos' (REGISTRO_MODELOS, inclui
+            Sisko, Cross, Carreau-Yasuda, Ellis, Robertson-Stiff e Mizrahi-Berk) ou uma lista de nomes.
+        ponderacao (str): Resíduos minimizados: 'absoluta' (tau, padrão), 'relativa' ((f - tau) / tau) ou
+            'log' (ln f - ln tau). As duas últimas equilibram curvas que cobrem várias décadas de taxa.
+        sigma (array): Incerteza de cada ponto (Pa, mesmo tamanho da entrada; ex: sigma_de_replicas); os
+            resíduos absolutos são divididos por sigma. Não se combina com 'relativa'/'log' nem com perda robusta.
+        retornar_falhas (bool): Acrescenta ao retorno 'falhas', {nome_modelo: diagnostico} dos modelos cujo
+            ajuste falhou (e que por isso não estão em model_results), com o motivo em 'motivo_falha'.
         
     Returns:
         tuple: (model_results, best_model_nome, df_sum_modelo)
-            - model_results: Dicionário com params e R2 de cada modelo.
-            - best_model_nome: Nome do modelo com maior R2.
-            - df_sum_modelo: DataFrame com resumo dos ajustes.
+            - model_results: Dicionário com params, R2, AIC, AICc, BIC e LOO de cada modelo. Com perda
+              robusta, também 'pesos' (peso efetivo de cada ponto, NaN nos pontos inválidos), 'outliers'
+              (bool, |resíduo| > LIMITE_OUTLIER_ROBUSTO * f_escala) e 'f_escala', alinhados à entrada.
+            - best_model_nome: Nome do melhor modelo segundo 'criterio'.
+            - df_sum_modelo: DataFrame com resumo dos ajustes (melhor primeiro).
     """
-    model_results = {}
-    best_model_nome = ""
-    best_r2 = -np.inf
-    summary_list = []
-    
-    # Filtra dados válidos para ajuste
-    valid_fit = (gamma_dot > 0) & (tau_w > 0) & ~np.isnan(gamma_dot) & ~np.isnan(tau_w)
-    gd_fit = gamma_dot[valid_fit]
-    tau_fit = tau_w[valid_fit]
+    resultado = _ajustar_modelos(gamma_dot, tau_w, metodo, executor, usar_cache, params_iniciais, criterio, perda,
+                                 f_escala, modelos, ponderacao, sigma)
+    return resultado if retornar_falhas else resultado[:3]
+
+def _ajustar_modelos(gamma_dot, tau_w, metodo, executor, usar_cache, params_iniciais, criterio, perda, f_escala,
+                     modelos, ponderacao, sigma):
+    """Corpo de ajustar_modelos; retorna sempre (model_results, best_model_nome, df_sum_modelo, falhas)."""
+    if perda != 'linear' and perda not in PERDAS_ROBUSTAS:
+        raise ValueError(f"Perda inválida: {perda!r} (use 'linear' ou um de {PERDAS_ROBUSTAS})")
+    if ponderacao not in PONDERACOES:
+        raise ValueError(f"Ponderação inválida: {ponderacao!r} (use um de {PONDERACOES})")
+    if sigma is not None and ponderacao != 'absoluta':
+        raise ValueError("sigma já define a ponderação: use ponderacao='absoluta' junto com sigma")
+    if perda != 'linear' and (ponderacao != 'absoluta' or sigma is not None):
+        raise ValueError("Perda robusta não se combina com ponderação relativa/log ou sigma")
+    nomes_modelos = list(selecionar_modelos(modelos))
+    gd_fit, tau_fit = _filtrar_dados_ajuste(gamma_dot, tau_w)
     
     if len(gd_fit) < 3:
         print("  AVISO: Pontos insuficientes para ajuste de modelos (mínimo 3).")
-        return {}, "", pd.DataFrame()
+        return {}, "", pd.DataFrame(), {}
 
-    for nome_modelo, (func_modelo, param_names, initial_guess_func, bounds) in MODELS.items():
-        try:
-            p0 = initial_guess_func(gd_fit, tau_fit)
-            # Ajuste com limites (bounds) para garantir parâmetros físicos
-            popt, pcov = curve_fit(func_modelo, gd_fit, tau_fit, p0=p0, bounds=bounds, maxfev=10000)
-            
-            tau_pred = func_modelo(gd_fit, *popt)
-            r2 = r2_score(tau_fit, tau_pred)
-            
-            model_results[nome_modelo] = {'params': popt, 'R2': r2}
-            
-            # Formata parâmetros para o resumo
-            params_str = ", ".join([f"{n}={v:.4g}" for n, v in zip(param_names, popt)])
-            summary_list.append({'Modelo': nome_modelo, 'R2': r2, 'Parametros': params_str})
-            
-            if r2 > best_r2:
-                best_r2 = r2
-                best_model_nome = nome_modelo
-                
-        except Exception as e:
-            # Falhas pontuais em um modelo não devem parar o processo
-            # print(f"  Falha ao ajustar {nome_modelo}: {e}") 
-            pass
-
-    df_sum_modelo = pd.DataFrame(summary_list).sort_values(by='R2', ascending=False)
-    
-    return model_results, best_model_nome, df_sum_modelo
+    opcoes_robustas = (perda, f_escala)
+    valid_fit = _mascara_valida(np.asarray(gamma_dot, dtype=float), np.asarray(tau_w, dtype=float))
+    sigma_fit = None if sigma is None else np.asarray(sigma, dtype=float)[valid_fit]
+    if sigma_fit is not None and not np.all(np.isfinite(sigma_fit) & (sigma_fit > 0)):
+        raise ValueError("sigma deve ser positivo e finito em todos os pontos válidos")
+    pesos = pesos_ponderacao(tau_fit, ponderacao, sigma_fit)
+    params_iniciais = params_iniciais or {}
+    usar_cache = usar_cache and not params_iniciais
+    if usar_cache:
+        chave = chave_ajuste(gd_fit, tau_fit, metodo, *opcoes_robustas, nomes_modelos, ponderacao, pesos)
+        resultado = _consultar_cache(chave, gd_fit, tau_fit, criterio, *opcoes_robustas, pesos)
+        if resultado is not None:
+            return _expandir_por_ponto(_copiar_resultado(resultado), valid_fit)
+
+    executor = _resolver_executor(executor)
+    tarefas = [(0, nome, gd_fit, tau_fit, metodo, params_iniciais.get(nome)) + opcoes_robustas + (ponderacao, pesos)
+               for nome in nomes_modelos]
+    concluidas = map(_executar_tarefa_ajuste, tarefas) if executor is None else executor.map(_executar_tarefa_ajuste, tarefas)
+    ajustes, diagnosticos = {}, {}
+    for _, nome, popt, diagnostico in concluidas:
+        ajustes[nome], diagnosticos[nome] = popt, diagnostico
+        _registrar_desempenho(nome, diagnostico)
+    resultado = _montar_resultados(ajustes, gd_fit, tau_fit, criterio, *opcoes_robustas, pesos, diagnosticos)
+    if usar_cache:
+        _registrar_cache(chave, ajustes, resultado)
+        resultado = _copiar_resultado(resultado)
+    return _expandir_por_ponto(resultado, valid_fit)
+
+def ajustar_modelos_varios(conjuntos, metodo='direto', executor=None, tamanho_bloco=None, usar_cache=True,
+                           criterio=CRITERIO_SELECAO_PADRAO, modelos=None, retornar_falhas=False):
+    """
+    Aplica ajustar_modelos a vários conjuntos [(gamma_dot, tau_w), ...]. Com 'executor', as tarefas
+    (conjunto, modelo) são distribuídas em blocos entre os processos. Retorna a lista de tuplas
+    (model_results, best_model_nome, df_sum_modelo), na ordem dos conjuntos (mais 'falhas' com retornar_falhas).
+    """
+    nomes_modelos = list(selecionar_modelos(modelos))
+    dados = [_filtrar_dados_ajuste(gd, tau) for gd, tau in conjuntos]
+    resultados = [None] * len(dados)
+    chaves = [None] * len(dados)
+    for i, (gd_fit, tau_fit) in enumerate(dados):
+        if len(gd_fit) < 3:
+            print("  AVISO: Pontos insuficientes para ajuste de modelos (mínimo 3).")
+            resultados[i] = ({}, "", pd.DataFrame(), {})
+        elif usar_cache:
+            chaves[i] = chave_ajuste(gd_fit, tau_fit, metodo, modelos=nomes_modelos)
+            resultado = _consultar_cache(chaves[i], gd_fit, tau_fit, criterio)
+            if resultado is not None:
+                resultados[i] = _copiar_resultado(resultado)
+    pendentes = [i for i, r in enumerate(resultados) if r is None]
+
+    executor = _resolver_executor(executor)
+    tarefas = [(i, nome, dados[i][0], dados[i][1], metodo, None, 'linear', None, 'absoluta', None)
+               for i in pendentes for nome in nomes_modelos]
+    if executor is None:
+        concluidas = map(_executar_tarefa_ajuste, tarefas)
+    else:
+        concluidas = executor.map(_executar_tarefa_ajuste, tarefas,
+                                  chunksize=tamanho_bloco or _tamanho_bloco(len(tarefas), executor))
+    ajustes = {i: {} for i in pendentes}
+    diagnosticos = {i: {} for i in pendentes}
+    for i, nome, popt, diagnostico in concluidas:
+        ajustes[i][nome], diagnosticos[i][nome] = popt, diagnostico
+        _registrar_desempenho(nome, diagnostico)
+
+    for i in pendentes:
+        resultados[i] = _montar_resultados(ajustes[i], *dados[i], criterio, diagnosticos=diagnosticos[i])
+        if usar_cache:
+            _registrar_cache(chaves[i], ajustes[i], resultados[i])
+            resultados[i] = _copiar_resultado(resultados[i])
+    return resultados if retornar_falhas else [r[:3] for r in resultados]
+
+# -----------------------------------------------------------------------------
+# --- REAJUSTE INCREMENTAL (REMOÇÃO DE PONTOS) ---
+# -----------------------------------------------------------------------------
+class AjusteIncremental:
+    """
+    Mantém os ajustes de todos os modelos sobre um conjunto de pontos do qual se removem pontos um a um
+    (filtragem iterativa de outliers). Newtoniano e Bingham são atualizados pelo downdate das somas dos
+    mínimos quadrados (O(1) por ponto); os demais modelos são reajustados com partida a quente a partir
+    dos parâmetros anteriores.
+    """
+    def __init__(self, gamma_dot, tau_w, metodo='direto', modelos=None):
+        self.gd, self.tau = _filtrar_dados_ajuste(gamma_dot, tau_w)
+        self.metodo = metodo
+        self.modelos = list(selecionar_modelos(modelos))
+        self.ativos = np.ones(len(self.gd), dtype=bool)
+        # Contribuição de cada ponto às somas normais (6, N); o downdate subtrai a coluna do ponto removido
+        self._contrib = _somas_mq(self.gd[:, None], self.tau[:, None], np.ones((len(self.gd), 1)))
+        self._somas = {nome: self._contrib.sum(axis=1) for nome in MODELOS_LINEARES}
+        self.params = {}
+        self.diagnosticos = {}
+        if len(self.gd) >= 3:
+            for nome in self.modelos:
+                popt = self._ajustar(nome, self.gd, self.tau)
+                if popt is not None:
+                    self.params[nome] = popt
+
+    def _ajustar(self, nome, gd, tau, p0=None):
+        diagnostico = {}
+        popt = _ajustar_um_modelo(nome, gd, tau, self.metodo, p0, diagnostico=diagnostico)
+        self.diagnosticos[nome] = diagnostico
+        _registrar_desempenho(nome, diagnostico)
+        return popt
+
+    def remover(self, indice):
+        """Remove o ponto 'indice' (posição nos dados filtrados) e atualiza os ajustes."""
+        if not self.ativos[indice]:
+            return
+        self.ativos[indice] = False
+        gd, tau = self.gd[self.ativos], self.tau[self.ativos]
+        if len(gd) < 3:
+            self.params = {}
+            return
+        for nome in self.modelos:
+            if nome in MODELOS_LINEARES and self.metodo == 'direto':
+                t0 = time.perf_counter()
+                self._somas[nome] = self._somas[nome] - self._contrib[:, indice]
+                a, b, _ = _resolver_somas(self._somas[nome], MODELOS_LINEARES[nome])
+                b = max(float(b), PARAM_MINIMO)
+                self.params[nome] = np.array([float(a), b]) if MODELOS_LINEARES[nome] else np.array([b])
+                self.diagnosticos[nome] = {'status': 'ok', 'solver': 'downdate', 'nfev': 0,
+                                           'tempo_s': time.perf_counter() - t0, 'motivo_falha': None}
+            else:
+                popt = self._ajustar(nome, gd, tau, self.params.get(nome))
+                if popt is None:
+                    self.params.pop(nome, None)
+                else:
+                    self.params[nome] = popt
+
+    def resultado(self, criterio=CRITERIO_SELECAO_PADRAO):
+        """(model_results, best_model_nome, df_sum_modelo) dos pontos ativos, como em ajustar_modelos."""
+        if not self.params:
+            return {}, "", pd.DataFrame()
+        return _montar_resultados(self.params, self.gd[self.ativos], self.tau[self.ativos], criterio,
+                                  diagnosticos=self.diagnosticos)[:3]
+
+def filtrar_residuos_iterativo(gamma_dot, tau_w, limite_rel=0.20, nome_modelo=None, min_pontos=3, metodo='direto',
+                               criterio=CRITERIO_SELECAO_PADRAO, modelos=None):
+    """
+    Remove, um por vez, o ponto de maior resíduo relativo |tau - tau_pred| / tau_pred enquanto ele
+    exceder 'limite_rel', reajustando os modelos de forma incremental (AjusteIncremental) a cada remoção.
+    O resíduo é avaliado no melhor modelo da rodada (segundo 'criterio') ou em 'nome_modelo', se fornecido.
+
+    Returns:
+        tuple: (mascara, model_results, best_model_nome) - 'mascara' (bool, mesmo tamanho da entrada)
+            marca os pontos mantidos; pontos inválidos para ajuste (<= 0 ou NaN) ficam False.
+    """
+    gamma_dot, tau_w = np.asarray(gamma_dot, dtype=float), np.asarray(tau_w, dtype=float)
+    validos = np.flatnonzero((gamma_dot > 0) & (tau_w > 0) & ~np.isnan(gamma_dot) & ~np.isnan(tau_w))
+    ajuste = AjusteIncremental(gamma_dot, tau_w, metodo, modelos)
+    model_results, best_model_nome, _ = ajuste.resultado(criterio)
+    while model_results and ajuste.ativos.sum() > min_pontos:
+        nome = nome_modelo if nome_modelo in model_results else best_model_nome
+        tau_pred = REGISTRO_MODELOS[nome][0](ajuste.gd, *model_results[nome]['params'])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            erro_rel = np.where(ajuste.ativos, np.abs(ajuste.tau - tau_pred) / np.abs(tau_pred), -np.inf)
+        erro_rel = np.where(np.isnan(erro_rel), np.inf, erro_rel)
+        pior = int(np.argmax(erro_rel))
+        if erro_rel[pior] <= limite_rel:
+            break
+        ajuste.remover(pior)
+        model_results, best_model_nome, _ = ajuste.resultado(criterio)
+
+    mascara = np.zeros(len(gamma_dot), dtype=bool)
+    mascara[validos[ajuste.ativos]] = True
+    return mascara, model_results, best_model_nome
 
 def inferir_comportamento_fluido(best_model_nome, model_results):
     """
@@ -77,8 +1142,11 @@ def inferir_comportamento_fluido(best_model_nome, model_results):
         elif n_val > 1: return "Dilatante (Shear Thickening)"
         else: return "Newtoniano"
         
-    elif best_model_nome in ["Bingham", "Herschel-Bulkley", "Casson"]:
+    elif best_model_nome in ["Bingham", "Herschel-Bulkley", "Casson", "Robertson-Stiff", "Mizrahi-Berk"]:
         return "Viscoplastico (Com Tensao de Escoamento)"
+
+    elif best_model_nome in ["Sisko", "Cross", "Carreau-Yasuda", "Ellis"]:
+        return "Pseudoplastico (Shear Thinning)"
         
     else:
         return "Newtoniano"
@@ -1,12 +1,15 @@
 # -*- coding: utf-8 -*-
 import os
+import io
+import re
 import json
 import glob
+import hashlib
 import numpy as np
 import pandas as pd
-from scipy.interpolate import interp1d
 from datetime import datetime
 import utils_reologia
+import reologia_cache
 
 def input_sim_nao(mensagem_prompt):
     """Pede uma entrada do usuário e valida se é 'sim' ou 'não'."""
@@ -26,61 +29,171 @@ def input_float_com_virgula(mensagem_prompt, permitir_vazio=False):
         except ValueError:
             print("Entrada inválida. Por favor, digite um número.")
 
+# -----------------------------------------------------------------------------
+# --- MODELO DE DADOS DO ENSAIO ---
+# -----------------------------------------------------------------------------
+# Colunas dos pontos: atributo do Ensaio -> chave em 'testes' (esquema atual)
+COLUNAS_PONTO_ENSAIO = {
+    'ponto_n': 'ponto_n',
+    'massa_g': 'massa_g_registrada',
+    'duracao_s': 'duracao_real_s',
+    'pressao_linha_bar': 'media_pressao_linha_bar',
+    'pressao_pasta_bar': 'media_pressao_pasta_bar',
+    'pressao_final_bar': 'media_pressao_final_ponto_bar',
+    'tensao_linha_V': 'media_tensao_linha_V',
+    'tensao_pasta_V': 'media_tensao_pasta_V',
+    'tensao_final_V': 'media_tensao_final_ponto_V',
+}
+_CHAVES_CABECALHO_ENSAIO = ('id_amostra', 'diametro_capilar_mm', 'comprimento_capilar_mm', 'densidade_pasta_g_cm3', 'calibracao_aplicada')
+
+class Ensaio:
+    """
+    Ensaio capilar com os pontos em colunas contíguas (float64; 'ponto_n' em int64) em vez de lista de dicts.
+    Metadados: D_mm, L_mm, rho_g_cm3, calibracao e demais campos do cabeçalho em 'cabecalho'.
+    Valores ausentes num ponto ficam NaN (ponto_n = -1) e são lembrados em '_ausentes', de forma que
+    Ensaio.de_dados(d).para_dados() reproduz o JSON original (no esquema atual).
+    """
+    __slots__ = ('id_amostra', 'D_mm', 'L_mm', 'rho_g_cm3', 'calibracao', 'cabecalho', 'extras_pontos', '_ausentes') + tuple(COLUNAS_PONTO_ENSAIO)
+
+    def __init__(self, D_mm, L_mm, rho_g_cm3, id_amostra='Desconhecido', calibracao=None, cabecalho=None, **colunas):
+        self.id_amostra, self.calibracao = id_amostra, calibracao
+        self.D_mm, self.L_mm, self.rho_g_cm3 = float(D_mm), float(L_mm), float(rho_g_cm3)
+        self.cabecalho = dict(cabecalho or {})
+        n = max((len(v) for v in colunas.values() if v is not None), default=0)
+        for atributo in COLUNAS_PONTO_ENSAIO:
+            valores = colunas.pop(atributo, None)
+            if atributo == 'ponto_n':
+                arr = np.arange(1, n + 1) if valores is None else np.asarray(valores, dtype=np.int64)
+            else:
+                arr = np.full(n, np.nan) if valores is None else np.asarray(valores, dtype=float)
+            if len(arr) != n:
+                raise ValueError(f"Coluna '{atributo}' com {len(arr)} pontos (esperado {n}).")
+            setattr(self, atributo, arr)
+        if colunas:
+            raise TypeError(f"Colunas desconhecidas: {sorted(colunas)}")
+        self.extras_pontos = None  # Lista de dicts com chaves de ponto não mapeadas (ou None)
+        self._ausentes = {}        # atributo -> máscara de pontos em que a chave não existia no JSON
+
+    def __len__(self):
+        return len(self.ponto_n)
+
+    def __repr__(self):
+        return f"Ensaio('{self.id_amostra}', D={self.D_mm} mm, L={self.L_mm} mm, {len(self)} pontos)"
+
+    @classmethod
+    def de_dados(cls, dados):
+        """Cria o Ensaio a partir do dict de um JSON de ensaio (legados são migrados antes)."""
+        if not utils_reologia.ensaio_na_versao_atual(dados):
+            dados = utils_reologia.migrar_esquema_ensaio(dados)
+        testes = dados.get('testes', [])
+        n = len(testes)
+        colunas, ausentes = {}, {}
+        for atributo, chave in COLUNAS_PONTO_ENSAIO.items():
+            presente = np.fromiter((chave in t for t in testes), dtype=bool, count=n)
+            if not presente.all():
+                ausentes[atributo] = ~presente
+            if presente.any() or atributo == 'ponto_n':
+                vazio = -1 if atributo == 'ponto_n' else np.nan
+                colunas[atributo] = [vazio if v is None else v for v in (t.get(chave) for t in testes)]
+
+        ensaio = cls(dados.get('diametro_capilar_mm', 0.0), dados.get('comprimento_capilar_mm', 0.0),
+                     dados.get('densidade_pasta_g_cm3', 0.0), dados.get('id_amostra', 'Desconhecido'),
+                     dados.get('calibracao_aplicada'),
+                     {k: v for k, v in dados.items() if k not in _CHAVES_CABECALHO_ENSAIO and k != 'testes'},
+                     **colunas)
+        ensaio._ausentes = ausentes
+        conhecidas = set(COLUNAS_PONTO_ENSAIO.values())
+        extras = [{k: v for k, v in t.items() if k not in conhecidas} for t in testes]
+        ensaio.extras_pontos = extras if any(extras) else None
+        return ensaio
+
+    @classmethod
+    def de_json(cls, caminho):
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return cls.de_dados(json.load(f))
+
+    def para_dados(self):
+        """Converte de volta para o dict do JSON (esquema atual)."""
+        dados = {'id_amostra': self.id_amostra, 'diametro_capilar_mm': self.D_mm,
+                 'comprimento_capilar_mm': self.L_mm, 'densidade_pasta_g_cm3': self.rho_g_cm3}
+        if self.calibracao is not None:
+            dados['calibracao_aplicada'] = self.calibracao
+        dados.update(self.cabecalho)
+        colunas = {chave: getattr(self, atributo).tolist() for atributo, chave in COLUNAS_PONTO_ENSAIO.items()}
+        ausentes = {COLUNAS_PONTO_ENSAIO[a]: m for a, m in self._ausentes.items()}
+        testes = []
+        for i in range(len(self)):
+            ponto = {}
+            for chave, valores in colunas.items():
+                if chave in ausentes and ausentes[chave][i]:
+                    continue
+                v = valores[i]
+                ponto[chave] = None if (isinstance(v, float) and np.isnan(v)) or (chave == 'ponto_n' and v == -1) else v
+            if self.extras_pontos:
+                ponto.update(self.extras_pontos[i])
+            testes.append(ponto)
+        dados['testes'] = testes
+        dados['schema_version'] = utils_reologia.VERSAO_ESQUEMA_ENSAIO
+        return dados
+
+    def salvar_json(self, caminho):
+        """Grava o ensaio em JSON (atômico, sob bloqueio da pasta)."""
+        with utils_reologia.bloquear_pasta(os.path.dirname(caminho) or "."):
+            utils_reologia.salvar_json_atomico(caminho, self.para_dados(), indent=4, ensure_ascii=False)
+        return caminho
+
+    def selecionar(self, indices):
+        """Retorna um novo Ensaio apenas com os pontos indicados (máscara booleana ou índices)."""
+        indices = np.arange(len(self))[indices]
+        novo = Ensaio(self.D_mm, self.L_mm, self.rho_g_cm3, self.id_amostra, self.calibracao, self.cabecalho,
+                      **{a: getattr(self, a)[indices] for a in COLUNAS_PONTO_ENSAIO})
+        novo._ausentes = {a: m[indices] for a, m in self._ausentes.items()}
+        novo.extras_pontos = [self.extras_pontos[i] for i in indices] if self.extras_pontos else None
+        return novo
+
+    # --- Grandezas derivadas (vetorizadas) ---
+    def pressoes_bar(self, usar_pressao_pasta=False):
+        return self.pressao_pasta_bar if usar_pressao_pasta else self.pressao_linha_bar
+
+    @property
+    def vazao_m3_s(self):
+        """Vazão volumétrica Q = (m / rho) / t  [m³/s]."""
+        return (self.massa_g / 1000.0) / (self.rho_g_cm3 * 1000.0) / self.duracao_s
+
+    @property
+    def gamma_dot_aw(self):
+        """Taxa de cisalhamento aparente na parede: 4Q / (pi R³)  [1/s]."""
+        R_m = self.D_mm / 2000.0
+        return 4.0 * self.vazao_m3_s / (np.pi * R_m**3)
+
+    def tensao_parede(self, usar_pressao_pasta=False):
+        """Tensão de cisalhamento na parede: P R / (2 L)  [Pa]."""
+        return self.pressoes_bar(usar_pressao_pasta) * 1e5 * (self.D_mm / 2.0) / (2.0 * self.L_mm)
+
+    @property
+    def tau_w(self):
+        """Tensão na parede com a pressão da linha (sensor do sistema) [Pa]."""
+        return self.tensao_parede(False)
+
 def ler_dados_json(json_filepath):
-    """Lê dados de um arquivo JSON, suportando duração fixa ('duracao_por_teste_s') ou variável ('duracao_real_s')."""
+    """
+    Lê dados de um arquivo JSON de ensaio. Arquivos no esquema atual (utils_reologia.VERSAO_ESQUEMA_ENSAIO)
+    são lidos diretamente; arquivos legados são migrados em memória (ver 1c.Migrar_Esquema_JSON.py).
+    """
     try:
-        with open(json_filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # --- Lógica de Compatibilidade para Tempo ---
-        duracoes = []
-        
-        # 1. Tenta ler o array de testes (formato novo/padrão)
-        if 'testes' in data and isinstance(data['testes'], list):
-            for t in data['testes']:
-                # Tenta 'duracao_real_s' (novo), fallback para 'duracao_s' (alguns antigos)
-                d = t.get('duracao_real_s', t.get('duracao_s'))
-                if d is not None: duracoes.append(float(d))
-        
-        # 2. Se não achou no array ou array vazio, tenta campos globais antigos
-        if not duracoes:
-            duracao_global = data.get('duracao_por_teste_s')
-            if duracao_global is not None:
-                duracoes = [float(duracao_global)]
-        
-        # 3. Garante que temos listas de pressão e massa para retornar estrutura padronizada
-        pressoes_bar_list = []
-        massas_g_list = []
-        
-        if 'testes' in data:
-            for t in data['testes']:
-                p_linha = t.get('media_pressao_linha_bar', 0.0)
-                p_pasta = t.get('media_pressao_pasta_bar', 0.0)
-                # Fallbacks para pressão
-                if p_linha == 0 and 'pressao_bar' in t: p_linha = t['pressao_bar'] # Antigo
-                
-                m = t.get('massa_g_registrada', t.get('massa_g', 0.0))
-                
-                pressoes_bar_list.append({'linha': p_linha, 'pasta': p_pasta})
-                massas_g_list.append(m)
-        else:
-            # Tenta formato antigo plano (listas diretas)
-            p_old = data.get('pressoes_bar_list', [])
-            m_old = data.get('massas_g_list', [])
-            if p_old and m_old:
-                for p, m in zip(p_old, m_old):
-                    pressoes_bar_list.append({'linha': p, 'pasta': p}) # Assume igual se não especificado
-                    massas_g_list.append(m)
-
-        # Retorna um dicionário padronizado
+        data = utils_reologia.carregar_ensaio_json(json_filepath)
+        ensaio = Ensaio.de_dados(data)
+
+        # Retorna um dicionário padronizado (listas mantidas para a exibição; 'ensaio' traz as colunas em arrays)
         return {
-            'id_amostra': data.get('id_amostra', 'Desconhecido'),
-            'rho_g_cm3_json': data.get('densidade_pasta_g_cm3', data.get('rho_g_cm3', 0.0)),
-            'D_mm': data.get('diametro_capilar_mm', data.get('D_mm', 0.0)),
-            'L_mm': data.get('comprimento_capilar_mm', data.get('L_mm', 0.0)),
-            'duracoes_s_list': duracoes,
-            'pressoes_bar_list': pressoes_bar_list,
-            'massas_g_list': massas_g_list,
+            'id_amostra': ensaio.id_amostra,
+            'rho_g_cm3_json': ensaio.rho_g_cm3,
+            'D_mm': ensaio.D_mm,
+            'L_mm': ensaio.L_mm,
+            'duracoes_s_list': ensaio.duracao_s[~np.isnan(ensaio.duracao_s)].tolist(),
+            'pressoes_bar_list': [{'linha': l, 'pasta': p} for l, p in zip(ensaio.pressao_linha_bar.tolist(), ensaio.pressao_pasta_bar.tolist())],
+            'massas_g_list': ensaio.massa_g.tolist(),
+            'ensaio': ensaio,
             'raw_data': data # Mantém o original se precisar de algo extra
         }
 
@@ -88,6 +201,148 @@ def ler_dados_json(json_filepath):
         print(f"Erro ao ler JSON '{os.path.basename(json_filepath)}': {e}")
         return None
 
+# -----------------------------------------------------------------------------
+# --- LEITURA INCREMENTAL DE ARQUIVOS DE ENSAIO (JSON) ---
+# -----------------------------------------------------------------------------
+class _LeitorJsonIncremental:
+    """
+    Lê um arquivo JSON em blocos, decodificando um valor de cada vez (estilo ijson).
+    Apenas o valor corrente fica em memória, independente do tamanho do arquivo.
+    """
+    def __init__(self, arquivo, tamanho_bloco=65536):
+        self.arquivo = arquivo
+        self.tamanho_bloco = tamanho_bloco
+        self.buf = ""
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+
+    def _carregar_bloco(self):
+        bloco = self.arquivo.read(self.tamanho_bloco)
+        if not bloco:
+            return False
+        self.buf = self.buf[self.pos:] + bloco
+        self.pos = 0
+        return True
+
+    def caractere(self):
+        """Retorna o próximo caractere significativo (sem consumi-lo)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._carregar_bloco():
+                raise ValueError("Fim inesperado do arquivo JSON.")
+
+    def consumir(self, esperado):
+        if self.caractere() != esperado:
+            raise ValueError(f"JSON malformado: esperado '{esperado}', encontrado '{self.buf[self.pos]}'.")
+        self.pos += 1
+
+    def valor(self):
+        """Decodifica o próximo valor JSON completo."""
+        self.caractere()
+        while True:
+            try:
+                obj, fim = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._carregar_bloco():
+                    raise
+                continue
+            # Um número no fim do buffer pode estar truncado (ex: '30' de '30.14'): lê mais e decodifica de novo
+            truncado = fim == len(self.buf) or (isinstance(obj, (int, float)) and self.buf[fim] in ".eE+-0123456789")
+            if truncado and self._carregar_bloco():
+                continue
+            self.pos = fim
+            return obj
+
+    def chaves_objeto(self):
+        """Itera as chaves de um objeto. O chamador deve consumir cada valor antes de avançar."""
+        self.consumir("{")
+        if self.caractere() == "}":
+            self.pos += 1
+            return
+        while True:
+            chave = self.valor()
+            self.consumir(":")
+            yield chave
+            separador = self.caractere()
+            self.pos += 1
+            if separador == "}":
+                return
+            if separador != ",":
+                raise ValueError("JSON malformado: separador de objeto inválido.")
+
+    def elementos_array(self):
+        """Itera (preguiçosamente) os elementos de um array."""
+        if self.caractere() != "[":
+            self.valor()  # Não é array: descarta o valor
+            return
+        self.pos += 1
+        if self.caractere() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.valor()
+            separador = self.caractere()
+            self.pos += 1
+            if separador == "]":
+                return
+            if separador != ",":
+                raise ValueError("JSON malformado: separador de array inválido.")
+
+def ler_cabecalho_json(json_filepath, chaves=None):
+    """
+    Lê apenas os campos de topo de um JSON de ensaio (tudo exceto 'testes'), sem carregar os pontos.
+    Se 'chaves' for informado, a leitura para assim que todas forem encontradas.
+    Retorna um dicionário (ou None em caso de erro).
+    """
+    chaves_faltando = set(chaves) if chaves else None
+    cabecalho = {}
+    try:
+        with open(json_filepath, 'r', encoding='utf-8') as f:
+            leitor = _LeitorJsonIncremental(f)
+            for chave in leitor.chaves_objeto():
+                if chave == 'testes':
+                    for _ in leitor.elementos_array(): pass  # Pula os pontos sem acumulá-los
+                    continue
+                cabecalho[chave] = leitor.valor()
+                if chaves_faltando is not None:
+                    chaves_faltando.discard(chave)
+                    if not chaves_faltando: break
+        return cabecalho
+    except Exception as e:
+        print(f"Erro ao ler cabeçalho do JSON '{os.path.basename(json_filepath)}': {e}")
+        return None
+
+def iterar_testes_json(json_filepath):
+    """
+    Gera os pontos ('testes') de um JSON de ensaio um a um, sem materializar a lista inteira.
+    Arquivos no formato antigo (sem 'testes') não geram nenhum ponto.
+    """
+    with open(json_filepath, 'r', encoding='utf-8') as f:
+        leitor = _LeitorJsonIncremental(f)
+        for chave in leitor.chaves_objeto():
+            if chave == 'testes':
+                yield from leitor.elementos_array()
+                return
+            leitor.valor()
+
+def resumo_cabecalho_ensaio(json_filepath):
+    """Texto curto com a geometria/densidade do ensaio, para exibição em menus de seleção."""
+    info = ler_cabecalho_json(json_filepath, chaves=['diametro_capilar_mm', 'comprimento_capilar_mm', 'densidade_pasta_g_cm3'])
+    if not info:
+        return ""
+    partes = []
+    if 'diametro_capilar_mm' in info: partes.append(f"D={info['diametro_capilar_mm']} mm")
+    if 'comprimento_capilar_mm' in info: partes.append(f"L={info['comprimento_capilar_mm']} mm")
+    if 'densidade_pasta_g_cm3' in info: partes.append(f"rho={info['densidade_pasta_g_cm3']} g/cm³")
+    return " | ".join(partes)
+
+# Versão do cálculo das correções gravada nas calibrações. 2: Bagley com abscissa L/R; as calibrações
+# Bagley anteriores (sem o campo) usavam L/D e têm tau_w 2x maior, corrigido na leitura.
+VERSAO_CORRECAO_CALIBRACAO = 2
+
 def salvar_calibracao_json(tipo_correcao, tau_w_corrigido, gamma_dot_corrigido, arquivos_origem, pasta_calibracao):
     """
     Salva os resultados de uma calibração (Bagley, Mooney, etc.) em um arquivo JSON.
@@ -102,6 +357,7 @@ def salvar_calibracao_json(tipo_correcao, tau_w_corrigido, gamma_dot_corrigido,
     
     dados_calibracao = {
         "tipo_calibracao": tipo_correcao,
+        "versao_correcao": VERSAO_CORRECAO_CALIBRACAO,
         "data_geracao": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "arquivos_origem": arquivos_origem,
         "pontos_calibracao": {
@@ -111,8 +367,8 @@ def salvar_calibracao_json(tipo_correcao, tau_w_corrigido, gamma_dot_corrigido,
     }
     
     try:
-        with open(caminho_completo, 'w', encoding='utf-8') as f:
-            json.dump(dados_calibracao, f, indent=4)
+        with utils_reologia.bloquear_pasta(pasta_calibracao):
+            utils_reologia.salvar_json_atomico(caminho_completo, dados_calibracao, indent=4)
         print(f"\nArquivo de calibração salvo: {nome_arquivo}")
         return caminho_completo
     except Exception as e:
@@ -126,28 +382,120 @@ def listar_e_selecionar_calibracao(pasta_calibracao):
     """
     return utils_reologia.selecionar_arquivo(pasta_calibracao, "calibracao_*.json", "Selecione um arquivo de Calibração", ".json")
 
-def carregar_e_aplicar_calibracao(caminho_calibracao, tau_w_nao_corrigido):
+EXTRAPOLACAO_CALIBRACAO = ('potencia', 'constante', 'nan')
+
+class CalibracaoCompilada:
     """
-    Carrega os dados de um arquivo de calibração JSON e os aplica aos dados de tensão de cisalhamento
-    de um capilar único, usando interpolação para encontrar a taxa de cisalhamento corrigida correspondente.
+    Curva mestra de calibração (tau_w -> gamma_dot corrigido) pré-processada para aplicação repetida.
+    Interpola em log-log sobre pontos ordenados e monotônicos. Fora da faixa calibrada vale a política
+    'extrapolacao': 'potencia' (prolonga o último segmento log-log, i.e., lei de potência local),
+    'constante' (satura no valor da borda) ou 'nan' (não extrapola).
     """
-    try:
+    def __init__(self, tau_w_pa, gamma_dot_s, tipo="N/A", data_geracao="N/A", extrapolacao='potencia'):
+        if extrapolacao not in EXTRAPOLACAO_CALIBRACAO:
+            raise ValueError(f"Política de extrapolação inválida: '{extrapolacao}' (use {EXTRAPOLACAO_CALIBRACAO})")
+        tau = np.asarray(tau_w_pa, dtype=float)
+        gamma = np.asarray(gamma_dot_s, dtype=float)
+        validos = np.isfinite(tau) & np.isfinite(gamma) & (tau > 0) & (gamma > 0)
+        log_tau, log_gamma = np.log(tau[validos]), np.log(gamma[validos])
+
+        # Ordena por tau e funde tensões repetidas (média em log)
+        log_tau, inverso = np.unique(log_tau, return_inverse=True)
+        log_gamma = np.bincount(inverso, weights=log_gamma) / np.bincount(inverso)
+        if len(log_tau) < 2:
+            raise ValueError("Calibração sem pontos válidos suficientes para interpolação (mínimo 2).")
+        # gamma_dot deve crescer com tau; ruído que quebre a monotonicidade é achatado
+        self.monotonia_corrigida = bool(np.any(np.diff(log_gamma) < 0))
+        log_gamma = np.maximum.accumulate(log_gamma)
+
+        self.tipo, self.data_geracao, self.extrapolacao = tipo, data_geracao, extrapolacao
+        self.log_tau, self.log_gamma = log_tau, log_gamma
+        self.tau_min, self.tau_max = float(np.exp(log_tau[0])), float(np.exp(log_tau[-1]))
+        # Inclinações log-log das bordas (usadas na extrapolação por potência)
+        self._incl_ini = (log_gamma[1] - log_gamma[0]) / (log_tau[1] - log_tau[0])
+        self._incl_fim = (log_gamma[-1] - log_gamma[-2]) / (log_tau[-1] - log_tau[-2])
+
+    def aplicar(self, tau_w):
+        """Retorna gamma_dot corrigido para um array de tau_w (tau_w <= 0 ou NaN resulta em NaN)."""
+        tau_w = np.asarray(tau_w, dtype=float)
+        gamma = np.full(tau_w.shape, np.nan)
+        positivos = np.isfinite(tau_w) & (tau_w > 0)
+        lt = np.log(tau_w[positivos])
+        lg = np.interp(lt, self.log_tau, self.log_gamma)
+        abaixo, acima = lt < self.log_tau[0], lt > self.log_tau[-1]
+        if self.extrapolacao == 'potencia':
+            lg[abaixo] = self.log_gamma[0] + self._incl_ini * (lt[abaixo] - self.log_tau[0])
+            lg[acima] = self.log_gamma[-1] + self._incl_fim * (lt[acima] - self.log_tau[-1])
+        elif self.extrapolacao == 'nan':
+            lg[abaixo | acima] = np.nan
+        gamma[positivos] = np.exp(lg)  # 'constante': np.interp já satura nas bordas
+        return gamma
+
+    def aplicar_lote(self, lista_tau_w):
+        """Aplica a calibração a vários arrays de tau_w de uma vez (uma única interpolação vetorizada)."""
+        arrays = [np.asarray(t, dtype=float) for t in lista_tau_w]
+        if not arrays:
+            return []
+        gamma = self.aplicar(np.concatenate([a.ravel() for a in arrays]))
+        cortes = np.cumsum([a.size for a in arrays])[:-1]
+        return [g.reshape(a.shape) for g, a in zip(np.split(gamma, cortes), arrays)]
+
+    def pontos_fora_da_faixa(self, tau_w):
+        tau_w = np.asarray(tau_w, dtype=float)
+        return int(np.sum((tau_w < self.tau_min) | (tau_w > self.tau_max)))
+
+# Registro de calibrações compiladas: caminho -> (mtime_ns, tamanho, sha256) e (sha256, política) -> CalibracaoCompilada.
+# Arquivos com o mesmo conteúdo (cópias) compartilham a mesma curva compilada.
+_DIGESTS_CALIBRACAO = {}
+_REGISTRO_CALIBRACOES = {}
+
+def obter_calibracao_compilada(caminho_calibracao, extrapolacao='potencia'):
+    """
+    Retorna a CalibracaoCompilada de um arquivo JSON de calibração, lendo e compilando o arquivo
+    apenas na primeira vez (ou quando seu conteúdo mudar). Lança exceção se o arquivo for inválido.
+    Calibrações Bagley sem 'versao_correcao' (anteriores à correção L/R) têm tau_w dividido por 2.
+    """
+    st = os.stat(caminho_calibracao)
+    assinatura = (st.st_mtime_ns, st.st_size)
+    memo = _DIGESTS_CALIBRACAO.get(caminho_calibracao)
+    if memo is None or memo[0] != assinatura:
+        memo = (assinatura, reologia_cache.digest_arquivo(caminho_calibracao))
+        _DIGESTS_CALIBRACAO[caminho_calibracao] = memo
+    chave = (memo[1], extrapolacao)
+
+    calibracao = _REGISTRO_CALIBRACOES.get(chave)
+    if calibracao is None:
         with open(caminho_calibracao, 'r', encoding='utf-8') as f:
             cal_data = json.load(f)
-        
-        print(f"\nAplicando calibração do tipo '{cal_data.get('tipo_calibracao', 'N/A')}' de {cal_data.get('data_geracao', 'N/A')}")
-        
         pontos = cal_data.get('pontos_calibracao', {})
-        tau_cal = np.array(pontos.get('tau_w_pa', []))
-        gamma_cal = np.array(pontos.get('gamma_dot_corrigido_s-1', []))
+        tau_w_pa = np.asarray(pontos.get('tau_w_pa', []), dtype=float)
+        if cal_data.get('tipo_calibracao') == 'bagley' and cal_data.get('versao_correcao', 1) < 2:
+            tau_w_pa = tau_w_pa / 2.0
+            print(f"  AVISO: Calibração Bagley '{os.path.basename(caminho_calibracao)}' anterior à correção L/R "
+                  f"(tau_w 2x maior); tensões divididas por 2 na leitura. Regenere-a com o 2.Analise_reologica.py.")
+        calibracao = CalibracaoCompilada(tau_w_pa, pontos.get('gamma_dot_corrigido_s-1', []),
+                                         cal_data.get('tipo_calibracao', 'N/A'), cal_data.get('data_geracao', 'N/A'),
+                                         extrapolacao)
+        if calibracao.monotonia_corrigida:
+            print(f"  AVISO: Curva de calibração '{os.path.basename(caminho_calibracao)}' não era monotônica; trechos decrescentes foram achatados.")
+        _REGISTRO_CALIBRACOES[chave] = calibracao
+    return calibracao
 
-        if len(tau_cal) < 2 or len(gamma_cal) < 2:
-            print("ERRO na calibração: Arquivo não contém pontos suficientes para interpolação.")
-            return None
+def carregar_e_aplicar_calibracao(caminho_calibracao, tau_w_nao_corrigido, extrapolacao='potencia'):
+    """
+    Carrega os dados de um arquivo de calibração JSON e os aplica aos dados de tensão de cisalhamento
+    de um capilar único, usando interpolação (log-log) para encontrar a taxa de cisalhamento corrigida
+    correspondente. A curva é compilada uma única vez por conteúdo de arquivo (ver obter_calibracao_compilada).
+    """
+    try:
+        calibracao = obter_calibracao_compilada(caminho_calibracao, extrapolacao)
+        print(f"\nAplicando calibração do tipo '{calibracao.tipo}' de {calibracao.data_geracao}")
+
+        gamma_dot_aplicado = calibracao.aplicar(tau_w_nao_corrigido)
+        n_fora = calibracao.pontos_fora_da_faixa(tau_w_nao_corrigido)
+        if n_fora > 0:
+            print(f"  AVISO: {n_fora} ponto(s) fora da faixa calibrada ({calibracao.tau_min:.1f} a {calibracao.tau_max:.1f} Pa); extrapolação '{extrapolacao}'.")
 
-        funcao_calibracao = interp1d(tau_cal, gamma_cal, kind='linear', bounds_error=False, fill_value="extrapolate")
-        gamma_dot_aplicado = funcao_calibracao(tau_w_nao_corrigido)
-        
         print("SUCESSO: Calibração aplicada aos dados.")
         return gamma_dot_aplicado
 
@@ -158,11 +506,89 @@ def carregar_e_aplicar_calibracao(caminho_calibracao, tau_w_nao_corrigido):
         print(f"ERRO ao carregar ou aplicar calibração: {e}")
         return None
 
+def aplicar_calibracao_lote(caminho_calibracao, lista_tau_w, extrapolacao='potencia'):
+    """Aplica a mesma calibração a vários ensaios (lista de arrays de tau_w). Retorna lista de arrays ou None."""
+    try:
+        return obter_calibracao_compilada(caminho_calibracao, extrapolacao).aplicar_lote(lista_tau_w)
+    except Exception as e:
+        print(f"ERRO ao aplicar calibração em lote: {e}")
+        return None
+
+def caminho_companheiro_binario(caminho_csv):
+    """Retorna o caminho do arquivo binário (.npy) que acompanha um CSV de resultados."""
+    return os.path.splitext(caminho_csv)[0] + ".npy"
+
+def caminho_colunas_binario(caminho_csv):
+    """Retorna o caminho do índice de colunas (.colunas.json) do companheiro binário."""
+    return os.path.splitext(caminho_csv)[0] + ".colunas.json"
+
+def salvar_csv_resultados(df, caminho_csv, **kwargs_csv):
+    """
+    Salva um DataFrame de resultados em CSV (argumentos repassados para DataFrame.to_csv)
+    e grava ao lado um companheiro binário (.npy) com as mesmas colunas.
+    O binário é lido pelos scripts 2b, 2c, 3 e 4 sem conversão de texto/locale.
+    """
+    utils_reologia.salvar_csv_atomico(df, caminho_csv, **kwargs_csv)
+    salvar_companheiro_binario(df, caminho_csv)
+    return caminho_csv
+
+def salvar_companheiro_binario(df, caminho_csv):
+    """
+    Grava as colunas numéricas do DataFrame como um único array 2-D float64 (linhas x colunas) em '<csv>.npy',
+    que pode ser aberto por memory-map sem cópia. A ordem das colunas, seus nomes e o conteúdo das colunas
+    não numéricas (texto, gravado como str) ficam em '<csv>.colunas.json', escrito por último.
+    """
+    caminho_npy, caminho_colunas = caminho_companheiro_binario(caminho_csv), caminho_colunas_binario(caminho_csv)
+    numericas = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+    try:
+        arr = np.ascontiguousarray(df[numericas].to_numpy(dtype=np.float64)).reshape(len(df), len(numericas))
+        texto = {str(c): [None if pd.isna(v) else str(v) for v in df[c]] for c in df.columns if c not in numericas}
+        with utils_reologia.escrita_atomica(caminho_npy, 'wb') as f:
+            np.save(f, arr, allow_pickle=False)
+        utils_reologia.salvar_json_atomico(caminho_colunas, {'colunas': [str(c) for c in df.columns],
+                                                             'numericas': [str(c) for c in numericas], 'texto': texto})
+        return caminho_npy
+    except Exception as e:
+        print(f"  AVISO: Falha ao salvar binário '{os.path.basename(caminho_npy)}': {e}. Leitura usará apenas o CSV.")
+        return None
+
+def carregar_companheiro_binario(caminho_csv):
+    """
+    Abre o companheiro binário de um CSV de resultados, se existir e estiver atualizado (não mais antigo que
+    o CSV). As colunas numéricas do DataFrame são uma vista do memory-map (modo cópia na escrita: alterações
+    no DataFrame não chegam ao arquivo). Retorna um DataFrame ou None.
+    """
+    caminho_npy, caminho_colunas = caminho_companheiro_binario(caminho_csv), caminho_colunas_binario(caminho_csv)
+    if not (os.path.exists(caminho_npy) and os.path.exists(caminho_colunas)):
+        return None
+    if os.path.exists(caminho_csv) and os.path.getmtime(caminho_npy) < os.path.getmtime(caminho_csv):
+        return None  # CSV editado depois do binário: o texto é a fonte mais recente
+    try:
+        with open(caminho_colunas, 'r', encoding='utf-8') as f:
+            indice = json.load(f)
+        arr = np.load(caminho_npy, mmap_mode='c', allow_pickle=False)
+        if arr.ndim != 2 or arr.shape[1] != len(indice['numericas']):
+            return None
+        df = pd.DataFrame(arr, columns=indice['numericas'], copy=False)
+        for posicao, nome in enumerate(indice['colunas']):
+            if nome in indice['texto']:
+                df.insert(posicao, nome, pd.Series(indice['texto'][nome], dtype=object))
+        return df
+    except Exception as e:
+        print(f"  AVISO: Binário '{os.path.basename(caminho_npy)}' ilegível ({e}). Usando CSV.")
+        return None
+
 def carregar_csv_resultados(filepath):
     """
     Carrega um arquivo CSV de resultados reológicos padrão.
+    Se houver um companheiro binário (.npy) atualizado, ele é usado no lugar do texto.
     Retorna um DataFrame pandas.
     """
+    df = carregar_companheiro_binario(filepath)
+    if df is not None:
+        df.columns = [c.strip() for c in df.columns]
+        return df
+
     try:
         # Tenta primeiro com ponto e vírgula (padrão Excel BR/Script 2)
         df = pd.read_csv(filepath, sep=';', decimal=',', encoding='utf-8')
@@ -179,6 +605,74 @@ def carregar_csv_resultados(filepath):
         print(f"Erro ao carregar CSV {filepath}: {e}")
         return None
 
+# -----------------------------------------------------------------------------
+# --- IMPORTAÇÃO DE DADOS DO REÔMETRO ROTACIONAL ---
+# -----------------------------------------------------------------------------
+# Colunas da exportação do equipamento (posição usada quando não há linha de cabeçalho reconhecível)
+COLUNAS_ROTACIONAL = ['Point No.', 'Shear Rate', 'Shear Stress', 'Viscosity', 'N1', 'N1_coeff', 'N1_Lodge', 'Torque', 'Status']
+VERSAO_CACHE_ROTACIONAL = 1
+# Linha de dados: começa pelo número do ponto seguido de tabulação; o resto do arquivo são blocos de cabeçalho
+_RE_LINHA_DADOS_ROTACIONAL = re.compile(r'^[ \t]*\d+[ \t]*\t.*$', re.MULTILINE)
+
+def _indices_colunas_rotacional(texto):
+    """Localiza 'Shear Rate' e 'Shear Stress' na primeira linha de cabeçalho que as contenha."""
+    for linha in texto.splitlines():
+        campos = [c.strip().lower() for c in linha.split('\t')]
+        if 'shear rate' in campos and 'shear stress' in campos:
+            return campos.index('shear rate'), campos.index('shear stress')
+    return COLUNAS_ROTACIONAL.index('Shear Rate'), COLUNAS_ROTACIONAL.index('Shear Stress')
+
+def ler_tabela_rotacional(caminho_txt):
+    """
+    Lê um .txt exportado pelo reômetro rotacional (tabulado, vírgula decimal, latin-1).
+    Blocos de cabeçalho (inclusive repetidos entre intervalos) são descartados e as linhas de
+    dados são convertidas numa única passada. Retorna (shear_rate, shear_stress) em float64.
+    """
+    with open(caminho_txt, 'r', encoding='latin-1') as f:
+        texto = f.read()
+    i_taxa, i_tensao = _indices_colunas_rotacional(texto)
+    linhas = _RE_LINHA_DADOS_ROTACIONAL.findall(texto)
+    if not linhas:
+        return np.array([]), np.array([])
+    n_campos = max(max(l.count('\t') for l in linhas) + 1, i_taxa + 1, i_tensao + 1)
+    df = pd.read_csv(io.StringIO("\n".join(linhas)), sep='\t', decimal=',', header=None,
+                     names=range(n_campos), usecols=[i_taxa, i_tensao], engine='c')
+    return (pd.to_numeric(df[i_taxa], errors='coerce').to_numpy(dtype=float),
+            pd.to_numeric(df[i_tensao], errors='coerce').to_numpy(dtype=float))
+
+def _caminho_cache_rotacional(caminho_txt, pasta_cache=None):
+    pasta = os.path.join(pasta_cache or utils_reologia.CONSTANTS['CACHE_FOLDER'], "rotacional")
+    chave = hashlib.sha1(os.path.abspath(caminho_txt).encode('utf-8')).hexdigest()[:20]
+    return os.path.join(pasta, f"{chave}.npz")
+
+def importar_rotacional(caminho_txt, usar_cache=True, pasta_cache=None):
+    """
+    Retorna um DataFrame com 'Shear Rate' e 'Shear Stress' de um .txt do reômetro rotacional.
+    O resultado é guardado em cache binário (.npz) associado ao mtime/tamanho do arquivo de origem;
+    reimportar um arquivo inalterado não reprocessa o texto.
+    """
+    st = os.stat(caminho_txt)
+    assinatura = np.array([VERSAO_CACHE_ROTACIONAL, st.st_mtime_ns, st.st_size], dtype=np.int64)
+    caminho_cache = _caminho_cache_rotacional(caminho_txt, pasta_cache)
+
+    if usar_cache and os.path.exists(caminho_cache):
+        try:
+            with np.load(caminho_cache, allow_pickle=False) as npz:
+                if np.array_equal(npz['assinatura'], assinatura):
+                    return pd.DataFrame({'Shear Rate': npz['shear_rate'], 'Shear Stress': npz['shear_stress']})
+        except Exception:
+            pass  # Cache corrompido: reprocessa e regrava
+
+    taxa, tensao = ler_tabela_rotacional(caminho_txt)
+    if usar_cache:
+        try:
+            os.makedirs(os.path.dirname(caminho_cache), exist_ok=True)
+            with utils_reologia.escrita_atomica(caminho_cache, 'wb') as f:
+                np.savez(f, assinatura=assinatura, shear_rate=taxa, shear_stress=tensao)
+        except OSError as e:
+            print(f"  AVISO: Não foi possível gravar o cache de '{os.path.basename(caminho_txt)}': {e}")
+    return pd.DataFrame({'Shear Rate': taxa, 'Shear Stress': tensao})
+
 def carregar_dados_estatisticos(filepath):
     """
     Carrega um arquivo CSV de dados estatísticos.
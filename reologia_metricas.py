@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Métricas de qualidade de ajuste vetorizadas (substituem o scikit-learn, cuja importação custava ~1 s).
+
+Todas as funções operam no último eixo: arrays 1-D dão um escalar, arrays (B, N) dão um valor por linha, de modo
+que uma única chamada avalia um lote inteiro de ajustes. 'mascara' (bool, mesma forma) marca os pontos válidos
+de cada linha, como em reologia_fitting.empilhar_conjuntos; linhas sem pontos resultam em NaN.
+"""
+import numpy as np
+
+def _preparar(y_true, y_pred, mascara):
+    """(y_true, y_pred, w, n) com w = 1 nos pontos válidos e 0 nos demais (que também são zerados)."""
+    y_true, y_pred = np.asarray(y_true, dtype=float), np.asarray(y_pred, dtype=float)
+    if mascara is None:
+        w = np.ones(np.broadcast_shapes(y_true.shape, y_pred.shape))
+    else:
+        w = np.broadcast_to(np.asarray(mascara, dtype=bool), y_true.shape).astype(float)
+        # Pontos fora da máscara podem conter NaN (preenchimento): zerados para não contaminar as somas
+        y_true, y_pred = np.where(w > 0, y_true, 0.0), np.where(w > 0, y_pred, 0.0)
+    return y_true, y_pred, w, w.sum(-1)
+
+def _escalar(valor):
+    return float(valor) if np.ndim(valor) == 0 else valor
+
+def sse(y_true, y_pred, mascara=None, pesos=None):
+    """Soma dos quadrados dos resíduos (ponderada por 'pesos', se dados)."""
+    y_true, y_pred, w, _ = _preparar(y_true, y_pred, mascara)
+    if pesos is not None:
+        w = w * pesos
+    return _escalar(np.sum(w * (y_true - y_pred)**2, axis=-1))
+
+def r2(y_true, y_pred, mascara=None):
+    """
+    Coeficiente de determinação 1 - SSE/SST. Mesma convenção do sklearn.metrics.r2_score para dados
+    constantes (SST = 0): 1 se o ajuste for exato, 0 caso contrário.
+    """
+    y_true, y_pred, w, n = _preparar(y_true, y_pred, mascara)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = np.sum(w * y_true, axis=-1) / n
+        sst = np.sum(w * (y_true - media[..., None])**2, axis=-1)
+        sse_ = np.sum(w * (y_true - y_pred)**2, axis=-1)
+        valor = np.where(sst > 0, 1 - sse_ / np.where(sst > 0, sst, 1.0), np.where(sse_ == 0, 1.0, 0.0))
+    return _escalar(np.where(n > 0, valor, np.nan))
+
+def r2_ajustado(y_true, y_pred, n_params, mascara=None):
+    """R² ajustado 1 - (1 - R²)(n - 1)/(n - p - 1); NaN se n - p - 1 <= 0."""
+    n = _preparar(y_true, y_pred, mascara)[3]
+    gl = n - n_params - 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        valor = 1 - (1 - np.asarray(r2(y_true, y_pred, mascara))) * (n - 1) / np.where(gl > 0, gl, 1.0)
+    return _escalar(np.where(gl > 0, valor, np.nan))
+
+def rmse(y_true, y_pred, mascara=None):
+    """Raiz do erro quadrático médio (mesma unidade de y)."""
+    y_true, y_pred, w, n = _preparar(y_true, y_pred, mascara)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return _escalar(np.sqrt(np.sum(w * (y_true - y_pred)**2, axis=-1) / n))
+
+def mape(y_true, y_pred, mascara=None):
+    """Erro percentual absoluto médio (%); pontos com y_true = 0 são ignorados."""
+    y_true, y_pred, w, _ = _preparar(y_true, y_pred, mascara)
+    w = w * (y_true != 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        erro_rel = np.abs((y_true - y_pred) / np.where(y_true != 0, y_true, 1.0))
+        return _escalar(np.sum(w * erro_rel, axis=-1) / w.sum(-1) * 100)
+
+def criterios_de_sse(sse_, n, n_params):
+    """
+    AIC, AICc e BIC a partir do SSE, com erro gaussiano e k = n_params + 1 (a variância também é estimada).
+    AICc é infinito quando n - k - 1 <= 0. Aceita escalares ou arrays (um valor por ajuste).
+    """
+    sse_, n = np.asarray(sse_, dtype=float), np.asarray(n, dtype=float)
+    k = n_params + 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        log_vero = n * np.log(np.maximum(sse_, 1e-300) / n)
+        aic = log_vero + 2 * k
+        aicc = np.where(n - k - 1 > 0, aic + 2 * k * (k + 1) / np.where(n - k - 1 > 0, n - k - 1, 1.0), np.inf)
+        bic = log_vero + k * np.log(n)
+    return {'AIC': _escalar(aic), 'AICc': _escalar(aicc), 'BIC': _escalar(bic)}
+
+def aic_bic(y_true, y_pred, n_params, mascara=None, pesos=None):
+    """AIC, AICc e BIC dos resíduos (ponderados por 'pesos', se dados); ver criterios_de_sse."""
+    n = _preparar(y_true, y_pred, mascara)[3]
+    return criterios_de_sse(sse(y_true, y_pred, mascara, pesos), n, n_params)
+
+def metricas_ajuste(y_true, y_pred, n_params, mascara=None):
+    """Todas as métricas de uma vez: {'R2', 'R2 ajustado', 'RMSE', 'MAPE', 'AIC', 'AICc', 'BIC'}."""
+    return {'R2': r2(y_true, y_pred, mascara), 'R2 ajustado': r2_ajustado(y_true, y_pred, n_params, mascara),
+            'RMSE': rmse(y_true, y_pred, mascara), 'MAPE': mape(y_true, y_pred, mascara),
+            **aic_bic(y_true, y_pred, n_params, mascara)}
@@ -5,7 +5,8 @@ import matplotlib.pyplot as plt
 import utils_reologia
 
 # Importa modelos para plotagem
-from modelos_reologicos import MODELS
+from modelos_reologicos import REGISTRO_MODELOS, nome_exibicao
+from reologia_kernels import avaliar_modelo
 
 def plotar_ajuste_bagley(L_over_R_vals, P_vals, slope, intercept, target_gamma_aw_str, output_folder, timestamp):
     """Gera e salva um gráfico do ajuste de Bagley para uma taxa de cisalhamento específica."""
@@ -71,12 +72,11 @@ def gerar_graficos_finais(output_folder, timestamp_str,
                     c='b', linestyle='-', linewidth=1, alpha=0.5, zorder=9)
 
     if len(gd_plot) > 0:
-        for n_model_name, (func_modelo, param_names, initial_guess_func, bounds) in MODELS.items():
-            if n_model_name not in model_results: continue
+        for n_model_name in model_results:
             d_model_data = model_results[n_model_name]
             try:
-                tau_m = func_modelo(gd_plot, *d_model_data['params'])
-                label_m = f"{n_model_name} (R²={d_model_data['R2']:.4f})"
+                tau_m = avaliar_modelo(n_model_name, gd_plot, d_model_data['params'])
+                label_m = f"{nome_exibicao(n_model_name)} (R²={d_model_data['R2']:.4f})"
                 if n_model_name == best_model_nome:
                     ax1.plot(gd_plot, tau_m, label=label_m + " [MELHOR]", linestyle='-', linewidth=2.5, color='red', zorder=20)
                 else:
@@ -144,14 +144,13 @@ def gerar_graficos_finais(output_folder, timestamp_str,
                     c='g', marker='s', linestyle='-', linewidth=1.5, markersize=8, zorder=10)
     
     if len(gd_plot) > 0:
-        for n_model_name, (func_modelo, param_names, initial_guess_func, bounds) in MODELS.items():
-            if n_model_name not in model_results: continue
+        for n_model_name in model_results:
             d_model_data = model_results[n_model_name]
             try:
-                tau_m = func_modelo(gd_plot, *d_model_data['params'])
+                tau_m = avaliar_modelo(n_model_name, gd_plot, d_model_data['params'])
                 eta_m = tau_m / gd_plot
                 if n_model_name == "Newtoniano": eta_m = np.full_like(gd_plot, d_model_data['params'][0])
-                ax3.plot(gd_plot, eta_m, label=fr'Modelo {n_model_name} ($\eta$)', lw=2.5, alpha=0.8)
+                ax3.plot(gd_plot, eta_m, label=fr'Modelo {nome_exibicao(n_model_name)} ($\eta$)', lw=2.5, alpha=0.8)
             except Exception as e_plot_model_eta: print(f"  Aviso ao plotar modelo {n_model_name}: {e_plot_model_eta}")
     
     ax3.set_xlabel("Taxa de Cisalhamento Corrigida (γ̇w, s⁻¹)")
@@ -189,7 +188,7 @@ def gerar_graficos_finais(output_folder, timestamp_str,
                 if model_results and best_model_nome:
                     try:
                         best_model_data = model_results[best_model_nome]
-                        tau_modelo = MODELS[best_model_nome][0](gd_plot, *best_model_data['params'])
+                        tau_modelo = avaliar_modelo(best_model_nome, gd_plot, best_model_data['params'])
                         if best_model_nome == "Newtoniano":
                             eta_modelo = np.full_like(gd_plot, best_model_data['params'][0])
                         else:
@@ -209,7 +208,7 @@ def gerar_graficos_finais(output_folder, timestamp_str,
                             valid = (x_vals > 0) & (~np.isnan(x_vals)) & (~np.isinf(x_vals))
                             if np.any(valid):
                                 ax4.plot(x_vals[valid], eta_modelo[valid],
-                                         label=f'Modelo {best_model_nome}',
+                                         label=f'Modelo {nome_exibicao(best_model_nome)}',
                                          color='red', linestyle='-', linewidth=2.5, alpha=0.8, zorder=5)
                     except Exception as e_plot_modelo:
                         print(f"  Aviso: Não foi possível plotar curva do modelo em P vs η: {e_plot_modelo}")
@@ -257,12 +256,12 @@ def gerar_graficos_finais(output_folder, timestamp_str,
     if len(gd_plot) > 0 and model_results and best_model_nome:
         try:
             best_model_data = model_results[best_model_nome]
-            tau_modelo = MODELS[best_model_nome][0](gd_plot, *best_model_data['params'])
+            tau_modelo = avaliar_modelo(best_model_nome, gd_plot, best_model_data['params'])
             if best_model_nome == "Newtoniano":
                 eta_modelo = np.full_like(gd_plot, best_model_data['params'][0])
             else:
                 eta_modelo = tau_modelo / gd_plot
-            ax5.plot(gd_plot, eta_modelo, label=f'Modelo {best_model_nome} (Real)', 
+            ax5.plot(gd_plot, eta_modelo, label=f'Modelo {nome_exibicao(best_model_nome)} (Real)', 
                      color='red', linestyle='-', linewidth=2, alpha=0.6, zorder=5)
             # Atualiza legenda
             ax5.legend()
@@ -297,12 +296,11 @@ def plotar_curva_fluxo_estatistica(gamma_dot_mean, tau_w_mean, tau_w_std, model_
         min_gd, max_gd = np.min(gamma_dot_mean), np.max(gamma_dot_mean)
         gd_plot = np.geomspace(min_gd * 0.8, max_gd * 1.2, 100)
         
-        for n_model_name, (func_modelo, param_names, initial_guess_func, bounds) in MODELS.items():
-            if n_model_name not in model_results: continue
+        for n_model_name in model_results:
             d_model_data = model_results[n_model_name]
             try:
-                tau_m = func_modelo(gd_plot, *d_model_data['params'])
-                label_m = f"{n_model_name} (R²={d_model_data['R2']:.4f})"
+                tau_m = avaliar_modelo(n_model_name, gd_plot, d_model_data['params'])
+                label_m = f"{nome_exibicao(n_model_name)} (R²={d_model_data['R2']:.4f})"
                 if n_model_name == best_model_nome:
                     ax.plot(gd_plot, tau_m, label=label_m + " [MELHOR]", linestyle='-', linewidth=2.5, color='red', zorder=20)
                 else:
@@ -360,8 +358,8 @@ def plotar_comparativo_multiplo(dados_analises, coluna_x, coluna_y, titulo, xlab
                         
                         print(f"    [DEBUG] Modelo: {nome_modelo}, Params: {params}")
                         
-                        if nome_modelo and params is not None and len(params) > 0 and nome_modelo in MODELS:
-                            func_modelo = MODELS[nome_modelo][0]
+                        if nome_modelo and params is not None and len(params) > 0 and nome_modelo in REGISTRO_MODELOS:
+                            func_modelo = REGISTRO_MODELOS[nome_modelo][0]
                             
                             # Gera pontos para a curva suave
                             min_x, max_x = x[valid].min(), x[valid].max()
@@ -380,10 +378,10 @@ def plotar_comparativo_multiplo(dados_analises, coluna_x, coluna_y, titulo, xlab
                                 
                             if y_model is not None:
                                 ax.plot(x_model, y_model, color=cor, linestyle='--', linewidth=2, 
-                                        alpha=0.9, label=f"Modelo {nome_modelo} ({nome})")
+                                        alpha=0.9, label=f"Modelo {nome_exibicao(nome_modelo)} ({nome})")
                                 print(f"    [DEBUG] Curva do modelo plotada com sucesso.")
                         else:
-                            print(f"    [DEBUG] Modelo inválido ou não encontrado em MODELS.")
+                            print(f"    [DEBUG] Modelo inválido ou não encontrado no registro de modelos.")
                     except Exception as e:
                         print(f"  Erro ao plotar modelo para {nome}: {e}")
     
@@ -3,6 +3,7 @@ import os
 import pandas as pd
 import utils_reologia
 from datetime import datetime
+from modelos_reologicos import nome_exibicao
 
 def gerar_relatorio_texto(timestamp_str_report, rho_g_cm3, tempo_extrusao_info,
                           metodo_entrada_rel, json_files_usados_rel, csv_path_rel,
@@ -82,7 +83,7 @@ def gerar_relatorio_texto(timestamp_str_report, rho_g_cm3, tempo_extrusao_info,
     
     if best_model_nome and df_sum_modelo is not None and not df_sum_modelo.empty:
         conteudo_list.append("\n\n--- MELHOR MODELO REOLÓGICO AJUSTADO ---\n")
-        conteudo_list.append(df_sum_modelo.to_string(index=False) + "\n")
+        conteudo_list.append(df_sum_modelo.assign(Modelo=df_sum_modelo['Modelo'].map(nome_exibicao)).to_string(index=False) + "\n")
         conteudo_list.append(f"\nComportamento do Fluido Inferido: {comportamento_fluido_relatorio}\n")
     else:
         conteudo_list.append("\n\nNenhum modelo foi ajustado ou selecionado como o melhor.\n")
@@ -99,8 +100,7 @@ def gerar_relatorio_texto(timestamp_str_report, rho_g_cm3, tempo_extrusao_info,
     conteudo = "".join(conteudo_list)
 
     try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(conteudo)
+        utils_reologia.salvar_texto_atomico(filepath, conteudo)
         print(f"\nRelatório de texto salvo em: {filepath}")
         return filepath
     except Exception as e:
@@ -130,8 +130,7 @@ CV Máximo (Tensão): {metricas_resumo.get('cv_max_tau', 0):.2f}%
 {df_metricas.to_string()}
 """
     try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(conteudo)
+        utils_reologia.salvar_texto_atomico(filepath, conteudo)
         return filepath
     except Exception: return None
 
@@ -152,7 +151,6 @@ Análises Comparadas:
         conteudo += f"- {nome}: {len(df)} pontos\n"
         
     try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(conteudo)
+        utils_reologia.salvar_texto_atomico(filepath, conteudo)
         return filepath
     except Exception: return None
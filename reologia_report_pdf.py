@@ -3,6 +3,7 @@ import os
 import pandas as pd
 from datetime import datetime
 import math
+from modelos_reologicos import nome_exibicao
 
 try:
     from fpdf import FPDF
@@ -140,7 +141,7 @@ def gerar_analise_qualiquantitativa(best_model_nome, comportamento, df_sum_model
     texto = "ANÁLISE DOS RESULTADOS:\n\n"
     
     # 1. Ajuste de Modelos
-    texto += f"O modelo reológico que melhor se ajustou aos dados experimentais foi o '{best_model_nome}'. "
+    texto += f"O modelo reológico que melhor se ajustou aos dados experimentais foi o '{nome_exibicao(best_model_nome)}'. "
     
     if df_sum_modelo is not None and not df_sum_modelo.empty:
         best_r2 = df_sum_modelo.iloc[0]['R2']
@@ -395,7 +396,11 @@ def gerar_pdf(timestamp_str, rho_g_cm3, tempo_extrusao_info,
         if df_sum_modelo is not None and not df_sum_modelo.empty:
             pdf.chapter_body("Resumo dos Ajustes dos Modelos:")
             df_mod = df_sum_modelo.copy()
+            df_mod['Modelo'] = df_mod['Modelo'].map(nome_exibicao)
             df_mod['R2'] = df_mod['R2'].apply(lambda x: f"{x:.4f}")
+            for col in ('AICc', 'BIC', 'LOO RMSE'):
+                if col in df_mod.columns:
+                    df_mod[col] = df_mod[col].apply(lambda x: f"{x:.4g}")
             pdf.add_table(df_mod)
             pdf.ln(2)
 
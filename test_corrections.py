@@ -0,0 +1,79 @@
+import copy
+import unittest
+from unittest import mock
+import numpy as np
+import reologia_corrections
+
+class TestReologiaCorrections(unittest.TestCase):
+    def setUp(self):
+        # Capilares de mesmo D e comprimentos diferentes; tau_w linear em gamma_aw, então a interpolação é exata
+        self.D, self.rho = 1.5, 1630.0
+        self.R = self.D / 2000.0
+        self.P_e = 2.0e4
+        self.capilares, self.tempos = [], {}
+        for i, L in enumerate([20.0, 40.0, 60.0, 80.0]):
+            Q = np.linspace(2e-8, 2e-7, 8) * (1 + 0.05 * i)
+            t = np.full(8, 30.0)
+            gamma_aw = 4 * Q / (np.pi * self.R**3)
+            P = 2 * self.tau_w(gamma_aw) * (L / 1000.0) / self.R + self.P_e
+            self.capilares.append({'D_mm': self.D, 'L_mm': L, 'massas_kg': Q * t * self.rho, 'pressoes_Pa': P[::-1]})
+            self.capilares[-1]['massas_kg'] = self.capilares[-1]['massas_kg'][::-1]  # Fora de ordem de propósito
+            self.tempos[f"{self.D:.3f}_{L:.2f}"] = t
+
+    @staticmethod
+    def tau_w(gamma_aw):
+        return 30.0 + 0.2 * gamma_aw
+
+    def test_regressao_linear_lote(self):
+        rng = np.random.default_rng(0)
+        x = np.array([1.0, 2.0, 4.0, 7.0, 9.0])
+        Y = 3.0 + 2.0 * x + rng.normal(0, 0.5, (6, 5))
+        mascara = np.ones(Y.shape, dtype=bool)
+        mascara[1, :3] = False  # Só 2 pontos: reta exata, sem erro-padrão
+        mascara[2, 1:] = False  # 1 ponto: indefinida
+        reg = reologia_corrections.regressao_linear_lote(x, Y, mascara)
+        for i in (0, 3, 4, 5):
+            (b, a), cov = np.polyfit(x, Y[i], 1, cov='unscaled')
+            s2 = np.sum((Y[i] - a - b * x)**2) / 3
+            np.testing.assert_allclose([reg['inclinacao'][i], reg['intercepto'][i]], [b, a], rtol=1e-10)
+            np.testing.assert_allclose([reg['erro_inclinacao'][i], reg['erro_intercepto'][i]], np.sqrt(s2 * np.diag(cov)), rtol=1e-8)
+        self.assertEqual(reg['n'][1], 2)
+        self.assertTrue(np.isfinite(reg['inclinacao'][1]) and np.isnan(reg['erro_inclinacao'][1]))
+        self.assertTrue(np.isnan(reg['inclinacao'][2]))
+
+    def test_bagley_vetorizado(self):
+        with mock.patch('reologia_plot.plotar_ajuste_bagley') as plot:
+            tau, gamma, detalhes = reologia_corrections.perform_bagley_correction(
+                copy.deepcopy(self.capilares), self.D, self.rho, self.tempos, None, "t", num_bagley_pts_final=200,
+                retornar_detalhes=True)
+        self.assertEqual(plot.call_count, 1)
+        self.assertGreater(len(gamma), 150)
+        np.testing.assert_allclose(tau, self.tau_w(gamma), rtol=1e-9)
+        np.testing.assert_allclose(detalhes['P_entrada_Pa'], self.P_e, rtol=1e-7)
+        self.assertTrue(np.all(detalhes['n_capilares'] >= 2))
+        self.assertEqual(len(detalhes['erro_tau_w']), len(tau))
+
+    def test_mooney_vetorizado(self):
+        # Diâmetros diferentes, mesmo L; gamma_true linear em tau_w e V_slip constante (interpolação exata)
+        L, V_slip = 60.0, 2e-4
+        capilares, tempos = [], {}
+        for i, D in enumerate([1.0, 1.5, 2.0, 3.0]):
+            R = D / 2000.0
+            tau = np.linspace(40.0, 400.0, 10) * (1 + 0.03 * i)
+            gamma_aw = 0.5 * tau + 4 * V_slip / R
+            t = np.full(10, 30.0)
+            capilares.append({'D_mm': D, 'L_mm': L, 'massas_kg': gamma_aw * np.pi * R**3 / 4 * t * self.rho,
+                              'pressoes_Pa': tau * 2 * (L / 1000.0) / R})
+            tempos[f"{D:.3f}_{L:.2f}"] = t
+        alvos = np.geomspace(30.0, 420.0, 300)  # Parte dos alvos fora da faixa medida
+        tau, gamma_true, detalhes = reologia_corrections.perform_mooney_correction(
+            capilares, L, self.rho, tempos, None, "t", alvos, retornar_detalhes=True)
+        self.assertTrue(np.all((tau >= 40.0) & (tau <= 400.0 * 1.09)))
+        np.testing.assert_allclose(gamma_true, 0.5 * tau, rtol=1e-8)
+        np.testing.assert_allclose(detalhes['V_slip_m_s'], V_slip, rtol=1e-6)
+        self.assertTrue(np.all(detalhes['n_capilares'] >= 2))
+        # Alvos cobertos por 3+ capilares têm erro-padrão (nulo: dados exatos)
+        self.assertTrue(np.all(detalhes['erro_V_slip_m_s'][detalhes['n_capilares'] >= 3] < 1e-9))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,367 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import reologia_fitting
+import reologia_metricas
+from modelos_reologicos import MODELS, REGISTRO_MODELOS
+
+class TestReologiaFitting(unittest.TestCase):
+    def setUp(self):
+        self.gd = np.logspace(0, 2.7, 15)
+        self.params = {"Newtoniano": [2.5], "Lei de Potencia": [35.0, 0.45], "Bingham": [40.0, 1.2],
+                       "Herschel-Bulkley": [25.0, 12.0, 0.55], "Casson": [30.0, 0.8]}
+
+    def test_solvers_diretos_recuperam_parametros(self):
+        for nome, solver in reologia_fitting.SOLVERS_DIRETOS.items():
+            tau = MODELS[nome][0](self.gd, *self.params[nome])
+            np.testing.assert_allclose(solver(self.gd, tau), self.params[nome], rtol=1e-5, err_msg=nome)
+
+    def test_hb_independe_do_chute(self):
+        # Tensão de escoamento alta e n > 1: longe do chute fixo [min(tau)/2, 1, 0.5]
+        tau = MODELS["Herschel-Bulkley"][0](self.gd, 800.0, 0.02, 1.6)
+        np.testing.assert_allclose(reologia_fitting.resolver_hb(self.gd, tau), [800.0, 0.02, 1.6], rtol=1e-4)
+
+    def test_ajustar_modelos(self):
+        rng = np.random.default_rng(1)
+        tau = MODELS["Bingham"][0](self.gd, 40.0, 1.2) * (1 + 0.01 * rng.standard_normal(len(self.gd)))
+        model_results, best, df = reologia_fitting.ajustar_modelos(self.gd, tau)
+        self.assertEqual(set(model_results), set(MODELS))
+        self.assertEqual(len(df), len(MODELS))
+        r_cf, _, _ = reologia_fitting.ajustar_modelos(self.gd, tau, metodo='curve_fit')
+        for nome in MODELS:
+            self.assertGreaterEqual(model_results[nome]['R2'], r_cf[nome]['R2'] - 1e-9)
+
+    def test_ajuste_em_lote(self):
+        rng = np.random.default_rng(2)
+        conjuntos = []
+        for nome in MODELS:
+            n = 8 + len(conjuntos) % 5
+            gd = self.gd[:n]
+            conjuntos.append((gd, MODELS[nome][0](gd, *self.params[nome]) * (1 + 0.02 * rng.standard_normal(n))))
+        conjuntos.append((np.array([1.0, 2.0]), np.array([3.0, 4.0])))  # Poucos pontos
+
+        df = reologia_fitting.ajustar_modelos_lote(conjuntos)
+        self.assertEqual(len(df), len(conjuntos) * len(MODELS))
+        for i, (gd, tau) in enumerate(conjuntos[:-1]):
+            ref, _, _ = reologia_fitting.ajustar_modelos(gd, tau)
+            for nome, (func, param_names, _, _, _) in MODELS.items():
+                linha = df[(df['Conjunto'] == i) & (df['Modelo'] == nome)].iloc[0]
+                self.assertTrue(linha['Convergiu'])
+                sse_ref = np.sum((func(gd, *ref[nome]['params']) - tau)**2)
+                self.assertLessEqual(linha['SSE'], sse_ref * (1 + 1e-6), f"{i}, {nome}")
+        self.assertFalse(df[df['Conjunto'] == len(conjuntos) - 1]['Convergiu'].any())
+
+        # Entrada preenchida + máscara equivale à coleção irregular
+        gd_pad, tau_pad, mascara = reologia_fitting.empilhar_conjuntos(conjuntos)
+        df_pad = reologia_fitting.ajustar_modelos_lote(gamma_dot=gd_pad, tau_w=tau_pad, mascara=mascara)
+        np.testing.assert_allclose(df_pad['SSE'], df['SSE'])
+
+    def test_ajuste_paralelo_identico_ao_serial(self):
+        rng = np.random.default_rng(3)
+        conjuntos = [(self.gd, MODELS[nome][0](self.gd, *self.params[nome]) * (1 + 0.02 * rng.standard_normal(len(self.gd))))
+                     for nome in MODELS]
+        conjuntos.append((np.array([1.0, 2.0]), np.array([3.0, 4.0])))  # Poucos pontos
+        serial = reologia_fitting.ajustar_modelos_varios(conjuntos, usar_cache=False)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            paralelo = reologia_fitting.ajustar_modelos_varios(conjuntos, executor=executor, tamanho_bloco=3,
+                                                                usar_cache=False)
+            unico = reologia_fitting.ajustar_modelos(*conjuntos[0], executor=executor, usar_cache=False)
+        self.assertEqual(len(paralelo), len(conjuntos))
+        self.assertEqual(paralelo[-1][0], {})
+        for (r_s, best_s, df_s), (r_p, best_p, df_p) in zip(serial, paralelo):
+            self.assertEqual(best_s, best_p)
+            self.assertEqual(set(r_s), set(r_p))
+            for nome in r_s:
+                np.testing.assert_array_equal(r_s[nome]['params'], r_p[nome]['params'])
+            self.assertTrue(df_s.equals(df_p))
+        for nome in unico[0]:
+            np.testing.assert_array_equal(unico[0][nome]['params'], serial[0][0][nome]['params'])
+
+    def test_cache_de_ajustes(self):
+        tau = MODELS["Casson"][0](self.gd, *self.params["Casson"])
+        pasta = tempfile.mkdtemp()
+        try:
+            reologia_fitting.limpar_cache_ajustes()
+            reologia_fitting.ativar_cache_persistente(pasta)
+            ref, best, df = reologia_fitting.ajustar_modelos(self.gd, tau)
+            self.assertEqual(len(os.listdir(pasta)), 1)
+            ref['Casson']['params'][0] = -1.0  # Alterar o resultado devolvido não contamina o cache
+
+            reologia_fitting.limpar_cache_ajustes()  # Sem LRU: vem do armazém em disco
+            with mock.patch.object(reologia_fitting, '_ajustar_um_modelo', side_effect=AssertionError):
+                r_cache, best_cache, df_cache = reologia_fitting.ajustar_modelos(self.gd, tau)
+            self.assertEqual(best_cache, best)
+            self.assertTrue(df_cache.equals(df))
+            np.testing.assert_allclose(r_cache['Casson']['params'], self.params["Casson"], rtol=1e-5)
+            self.assertNotEqual(reologia_fitting.chave_ajuste(self.gd, tau, 'direto'),
+                                reologia_fitting.chave_ajuste(self.gd, tau, 'curve_fit'))
+
+            # Trocar o critério reaproveita os mesmos ajustes (memória e armazém), só refazendo escolha e ordem
+            ref_r2, best_r2, df_r2 = reologia_fitting.ajustar_modelos(self.gd, tau, criterio='R2', usar_cache=False)
+            for limpar in (False, True):
+                if limpar:
+                    reologia_fitting.limpar_cache_ajustes()
+                with mock.patch.object(reologia_fitting, '_ajustar_um_modelo', side_effect=AssertionError):
+                    _, best_c, df_c = reologia_fitting.ajustar_modelos(self.gd, tau, criterio='R2')
+                self.assertEqual(best_c, best_r2)
+                self.assertEqual(list(df_c['Modelo']), list(df_r2['Modelo']))
+
+            # Poda por tamanho: limite minúsculo mantém apenas os itens mais recentes
+            armazem = reologia_fitting.ativar_cache_persistente(pasta, limite_mb=1500 / 1024**2)
+            for escala in (1.0, 1.5, 2.0, 2.5, 3.0):
+                reologia_fitting.ajustar_modelos(self.gd, tau * escala)
+            self.assertLessEqual(sum(os.path.getsize(os.path.join(pasta, f)) for f in os.listdir(pasta)), 1500)
+            self.assertIsNotNone(armazem.carregar(reologia_fitting.chave_ajuste(self.gd, tau * 3.0, 'direto')))
+        finally:
+            reologia_fitting.limpar_cache_ajustes(desativar_persistente=True)
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    def test_bootstrap_intervalos(self):
+        rng = np.random.default_rng(4)
+        tau = MODELS["Herschel-Bulkley"][0](self.gd, *self.params["Herschel-Bulkley"]) * (1 + 0.02 * rng.standard_normal(len(self.gd)))
+        for tipo in ('residuos', 'pares'):
+            df = reologia_fitting.bootstrap_parametros(self.gd, tau, n_reamostras=500, tipo=tipo)
+            self.assertEqual(len(df), sum(len(m[1]) for m in MODELS.values()))
+            hb = df[df['Modelo'] == "Herschel-Bulkley"]
+            for (_, linha), verdadeiro in zip(hb.iterrows(), self.params["Herschel-Bulkley"]):
+                self.assertLess(linha['IC BCa Inf'], linha['IC BCa Sup'])
+                self.assertLessEqual(linha['IC Percentil Inf'], verdadeiro * 1.05, (tipo, linha['Parametro']))
+                self.assertGreaterEqual(linha['IC Percentil Sup'], verdadeiro * 0.95, (tipo, linha['Parametro']))
+            # Semente fixa: resultado reprodutível
+            self.assertTrue(df.equals(reologia_fitting.bootstrap_parametros(self.gd, tau, n_reamostras=500, tipo=tipo)))
+
+    def test_bootstrap_residuos_centrados(self):
+        # Modelo sem intercepto mal ajustado (Newtoniano em dados HB): resíduos de média não nula não podem
+        # deslocar o intervalo para longe da própria estimativa
+        rng = np.random.default_rng(0)
+        tau = MODELS["Herschel-Bulkley"][0](self.gd, 30.0, 5.0, 0.5) * (1 + 0.05 * rng.standard_normal(len(self.gd)))
+        df = reologia_fitting.bootstrap_parametros(self.gd, tau, n_reamostras=500, tipo='residuos')
+        newt = df[df['Modelo'] == "Newtoniano"].iloc[0]
+        self.assertLess(newt['IC Percentil Inf'], newt['Valor'])
+        self.assertGreater(newt['IC Percentil Sup'], newt['Valor'])
+
+    def test_ajuste_incremental_e_filtragem(self):
+        gd = np.logspace(0, 2.7, 30)
+        rng = np.random.default_rng(5)
+        tau = MODELS["Herschel-Bulkley"][0](gd, *self.params["Herschel-Bulkley"]) * (1 + 0.02 * rng.standard_normal(30))
+        ajuste = reologia_fitting.AjusteIncremental(gd, tau)
+        mascara = np.ones(30, dtype=bool)
+        for i in (4, 17, 9):
+            ajuste.remover(i)
+            mascara[i] = False
+        for nome in MODELS:
+            frio = reologia_fitting._ajustar_um_modelo(nome, gd[mascara], tau[mascara])
+            np.testing.assert_allclose(ajuste.params[nome], frio, rtol=1e-5, err_msg=nome)
+
+        tau_out = tau.copy()
+        tau_out[[3, 12, 25]] *= [1.8, 0.4, 1.5]
+        mascara, model_results, best = reologia_fitting.filtrar_residuos_iterativo(gd, tau_out, limite_rel=0.2,
+                                                                                   nome_modelo="Herschel-Bulkley")
+        self.assertEqual(set(np.flatnonzero(~mascara)), {3, 12, 25})
+        np.testing.assert_allclose(model_results["Herschel-Bulkley"]['params'], self.params["Herschel-Bulkley"], rtol=0.1)
+
+    def test_criterios_de_selecao(self):
+        escolhas = {'R2': [], 'AICc': []}
+        for semente in range(20):
+            rng = np.random.default_rng(semente)
+            tau = MODELS["Bingham"][0](self.gd, 40.0, 1.2) * (1 + 0.03 * rng.standard_normal(len(self.gd)))
+            for criterio in escolhas:
+                escolhas[criterio].append(reologia_fitting.ajustar_modelos(self.gd, tau, criterio=criterio, usar_cache=False)[1])
+        # R² sempre premia o parâmetro extra do HB; AICc escolhe o modelo gerador na maioria das réplicas
+        self.assertEqual(set(escolhas['R2']), {"Herschel-Bulkley"})
+        self.assertGreater(escolhas['AICc'].count("Bingham"), 10)
+
+        # LOO por matriz chapéu é exato para modelo linear: confere com N reajustes explícitos
+        model_results, _, df = reologia_fitting.ajustar_modelos(self.gd, tau, usar_cache=False)
+        erros = []
+        for i in range(len(self.gd)):
+            m = np.arange(len(self.gd)) != i
+            p = reologia_fitting.resolver_bingham(self.gd[m], tau[m])
+            erros.append(tau[i] - MODELS["Bingham"][0](self.gd[i], *p))
+        self.assertAlmostEqual(model_results["Bingham"]['LOO'], np.sqrt(np.mean(np.square(erros))), places=8)
+        self.assertEqual(df.iloc[0]['Modelo'], reologia_fitting.selecionar_melhor_modelo(model_results, 'AICc'))
+
+    def test_criterio_indefinido_com_poucos_pontos(self):
+        # Com 4-5 pontos o AICc é infinito para os modelos de 2-3 parâmetros: todos passam a ser comparados por AIC
+        for n in (4, 5):
+            gd = np.geomspace(1, 300, n)
+            rng = np.random.default_rng(1)
+            tau = MODELS["Herschel-Bulkley"][0](gd, 30.0, 5.0, 0.5) * (1 + 0.005 * rng.standard_normal(n))
+            model_results, best, df = reologia_fitting.ajustar_modelos(gd, tau, usar_cache=False)
+            self.assertFalse(np.isfinite(model_results["Herschel-Bulkley"]['AICc']))
+            self.assertEqual(reologia_fitting.criterio_comparavel(model_results, 'AICc'), 'AIC')
+            self.assertEqual(best, "Herschel-Bulkley")
+            self.assertEqual(df.iloc[0]['Modelo'], best)
+
+    def test_ajuste_robusto(self):
+        gd = np.logspace(0, 2.7, 30)
+        rng = np.random.default_rng(5)
+        tau = MODELS["Herschel-Bulkley"][0](gd, *self.params["Herschel-Bulkley"]) * (1 + 0.02 * rng.standard_normal(30))
+        tau[[3, 12, 25]] *= [1.8, 0.4, 1.5]
+        gd, tau = np.append(gd, -1.0), np.append(tau, 5.0)  # Ponto inválido: fica fora do ajuste
+
+        r_mq, _, _ = reologia_fitting.ajustar_modelos(gd, tau)
+        self.assertNotIn('pesos', r_mq["Herschel-Bulkley"])
+        erro_mq = np.abs(r_mq["Herschel-Bulkley"]['params'] / self.params["Herschel-Bulkley"] - 1).max()
+        for perda in reologia_fitting.PERDAS_ROBUSTAS:
+            model_results, best, _ = reologia_fitting.ajustar_modelos(gd, tau, perda=perda)
+            hb = model_results["Herschel-Bulkley"]
+            self.assertEqual(best, "Herschel-Bulkley")
+            self.assertLess(np.abs(hb['params'] / self.params["Herschel-Bulkley"] - 1).max(), erro_mq / 3)
+            self.assertEqual(len(hb['pesos']), len(gd))
+            self.assertTrue(np.isnan(hb['pesos'][-1]) and not hb['outliers'][-1])
+            self.assertTrue(hb['outliers'][[3, 12, 25]].all(), perda)
+            self.assertTrue((hb['pesos'][[3, 12, 25]] < 0.5).all(), perda)
+        with self.assertRaises(ValueError):
+            reologia_fitting.ajustar_modelos(gd, tau, perda='quadratica')
+
+    def test_modelos_estendidos(self):
+        params = {"Sisko": [0.5, 20.0, 0.4], "Cross": [10.0, 0.5, 0.5, 0.8], "Carreau-Yasuda": [10.0, 0.5, 0.5, 1.5, 0.3],
+                  "Ellis": [8.0, 20.0, 2.5], "Robertson-Stiff": [3.0, 2.0, 0.6], "Mizrahi-Berk": [4.0, 1.5, 0.45]}
+        for nome, p in params.items():
+            tau = REGISTRO_MODELOS[nome].func(self.gd, *p)
+            model_results, best, df = reologia_fitting.ajustar_modelos(self.gd, tau, modelos=[nome], usar_cache=False)
+            self.assertEqual((best, list(df['Modelo'])), (nome, [nome]))
+            np.testing.assert_allclose(model_results[nome]['params'], p, rtol=1e-4, err_msg=nome)
+
+        # Padrão: só os modelos de MODELS; 'todos' compara o registro inteiro
+        rng = np.random.default_rng(0)
+        tau = REGISTRO_MODELOS["Sisko"].func(self.gd, *params["Sisko"]) * (1 + 0.01 * rng.standard_normal(len(self.gd)))
+        self.assertEqual(set(reologia_fitting.ajustar_modelos(self.gd, tau)[0]), set(MODELS))
+        model_results, best, _ = reologia_fitting.ajustar_modelos(self.gd, tau, modelos='todos')
+        self.assertEqual(set(model_results), set(REGISTRO_MODELOS))
+        self.assertEqual(best, "Sisko")
+        with self.assertRaises(ValueError):
+            reologia_fitting.ajustar_modelos(self.gd, tau, modelos=["Sisco"])
+
+    def test_ponderacao_relativa_log_e_sigma(self):
+        gd = np.logspace(-1, 3, 20)  # Quatro décadas: sem ponderação, os pontos de maior tensão dominam
+        rng = np.random.default_rng(3)
+        tau = MODELS["Herschel-Bulkley"][0](gd, *self.params["Herschel-Bulkley"]) * (1 + 0.03 * rng.standard_normal(20))
+        ajustes = {pond: reologia_fitting.ajustar_modelos(gd, tau, ponderacao=pond, usar_cache=False)[0]
+                   for pond in reologia_fitting.PONDERACOES}
+        custo_log = lambda p: np.sum((np.log(MODELS["Herschel-Bulkley"][0](gd, *p)) - np.log(tau))**2)
+        custo_rel = lambda p: np.sum(((MODELS["Herschel-Bulkley"][0](gd, *p) - tau) / tau)**2)
+        hb = {pond: r["Herschel-Bulkley"]['params'] for pond, r in ajustes.items()}
+        self.assertLess(custo_rel(hb['relativa']), custo_rel(hb['absoluta']))
+        self.assertLessEqual(custo_log(hb['log']), custo_log(hb['relativa']) * (1 + 1e-9))
+        for metodo in ('direto', 'curve_fit'):
+            r = reologia_fitting.ajustar_modelos(gd, tau, metodo, ponderacao='relativa', usar_cache=False)[0]
+            np.testing.assert_allclose(r["Herschel-Bulkley"]['params'], hb['relativa'], rtol=1e-4)
+
+        # sigma proporcional a tau equivale à ponderação relativa; pontos inválidos são descartados junto com o sigma
+        sigma = 0.05 * tau
+        r_sigma = reologia_fitting.ajustar_modelos(np.append(gd, 0.0), np.append(tau, 1.0), sigma=np.append(sigma, 1.0))[0]
+        np.testing.assert_allclose(r_sigma["Herschel-Bulkley"]['params'], hb['relativa'], rtol=1e-6)
+        np.testing.assert_allclose(reologia_fitting.sigma_de_replicas([10.0, 20.0, 40.0], [1.0, 0.0, np.nan], [4, 1, 1]),
+                                   [0.5, 1.0, 2.0])
+        with self.assertRaises(ValueError):
+            reologia_fitting.ajustar_modelos(gd, tau, ponderacao='quadratica')
+        with self.assertRaises(ValueError):
+            reologia_fitting.ajustar_modelos(gd, tau, sigma=np.zeros_like(tau))
+        with self.assertRaises(ValueError):
+            reologia_fitting.ajustar_modelos(gd, tau, ponderacao='log', perda='huber')
+
+    def test_metricas_vetorizadas(self):
+        rng = np.random.default_rng(5)
+        y = rng.uniform(1, 10, (4, 12))
+        y_pred = y + rng.normal(0, 0.3, y.shape)
+        mascara = np.ones(y.shape, dtype=bool)
+        mascara[1, 8:] = False
+        y_pred[1, 8:] = np.nan  # Preenchimento fora da máscara não contamina a linha
+        r2 = reologia_metricas.r2(y, y_pred, mascara)
+        for i in range(4):
+            m = mascara[i]
+            yi, pi = y[i, m], y_pred[i, m]
+            r2_ref = 1 - np.sum((yi - pi)**2) / np.sum((yi - yi.mean())**2)
+            self.assertAlmostEqual(r2[i], r2_ref, places=12)
+            self.assertAlmostEqual(reologia_metricas.r2(yi, pi), r2_ref, places=12)
+            self.assertAlmostEqual(reologia_metricas.rmse(y, y_pred, mascara)[i], np.sqrt(np.mean((yi - pi)**2)), places=12)
+            self.assertAlmostEqual(reologia_metricas.mape(y, y_pred, mascara)[i], np.mean(np.abs((yi - pi) / yi)) * 100,
+                                   places=10)
+            self.assertAlmostEqual(reologia_metricas.r2_ajustado(yi, pi, 2), 1 - (1 - r2_ref) * (m.sum() - 1) / (m.sum() - 3),
+                                   places=12)
+        # Convenção do sklearn para dados constantes; critérios idênticos aos de criterios_informacao
+        self.assertEqual(reologia_metricas.r2([2.0, 2.0], [2.0, 2.0]), 1.0)
+        self.assertEqual(reologia_metricas.r2([2.0, 2.0], [2.0, 3.0]), 0.0)
+        self.assertTrue(np.isnan(reologia_metricas.r2_ajustado([1.0, 2.0, 3.0], [1.0, 2.0, 3.0], 2)))
+        gd, tau = self.gd, MODELS["Bingham"][0](self.gd, 3.0, 0.5) + rng.normal(0, 0.2, len(self.gd))
+        popt = reologia_fitting.resolver_bingham(gd, tau)
+        criterios = reologia_fitting.criterios_informacao("Bingham", popt, gd, tau)
+        metricas = reologia_metricas.metricas_ajuste(tau, MODELS["Bingham"][0](gd, *popt), 2)
+        for nome in ('AIC', 'AICc', 'BIC'):
+            self.assertAlmostEqual(metricas[nome], criterios[nome], places=9)
+
+    def test_diagnostico_e_desempenho(self):
+        reologia_fitting.zerar_desempenho_ajustes()
+        rng = np.random.default_rng(1)
+        tau = MODELS["Lei de Potencia"][0](self.gd, *self.params["Lei de Potencia"]) * (1 + 0.02 * rng.standard_normal(15))
+        falha = mock.Mock(side_effect=FloatingPointError("dados degenerados"))
+        with mock.patch.dict(reologia_fitting.SOLVERS_DIRETOS, {"Casson": falha}):
+            model_results, _, _, falhas = reologia_fitting.ajustar_modelos(self.gd, tau, usar_cache=False, retornar_falhas=True)
+        self.assertNotIn("Casson", model_results)
+        self.assertEqual(set(falhas), {"Casson"})
+        self.assertEqual(falhas["Casson"]['status'], 'falhou')
+        self.assertIn("dados degenerados", falhas["Casson"]['motivo_falha'])
+        hb = model_results["Herschel-Bulkley"]['diagnostico']
+        self.assertEqual((hb['status'], hb['solver'], hb['motivo_falha']), ('ok', 'direto', None))
+        self.assertEqual(hb['limites_ativos'], ['tau0'])  # Dados sem tensão limite: tau0 preso em zero
+        self.assertTrue(np.isfinite(hb['cond_jacobiano']) and hb['cond_jacobiano'] >= 1)
+
+        resumo = reologia_fitting.resumo_desempenho_ajustes().set_index('Modelo')
+        self.assertEqual(set(resumo.index), set(MODELS))
+        self.assertEqual(resumo.loc["Casson", 'Falhas'], 1)
+        self.assertIn("dados degenerados", resumo.loc["Casson", 'Ultima falha'])
+        self.assertGreater(resumo['Tempo total (s)'].sum(), 0)
+
+        # Ajustes reconstruídos do armazém persistente são marcados como 'cache' e não entram no resumo
+        pasta = tempfile.mkdtemp()
+        try:
+            reologia_fitting.limpar_cache_ajustes()
+            reologia_fitting.ativar_cache_persistente(pasta)
+            reologia_fitting.ajustar_modelos(self.gd, tau)
+            reologia_fitting.limpar_cache_ajustes()
+            model_results, _, _ = reologia_fitting.ajustar_modelos(self.gd, tau)
+            self.assertEqual(model_results["Bingham"]['diagnostico']['status'], 'cache')
+            self.assertEqual(reologia_fitting.resumo_desempenho_ajustes().set_index('Modelo').loc["Bingham", 'Ajustes'], 2)
+
+            # O motivo da falha também é gravado no armazém
+            with mock.patch.dict(reologia_fitting.SOLVERS_DIRETOS, {"Casson": falha}):
+                reologia_fitting.ajustar_modelos(self.gd, tau * 1.1)
+            reologia_fitting.limpar_cache_ajustes()
+            falhas = reologia_fitting.ajustar_modelos(self.gd, tau * 1.1, retornar_falhas=True)[3]
+            self.assertIn("dados degenerados", falhas["Casson"]['motivo_falha'])
+        finally:
+            reologia_fitting.limpar_cache_ajustes(desativar_persistente=True)
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    def test_partidas_multiplas(self):
+        rng = np.random.default_rng(2)
+        for nome in ("Herschel-Bulkley", "Casson"):
+            tau = MODELS[nome][0](self.gd, *self.params[nome])
+            resolucao = (80, 60) if nome == "Herschel-Bulkley" else (200,)
+            partidas = reologia_fitting.partidas_multiplas(nome, self.gd, tau, resolucao=resolucao)
+            np.testing.assert_allclose(partidas[0], self.params[nome], rtol=0.15, err_msg=nome)
+            self.assertLessEqual(len(partidas), reologia_fitting.N_PARTIDAS_REFINADAS)
+
+            sse = lambda gd, tau, p: np.sum((MODELS[nome][0](gd, *p) - tau)**2)
+            for _ in range(5):
+                gd = np.sort(10**rng.uniform(-1, 3, 8))
+                tau = np.abs(MODELS[nome][0](gd, *self.params[nome]) * (1 + 0.2 * rng.standard_normal(8))) + 1e-3
+                r = reologia_fitting.ajustar_modelos(gd, tau, 'curve_fit', usar_cache=False, modelos=[nome])[0][nome]
+                self.assertEqual(r['diagnostico']['solver'], 'grade+curve_fit')
+                sse_direto = sse(gd, tau, reologia_fitting.SOLVERS_DIRETOS[nome](gd, tau))
+                self.assertLessEqual(sse(gd, tau, r['params']), sse_direto * 1.05)
+
+        # Uma partida que falha não derruba o ajuste: a seguinte é refinada
+        tau = MODELS["Herschel-Bulkley"][0](self.gd, *self.params["Herschel-Bulkley"])
+        popt, _ = reologia_fitting._curve_fit_partidas("Herschel-Bulkley", self.gd, tau,
+                                                       [[np.nan, 1.0, 0.5], self.params["Herschel-Bulkley"]])
+        np.testing.assert_allclose(popt, self.params["Herschel-Bulkley"], rtol=1e-6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+import os
+import json
+import shutil
+import tempfile
+import time
+import unittest
+import numpy as np
+import pandas as pd
+import reologia_io
+import reologia_cache
+
+class TestReologiaIO(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+    def test_companheiro_binario(self):
+        df = pd.DataFrame({
+            'Taxa de Cisalhamento Corrigida (s-1)': [1.5, 10.25, 100.125],
+            'Modelo': ['Bingham', None, 'Casson'],
+            'Tensao de Cisalhamento (Pa)': [20.0, 55.5, np.nan],
+        })
+        caminho_csv = os.path.join(self.pasta, "x_resultados_reologicos.csv")
+        reologia_io.salvar_csv_resultados(df, caminho_csv, sep=';', decimal=',', index=False)
+        self.assertTrue(os.path.exists(reologia_io.caminho_companheiro_binario(caminho_csv)))
+
+        df_bin = reologia_io.carregar_csv_resultados(caminho_csv)
+        self.assertEqual(list(df_bin.columns), list(df.columns))
+        self.assertEqual(list(df_bin['Modelo']), ['Bingham', None, 'Casson'])
+        numericas = [c for c in df.columns if c != 'Modelo']
+        np.testing.assert_array_equal(df_bin[numericas].values, df[numericas].values)
+        # Colunas numéricas sem cópia: vista do memory-map, que não é alterado no disco pelas escritas no DataFrame
+        coluna = df_bin[numericas[0]].to_numpy()
+        while coluna is not None and not isinstance(coluna, np.memmap):
+            coluna = coluna.base
+        self.assertIsInstance(coluna, np.memmap)
+        mapa = np.load(reologia_io.caminho_companheiro_binario(caminho_csv), mmap_mode='r')
+        df_bin.loc[0, numericas[0]] = -1.0
+        self.assertEqual(mapa[0, 0], 1.5)
+
+        # Sem o binário, o CSV continua sendo lido com o mesmo conteúdo
+        os.remove(reologia_io.caminho_companheiro_binario(caminho_csv))
+        df_csv = reologia_io.carregar_csv_resultados(caminho_csv)
+        self.assertEqual(list(df_csv.columns), list(df.columns))
+        np.testing.assert_array_equal(df_csv[numericas].values, df[numericas].values)
+
+    def test_leitura_incremental_json(self):
+        dados = {
+            "id_amostra": "Teste",
+            "diametro_capilar_mm": 1.5,
+            "comprimento_capilar_mm": 43.0,
+            "testes": [{"ponto_n": i, "massa_g_registrada": 1.25 * i, "duracao_real_s": 30.0 + i / 7}
+                       for i in range(50)],
+            "densidade_pasta_g_cm3": 1.63,
+        }
+        caminho = os.path.join(self.pasta, "ensaio.json")
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, indent=4)
+
+        cabecalho = reologia_io.ler_cabecalho_json(caminho)
+        self.assertEqual(cabecalho, {k: v for k, v in dados.items() if k != 'testes'})
+        self.assertEqual(list(reologia_io.iterar_testes_json(caminho)), dados['testes'])
+        self.assertIn("D=1.5 mm", reologia_io.resumo_cabecalho_ensaio(caminho))
+
+        # Blocos minúsculos forçam valores (inclusive números) partidos entre leituras
+        with open(caminho, 'r', encoding='utf-8') as f:
+            leitor = reologia_io._LeitorJsonIncremental(f, tamanho_bloco=3)
+            lido = {}
+            for chave in leitor.chaves_objeto():
+                lido[chave] = list(leitor.elementos_array()) if chave == 'testes' else leitor.valor()
+        self.assertEqual(lido, dados)
+
+    def test_cache_conteudo(self):
+        caminho = os.path.join(self.pasta, "ensaio.json")
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump({"testes": [1, 2, 3]}, f)
+        chave = reologia_cache.chave_conteudo([caminho], {'fator': 1.0})
+        self.assertEqual(chave, reologia_cache.chave_conteudo([caminho], {'fator': 1.0}))
+        self.assertNotEqual(chave, reologia_cache.chave_conteudo([caminho], {'fator': 0.9}))
+
+        pasta_cache = os.path.join(self.pasta, "cache")
+        self.assertIsNone(reologia_cache.carregar_produtos(chave, pasta_cache))
+        meta = {'model_results': {'Bingham': {'params': np.array([2.0, 0.5]), 'R2': 0.99}}}
+        reologia_cache.salvar_produtos(chave, {'tau_w_an': np.array([1.0, 2.5])}, meta, pasta_cache)
+        arrays, meta_lido = reologia_cache.carregar_produtos(chave, pasta_cache)
+        np.testing.assert_array_equal(arrays['tau_w_an'], [1.0, 2.5])
+        np.testing.assert_array_equal(meta_lido['model_results']['Bingham']['params'], [2.0, 0.5])
+
+        # Qualquer alteração no conteúdo do arquivo gera outra chave
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump({"testes": [1, 2, 4]}, f)
+        self.assertNotEqual(chave, reologia_cache.chave_conteudo([caminho], {'fator': 1.0}))
+
+        # Poda por tamanho (limite de 3,5 entradas, poda até 80%): a entrada lida é renovada e sobrevive às mais novas
+        tamanho = sum(os.path.getsize(os.path.join(pasta_cache, chave, f)) for f in os.listdir(os.path.join(pasta_cache, chave)))
+        limite_mb = 3.5 * tamanho / 1024**2
+        agora = time.time()
+        for idade, nova in ((100, "b" * 64), (50, "c" * 64)):
+            reologia_cache.salvar_produtos(nova, {'tau_w_an': np.array([1.0, 2.5])}, meta, pasta_cache, limite_mb)
+            os.utime(os.path.join(pasta_cache, nova, "metadados.json"), (agora - idade, agora - idade))
+        os.utime(os.path.join(pasta_cache, chave, "metadados.json"), (agora - 200, agora - 200))
+        self.assertIsNotNone(reologia_cache.carregar_produtos(chave, pasta_cache))
+        reologia_cache.salvar_produtos("d" * 64, {'tau_w_an': np.array([1.0, 2.5])}, meta, pasta_cache, limite_mb)
+        restantes = {e for e in os.listdir(pasta_cache) if os.path.isdir(os.path.join(pasta_cache, e))}
+        self.assertEqual(restantes, {chave, "d" * 64})
+
+    def test_calibracao_compilada(self):
+        # Curva de lei de potência gamma = 0.01 * tau^2 (reta em log-log), fora de ordem e com tau repetido
+        tau = np.array([400.0, 100.0, 200.0, 100.0, 800.0])
+        caminho = reologia_io.salvar_calibracao_json("bagley", tau, 0.01 * tau**2, ["a.json"], self.pasta)
+
+        tau_novo = np.array([50.0, 150.0, 300.0, 1600.0])
+        gamma = reologia_io.carregar_e_aplicar_calibracao(caminho, tau_novo)
+        np.testing.assert_allclose(gamma, 0.01 * tau_novo**2)
+        self.assertIs(reologia_io.obter_calibracao_compilada(caminho), reologia_io.obter_calibracao_compilada(caminho))
+
+        lote = reologia_io.aplicar_calibracao_lote(caminho, [tau_novo[:1], tau_novo[1:]])
+        np.testing.assert_allclose(np.concatenate(lote), gamma)
+
+        constante = reologia_io.carregar_e_aplicar_calibracao(caminho, tau_novo, extrapolacao='constante')
+        np.testing.assert_allclose(constante[[0, -1]], [0.01 * 100.0**2, 0.01 * 800.0**2])
+        self.assertTrue(np.isnan(reologia_io.carregar_e_aplicar_calibracao(caminho, tau_novo, extrapolacao='nan')[0]))
+
+        # Calibração Bagley antiga (sem 'versao_correcao'): tau_w gravado 2x maior, dividido por 2 na leitura
+        with open(caminho, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+        self.assertEqual(dados['versao_correcao'], reologia_io.VERSAO_CORRECAO_CALIBRACAO)
+        del dados['versao_correcao']
+        caminho_antigo = os.path.join(self.pasta, "calibracao_bagley_antiga.json")
+        with open(caminho_antigo, 'w', encoding='utf-8') as f:
+            json.dump(dados, f)
+        np.testing.assert_allclose(reologia_io.carregar_e_aplicar_calibracao(caminho_antigo, tau_novo), 0.01 * (2 * tau_novo)**2)
+
+    def test_ensaio_colunas(self):
+        dados = {"id_amostra": "E1", "diametro_capilar_mm": 2.0, "comprimento_capilar_mm": 40.0, "densidade_pasta_g_cm3": 1.6,
+                 "descricao": "x", "schema_version": 2,
+                 "testes": [{"ponto_n": 1, "massa_g_registrada": 16.0, "duracao_real_s": 10.0, "media_pressao_linha_bar": 2.0,
+                             "media_pressao_pasta_bar": 1.5, "media_tensao_linha_V": 0.7, "obs": "ok"},
+                            {"ponto_n": 2, "massa_g_registrada": 32.0, "duracao_real_s": 10.0, "media_pressao_linha_bar": 4.0,
+                             "media_pressao_pasta_bar": 3.0}]}
+        ensaio = reologia_io.Ensaio.de_dados(dados)
+        self.assertEqual(len(ensaio), 2)
+        self.assertEqual(ensaio.ponto_n.dtype, np.int64)
+        # Q = (16 g / 1.6 g/cm³) / 10 s = 1 cm³/s ; tau_w = P R / 2L
+        np.testing.assert_allclose(ensaio.vazao_m3_s, [1e-6, 2e-6])
+        np.testing.assert_allclose(ensaio.gamma_dot_aw, 4 * np.array([1e-6, 2e-6]) / (np.pi * 0.001**3))
+        np.testing.assert_allclose(ensaio.tau_w, [2e5 * 1.0 / 80.0, 4e5 * 1.0 / 80.0])
+        np.testing.assert_allclose(ensaio.tensao_parede(usar_pressao_pasta=True), [1.5e5 / 80.0, 3e5 / 80.0])
+
+        self.assertEqual(ensaio.para_dados(), dados)  # Ida e volta sem perdas (inclui campos extras e ausentes)
+        self.assertEqual(ensaio.selecionar([1]).para_dados()['testes'], dados['testes'][1:])
+        with self.assertRaises(AttributeError):
+            ensaio.outro_campo = 1  # __slots__
+
+    def test_importacao_rotacional(self):
+        caminho = os.path.join(self.pasta, "rot.txt")
+        with open(caminho, 'w', encoding='latin-1') as f:
+            f.write("Projeto:\tX\nAmostra\n\n")
+            f.write("1\t1,5\t10,25\t6,8\t\t\t\t0,5\tDy_auto\n2\t3,0\t12,5\t4,2\t\t\t\t0,6\tDy_auto\n")
+            f.write("Intervalo 2\nPoint No.\tShear Rate\tShear Stress\n\t[1/s]\t[Pa]\n3\t6,0\t15,0\n")
+        pasta_cache = os.path.join(self.pasta, "cache")
+        df = reologia_io.importar_rotacional(caminho, pasta_cache=pasta_cache)
+        np.testing.assert_array_equal(df['Shear Rate'], [1.5, 3.0, 6.0])
+        np.testing.assert_array_equal(df['Shear Stress'], [10.25, 12.5, 15.0])
+        self.assertEqual(len(os.listdir(os.path.join(pasta_cache, "rotacional"))), 1)
+        self.assertTrue(reologia_io.importar_rotacional(caminho, pasta_cache=pasta_cache).equals(df))
+
+if __name__ == '__main__':
+    unittest.main()
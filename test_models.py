@@ -1,14 +1,23 @@
+import os
 import numpy as np
 import unittest
-from modelos_reologicos import MODELS, model_newtonian, model_power_law, model_bingham, model_hb, model_casson
+import reologia_kernels
+from modelos_reologicos import MODELS, REGISTRO_MODELOS, PARAM_NAMES_MAP, NOMES_EXIBICAO, nome_exibicao, model_newtonian, model_power_law, model_bingham, model_hb, model_casson
 
 class TestModelosReologicos(unittest.TestCase):
     def test_imports(self):
         self.assertIn("Newtoniano", MODELS)
-        self.assertIn("Lei da Potência", MODELS)
+        self.assertIn("Lei de Potencia", MODELS)
         self.assertIn("Bingham", MODELS)
         self.assertIn("Herschel-Bulkley", MODELS)
         self.assertIn("Casson", MODELS)
+        # Rótulos e nomes de exibição usam as mesmas chaves do registro
+        self.assertEqual(set(PARAM_NAMES_MAP), set(REGISTRO_MODELOS))
+        self.assertEqual(NOMES_EXIBICAO["Lei de Potencia"], "Lei da Potência")
+        self.assertEqual(nome_exibicao("Lei de Potencia"), "Lei da Potência")
+        self.assertEqual(nome_exibicao("Modelo Antigo"), "Modelo Antigo")  # Nomes fora do registro passam inalterados
+        for nome, modelo in REGISTRO_MODELOS.items():
+            self.assertEqual(len(PARAM_NAMES_MAP[nome]), len(modelo.param_names))
 
     def test_newtonian(self):
         gd = np.array([1.0, 2.0, 3.0])
@@ -45,5 +54,60 @@ class TestModelosReologicos(unittest.TestCase):
         expected = (np.sqrt(tau0) + np.sqrt(eta) * np.sqrt(gd))**2
         np.testing.assert_array_almost_equal(model_casson(gd, tau0, eta), expected)
 
+    def test_jacobianos_vs_diferencas_finitas(self):
+        gd = np.logspace(-1, 3, 12)
+        params_teste = {"Newtoniano": [2.0], "Lei de Potencia": [3.0, 0.6], "Bingham": [5.0, 0.3],
+                        "Herschel-Bulkley": [5.0, 2.0, 0.7], "Casson": [4.0, 0.5], "Sisko": [0.05, 3.0, 0.4],
+                        "Cross": [10.0, 0.05, 0.5, 0.8], "Carreau-Yasuda": [10.0, 0.05, 0.5, 1.5, 0.3],
+                        "Ellis": [8.0, 20.0, 2.5], "Robertson-Stiff": [3.0, 2.0, 0.6], "Mizrahi-Berk": [4.0, 1.5, 0.45]}
+        for nome, (func, param_names, _, _, jac) in REGISTRO_MODELOS.items():
+            p = np.array(params_teste[nome], dtype=float)
+            J = jac(gd, *p)
+            self.assertEqual(J.shape, (len(gd), len(param_names)))
+            for j in range(len(p)):
+                h = 1e-6 * max(abs(p[j]), 1.0)
+                p_mais, p_menos = p.copy(), p.copy()
+                p_mais[j] += h; p_menos[j] -= h
+                df = (func(gd, *p_mais) - func(gd, *p_menos)) / (2 * h)
+                np.testing.assert_allclose(J[:, j], df, rtol=1e-5, atol=1e-8, err_msg=f"{nome}, parâmetro {j}")
+
+    def test_ellis_implicito(self):
+        gd = np.logspace(-2, 4, 40)
+        eta0, tau_meio, alfa = 8.0, 20.0, 2.5
+        tau = REGISTRO_MODELOS["Ellis"].func(gd, eta0, tau_meio, alfa)
+        np.testing.assert_allclose(tau / eta0 * (1 + (tau / tau_meio)**(alfa - 1)), gd, rtol=1e-12)
+        # Lote: parâmetros (B, 1) contra gd (B, N)
+        P = np.array([[eta0, tau_meio, alfa], [1.0, 5.0, 1.5]])
+        lote = REGISTRO_MODELOS["Ellis"].func(gd[None], *P.T[:, :, None])
+        np.testing.assert_allclose(lote[0], tau)
+
+    def test_kernels_compilaveis_equivalem_ao_numpy(self):
+        # Chama os kernels diretamente: compilados com numba, ou em Python puro sem ele (mesmo código-fonte)
+        gd = np.concatenate([[0.0], np.logspace(-1, 3, 9)])
+        params_teste = {"Newtoniano": [2.0], "Lei de Potencia": [3.0, 0.6], "Bingham": [5.0, 0.3],
+                        "Herschel-Bulkley": [5.0, 2.0, 0.7], "Casson": [4.0, 0.5]}
+        for nome, (kernel_tau, kernel_jac) in reologia_kernels.KERNELS.items():
+            func, _, _, _, jac = MODELS[nome]
+            p = np.array(params_teste[nome])
+            tau, J = np.empty(len(gd)), np.empty((len(gd), len(p)))
+            kernel_tau(gd, p, tau)
+            kernel_jac(gd, p, J)
+            np.testing.assert_allclose(tau, func(gd, *p), rtol=1e-13, err_msg=nome)
+            np.testing.assert_allclose(J, jac(gd, *p), rtol=1e-13, err_msg=nome)
+
+        # Despacho: numba por padrão quando instalado; o NumPy dá resultado exatamente igual ao da função do registro
+        backend = reologia_kernels.backend_ativo()
+        if 'REOLOGIA_BACKEND' not in os.environ:
+            self.assertEqual(backend, 'numba' if reologia_kernels.NUMBA_DISPONIVEL else 'numpy')
+        try:
+            reologia_kernels.definir_backend('numpy')
+            np.testing.assert_array_equal(reologia_kernels.avaliar_modelo("Casson", gd, [4.0, 0.5]), model_casson(gd, 4.0, 0.5))
+            if reologia_kernels.NUMBA_DISPONIVEL:
+                reologia_kernels.definir_backend('numba')
+                np.testing.assert_allclose(reologia_kernels.jacobiano_modelo("Casson", gd, [4.0, 0.5]),
+                                           MODELS["Casson"][4](gd, 4.0, 0.5), rtol=1e-13)
+        finally:
+            reologia_kernels.definir_backend(backend)
+
 if __name__ == '__main__':
     unittest.main()
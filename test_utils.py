@@ -1,8 +1,15 @@
 import unittest
 import os
+import json
 import shutil
+import tempfile
+from unittest import mock
 import numpy as np
-from utils_reologia import format_float_for_table, CONSTANTS, selecionar_arquivo
+import pandas as pd
+import utils_reologia
+from utils_reologia import format_float_for_table, CONSTANTS, selecionar_arquivo, escrita_atomica, salvar_json_atomico, bloquear_pasta
+from utils_reologia import salvar_csv_atomico
+from utils_reologia import migrar_esquema_ensaio, ensaio_na_versao_atual, VERSAO_ESQUEMA_ENSAIO
 
 class TestUtilsReologia(unittest.TestCase):
     def test_constants(self):
@@ -18,5 +25,69 @@ class TestUtilsReologia(unittest.TestCase):
     def test_selecionar_arquivo_exists(self):
         self.assertTrue(callable(selecionar_arquivo))
 
+    def test_salvar_csv_atomico_encoding(self):
+        pasta = tempfile.mkdtemp()
+        try:
+            caminho = os.path.join(pasta, "dados.csv")
+            salvar_csv_atomico(pd.DataFrame({'Tensão': [1.5]}), caminho, index=False, encoding='latin-1')
+            with open(caminho, 'rb') as f:
+                self.assertEqual(f.read().splitlines()[0], 'Tensão'.encode('latin-1'))
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    def test_escrita_atomica(self):
+        pasta = tempfile.mkdtemp()
+        try:
+            caminho = os.path.join(pasta, "dados.json")
+            with bloquear_pasta(pasta):
+                salvar_json_atomico(caminho, {"a": 1})
+            # Uma falha no meio da escrita não corrompe o arquivo existente
+            with self.assertRaises(RuntimeError):
+                with escrita_atomica(caminho) as f:
+                    f.write('{"a": ')
+                    raise RuntimeError("interrompido")
+            with open(caminho, 'r', encoding='utf-8') as f:
+                self.assertEqual(json.load(f), {"a": 1})
+            self.assertEqual(sorted(os.listdir(pasta)), [".lock", "dados.json"])
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    def test_bloqueio_windows_espera(self):
+        # msvcrt simulado: o bloqueio está ocupado nas duas primeiras tentativas; a terceira consegue
+        msvcrt = mock.Mock(LK_NBLCK=2, LK_UNLCK=0)
+        msvcrt.locking.side_effect = [OSError("ocupado"), OSError("ocupado"), None, None]
+        pasta = tempfile.mkdtemp()
+        try:
+            with mock.patch.multiple(utils_reologia, fcntl=None, msvcrt=msvcrt), mock.patch.object(utils_reologia.time, 'sleep') as espera:
+                with bloquear_pasta(pasta):
+                    pass
+            self.assertEqual([c.args[1:] for c in msvcrt.locking.call_args_list], [(2, 1)] * 3 + [(0, 1)])
+            self.assertEqual(espera.call_count, 2)
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    def test_migracao_esquema_ensaio(self):
+        legado = {"rho_g_cm3": 1.6, "D_mm": 2.0, "L_mm": 43.0, "duracao_por_teste_s": 30,
+                  "testes": [{"ponto_n": 1, "pressao_bar": 1.5, "massa_g": 10.0},
+                             {"ponto_n": 2, "media_pressao_sistema_bar": 2.5, "massa_g_registrada": 12.0, "duracao_real_s": 28.0}]}
+        novo = migrar_esquema_ensaio(legado)
+        self.assertTrue(ensaio_na_versao_atual(novo))
+        self.assertEqual(novo['schema_version'], VERSAO_ESQUEMA_ENSAIO)
+        self.assertEqual((novo['densidade_pasta_g_cm3'], novo['diametro_capilar_mm'], novo['comprimento_capilar_mm']), (1.6, 2.0, 43.0))
+        self.assertEqual([t['duracao_real_s'] for t in novo['testes']], [30.0, 28.0])
+        self.assertEqual([t['media_pressao_linha_bar'] for t in novo['testes']], [1.5, 2.5])
+        self.assertEqual([t['massa_g_registrada'] for t in novo['testes']], [10.0, 12.0])
+        self.assertNotIn('schema_version', legado)  # O original não é alterado
+        self.assertIs(migrar_esquema_ensaio(novo), novo)
+
+        # Zero no nome atual é um valor válido e não é sobrescrito pelo alias; None recorre ao alias
+        zeros = migrar_esquema_ensaio({"testes": [{"media_pressao_linha_bar": 0.0, "media_pressao_final_ponto_bar": 3.0,
+                                                   "duracao_real_s": 0.0, "duracao_s": 5.0, "massa_g_registrada": None, "massa_g": 7.0}]})
+        t = zeros['testes'][0]
+        self.assertEqual((t['media_pressao_linha_bar'], t['duracao_real_s'], t['massa_g_registrada']), (0.0, 0.0, 7.0))
+
+        plano = migrar_esquema_ensaio({"pressoes_bar_list": [1.0, 2.0], "massas_g_list": [5.0, 6.0]})
+        self.assertEqual([(t['media_pressao_linha_bar'], t['media_pressao_pasta_bar']) for t in plano['testes']], [(1.0, 1.0), (2.0, 2.0)])
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,10 +1,24 @@
 import os
 import glob
+import json
+import time
+import tempfile
+from contextlib import contextmanager
 import numpy as np
 import matplotlib
 import matplotlib.pyplot as plt
 from datetime import datetime
 
+# Bloqueio consultivo de arquivos: fcntl (Linux/macOS) ou msvcrt (Windows)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
 # -----------------------------------------------------------------------------
 # --- CONSTANTES GERAIS ---
 # -----------------------------------------------------------------------------
@@ -16,7 +30,8 @@ CONSTANTS = {
     'CAMINHO_BASE_ROTACIONAL': "resultados_processados_interativo",
     'JSON_INPUT_DIR': "resultados_testes_reometro", # Usado em scripts de coleta/filtro
     'RESULTS_JSON_DIR': "resultados_testes_reometro", # Alias comum
-    'CALIBRATIONS_FOLDER': "correcoes_bagley_mooney"
+    'CALIBRATIONS_FOLDER': "correcoes_bagley_mooney",
+    'CACHE_FOLDER': "cache_resultados" # Produtos de análises anteriores (reologia_cache)
 }
 
 # -----------------------------------------------------------------------------
@@ -33,6 +48,163 @@ def gerar_timestamp():
     """Gera uma string de timestamp atual (YYYYMMDD_HHMMSS)."""
     return datetime.now().strftime("%Y%m%d_%H%M%S")
 
+# -----------------------------------------------------------------------------
+# --- ESCRITA SEGURA DE ARQUIVOS (ATÔMICA + BLOQUEIO) ---
+# -----------------------------------------------------------------------------
+INTERVALO_ESPERA_BLOQUEIO_S = 0.05  # Windows: intervalo entre tentativas de obter o bloqueio
+
+def _travar_msvcrt(fd):
+    """
+    Espera indefinidamente pelo bloqueio do primeiro byte, como o fcntl.flock bloqueante: o LK_LOCK do
+    msvcrt desiste (OSError) após ~10 tentativas de 1 s, então tenta-se LK_NBLCK em laço.
+    """
+    while True:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return
+        except OSError:
+            time.sleep(INTERVALO_ESPERA_BLOQUEIO_S)
+
+@contextmanager
+def bloquear_pasta(pasta):
+    """
+    Bloqueio consultivo exclusivo sobre '<pasta>/.lock', para serializar escritores que
+    compartilham a mesma pasta (ex: estação de coleta e processamentos em lote).
+    Aguarda sem limite de tempo pelo escritor atual, em Linux/macOS e no Windows.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    with open(os.path.join(pasta, ".lock"), 'a+') as f_lock:
+        if fcntl:
+            fcntl.flock(f_lock.fileno(), fcntl.LOCK_EX)
+        elif msvcrt:
+            f_lock.seek(0)
+            _travar_msvcrt(f_lock.fileno())
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f_lock.fileno(), fcntl.LOCK_UN)
+            elif msvcrt:
+                f_lock.seek(0)
+                msvcrt.locking(f_lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+@contextmanager
+def escrita_atomica(caminho, modo='w', encoding='utf-8', newline=None):
+    """
+    Abre um arquivo temporário na mesma pasta de 'caminho' e, ao final do bloco 'with',
+    substitui o destino com os.replace. Leitores concorrentes nunca veem um arquivo pela metade;
+    se ocorrer um erro, o destino original fica intacto.
+    """
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    os.makedirs(pasta, exist_ok=True)
+    fd, caminho_tmp = tempfile.mkstemp(prefix=f".{os.path.basename(caminho)}.", suffix=".tmp", dir=pasta)
+    try:
+        if 'b' in modo:
+            f = os.fdopen(fd, modo)
+        else:
+            f = os.fdopen(fd, modo, encoding=encoding, newline=newline)
+        with f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp cria com permissão 0600: mantém a do arquivo existente (ou 0644)
+        permissao = (os.stat(caminho).st_mode & 0o777) if os.path.exists(caminho) else 0o644
+        os.chmod(caminho_tmp, permissao)
+        os.replace(caminho_tmp, caminho)
+    except BaseException:
+        try:
+            os.remove(caminho_tmp)
+        except OSError:
+            pass
+        raise
+
+def salvar_json_atomico(caminho, dados, **kwargs_json):
+    """Grava 'dados' em JSON de forma atômica (argumentos extras repassados para json.dump)."""
+    with escrita_atomica(caminho) as f:
+        json.dump(dados, f, **kwargs_json)
+    return caminho
+
+def salvar_texto_atomico(caminho, conteudo):
+    """Grava um arquivo de texto de forma atômica."""
+    with escrita_atomica(caminho) as f:
+        f.write(conteudo)
+    return caminho
+
+def salvar_csv_atomico(df, caminho, **kwargs_csv):
+    """
+    Grava um DataFrame em CSV de forma atômica (argumentos extras repassados para DataFrame.to_csv).
+    'encoding' (padrão utf-8) é aplicado ao arquivo aberto, já que o to_csv o ignora em arquivos abertos.
+    """
+    encoding = kwargs_csv.pop('encoding', None) or 'utf-8'
+    with escrita_atomica(caminho, encoding=encoding, newline='') as f:
+        df.to_csv(f, **kwargs_csv)
+    return caminho
+
+# -----------------------------------------------------------------------------
+# --- ESQUEMA DOS ARQUIVOS DE ENSAIO (JSON) ---
+# -----------------------------------------------------------------------------
+# Versão 2 (atual): cabeçalho com 'diametro_capilar_mm', 'comprimento_capilar_mm', 'densidade_pasta_g_cm3'
+# e cada item de 'testes' com 'duracao_real_s', 'massa_g_registrada', 'media_pressao_linha_bar' e
+# 'media_pressao_pasta_bar'. Arquivos sem 'schema_version' são tratados como versão 1 (legado).
+VERSAO_ESQUEMA_ENSAIO = 2
+
+# Nomes antigos -> nome atual (o primeiro encontrado, na ordem, é usado)
+_ALIASES_CABECALHO = {
+    'densidade_pasta_g_cm3': ('rho_g_cm3',),
+    'diametro_capilar_mm': ('D_mm',),
+    'comprimento_capilar_mm': ('L_mm',),
+}
+_ALIASES_TESTE = {
+    'duracao_real_s': ('duracao_s',),
+    'massa_g_registrada': ('massa_g',),
+    'media_pressao_linha_bar': ('media_pressao_sistema_bar', 'pressao_bar', 'media_pressao_final_ponto_bar'),
+}
+_ALIASES_MANTIDOS = ('media_pressao_final_ponto_bar',)  # Campo ainda gravado pelo 1.Controle (cópia da linha)
+
+def ensaio_na_versao_atual(dados):
+    return isinstance(dados, dict) and dados.get('schema_version') == VERSAO_ESQUEMA_ENSAIO
+
+def migrar_esquema_ensaio(dados):
+    """
+    Converte os dados de um ensaio (dict lido do JSON) para o esquema atual.
+    Retorna um novo dict com 'schema_version' carimbado; o dict original não é alterado.
+    """
+    if ensaio_na_versao_atual(dados):
+        return dados
+    novo = {k: v for k, v in dados.items() if k not in ('pressoes_bar_list', 'massas_g_list', 'duracao_por_teste_s')}
+    for chave, aliases in _ALIASES_CABECALHO.items():
+        for alias in aliases:
+            if chave in novo: break
+            if alias in novo: novo[chave] = novo.pop(alias)
+
+    if isinstance(dados.get('testes'), list):
+        testes = [dict(t) for t in dados['testes']]
+    else:
+        # Formato antigo plano: listas paralelas de pressão (um sensor) e massa
+        testes = [{'ponto_n': i + 1, 'media_pressao_linha_bar': p, 'media_pressao_pasta_bar': p, 'massa_g_registrada': m}
+                  for i, (p, m) in enumerate(zip(dados.get('pressoes_bar_list', []), dados.get('massas_g_list', [])))]
+
+    duracao_global = dados.get('duracao_por_teste_s')
+    for t in testes:
+        for chave, aliases in _ALIASES_TESTE.items():
+            for alias in aliases:
+                if t.get(chave) is not None: break  # 0.0 é um valor válido; só None/ausente recorre ao alias
+                if alias in t: t[chave] = t[alias] if alias in _ALIASES_MANTIDOS else t.pop(alias)
+        if t.get('duracao_real_s') is None and duracao_global is not None:
+            t['duracao_real_s'] = float(duracao_global)
+        t.setdefault('massa_g_registrada', 0.0)
+        t.setdefault('media_pressao_linha_bar', 0.0)
+        t.setdefault('media_pressao_pasta_bar', 0.0)  # Ensaios de um sensor não têm pressão na pasta
+    novo['testes'] = testes
+    novo['schema_version'] = VERSAO_ESQUEMA_ENSAIO
+    return novo
+
+def carregar_ensaio_json(caminho):
+    """Lê um JSON de ensaio já no esquema atual (arquivos legados são migrados em memória)."""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+    return dados if ensaio_na_versao_atual(dados) else migrar_esquema_ensaio(dados)
+
 # -----------------------------------------------------------------------------
 # --- FORMATAÇÃO ---
 # -----------------------------------------------------------------------------
@@ -48,7 +220,7 @@ def format_float_for_table(value, decimal_places=4):
 # -----------------------------------------------------------------------------
 # --- SELEÇÃO DE ARQUIVOS ---
 # -----------------------------------------------------------------------------
-def selecionar_arquivo(diretorio_base, padrao_busca="*", mensagem_prompt="Selecione um arquivo", extensao_filtro=None, recursivo=False):
+def selecionar_arquivo(diretorio_base, padrao_busca="*", mensagem_prompt="Selecione um arquivo", extensao_filtro=None, recursivo=False, formatar_info=None):
     """
     Lista e permite ao usuário selecionar um arquivo de um diretório.
     
@@ -58,6 +230,8 @@ def selecionar_arquivo(diretorio_base, padrao_busca="*", mensagem_prompt="Seleci
         mensagem_prompt (str): Mensagem para exibir ao usuário.
         extensao_filtro (str, opcional): Extensão obrigatória para validação manual (ex: '.json').
         recursivo (bool): Se True, busca em subpastas.
+        formatar_info (callable, opcional): Função (caminho -> str) com um resumo exibido ao lado
+            de cada arquivo (ex: reologia_io.resumo_cabecalho_ensaio).
     
     Returns:
         str: Caminho completo do arquivo selecionado, ou None se cancelado.
@@ -87,6 +261,10 @@ def selecionar_arquivo(diretorio_base, padrao_busca="*", mensagem_prompt="Seleci
         else:
             display_name = nome_arquivo
             
+        if formatar_info:
+            info = formatar_info(caminho_completo)
+            if info: display_name = f"{display_name}  [{info}]"
+
         arquivos_exibicao.append(caminho_completo)
         print(f"  {i+1}: {display_name}")
 